@@ -0,0 +1,86 @@
+from PyQt5.QtCore import QObject, pyqtSignal
+import json, os
+from engine.Aircraft import AircraftModel
+from Profiling import timed
+
+class AircraftRepository(QObject):
+
+    """
+    Single owner of every parsed aircraft (and customs) .json file, held by the NavigationController
+
+    Each file is parsed once and re-parsed only when its mtime or size changes, all screens share the same parsed data,
+    saving through the repository writes the file and tells every screen showing it to refresh
+
+    model(path) is the file's AircraftModel, built once per parsed or saved version of the file and of the table files
+    it refers to, screens edit the shared dict in place before saving so the model is dropped on every save
+    """
+
+    dataChanged = pyqtSignal(str)
+
+    def __init__(self,parent=None):
+        super().__init__(parent)
+        self.entries = {}
+        self.models = {}
+
+    def key(self,path):
+        return os.path.abspath(path)
+
+    def stamp(self,path):
+        st = os.stat(path)
+        return (st.st_mtime_ns,st.st_size)
+
+    def get(self,path):
+        key = self.key(path)
+        try:
+            stamp = self.stamp(key)
+        except OSError:
+            raise RuntimeError(f"File not found: {path}")
+        cached = self.entries.get(key)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        data = self.parse(key)
+        self.entries[key] = (stamp,data)
+        self.models.pop(key,None)
+        # Changed on disk behind our back (eg., another instance), let the screens know
+        if cached is not None:
+            self.dataChanged.emit(key)
+        return data
+
+    def model(self,path):
+        data = self.get(path)
+        key = self.key(path)
+        cached = self.models.get(key)
+        if cached is not None and cached[1] == self.sourceStamps(cached[0]):
+            return cached[0]
+        model = AircraftModel.fromData(data,os.path.dirname(key))
+        self.models[key] = (model,self.sourceStamps(model))
+        return model
+
+    def sourceStamps(self,model):
+        try:
+            return [self.stamp(source) for source in model.sources()]
+        except OSError:
+            return None
+
+    @timed("load:json")
+    def parse(self,path):
+        try:
+            with open(path,"r") as f:
+                return json.load(f)
+        except(OSError,json.JSONDecodeError):
+            raise RuntimeError(f"File not found or invalid: {path}")
+
+    def save(self,path,data):
+        key = self.key(path)
+        self.write(key,data)
+        self.entries[key] = (self.stamp(key),data)
+        self.models.pop(key,None)
+        self.dataChanged.emit(key)
+
+    @timed("save:json")
+    def write(self,path,data):
+        with open(path,"w") as f:
+            json.dump(data,f,indent=4)
+
+    def isSameFile(self,path,other):
+        return path is not None and other is not None and self.key(path) == self.key(other)
@@ -0,0 +1,145 @@
+import json
+import os
+import sqlite3
+from engine.Aircraft import AircraftModel
+
+class Library:
+
+    """
+    SQLite index of every aircraft .json file in the library folders
+
+    Each file's name, Designation and key stats (SI) are stored with its mtime and size, a scan only re-parses files whose
+    mtime or size changed and drops files that are gone, so re-scanning thousands of unchanged files is a stat() each
+
+    Kept free of Qt so it can be scanned from a worker thread, every call opens its own connection
+    """
+
+    columns = ["name","designation","weight","thrust","wingArea","wingSpan","CLMax","thrustToWeight","mtime"]
+
+    def __init__(self,dbPath=None):
+        if dbPath is None:
+            dbPath = os.environ.get("FMC_LIBRARY") or os.path.join(os.path.expanduser("~"),".cache","FlightModelCalculator","library.sqlite")
+        self.dbPath = dbPath
+        folder = os.path.dirname(os.path.abspath(dbPath))
+        os.makedirs(folder,exist_ok=True)
+        with self.connect() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS folders (path TEXT PRIMARY KEY)")
+            db.execute("""CREATE TABLE IF NOT EXISTS aircraft (
+                path TEXT PRIMARY KEY, folder TEXT, file TEXT, name TEXT, designation TEXT,
+                weight REAL, thrust REAL, wingArea REAL, wingSpan REAL, CLMax REAL, thrustToWeight REAL,
+                mtime INTEGER, size INTEGER)""")
+            db.execute("CREATE INDEX IF NOT EXISTS aircraftFolder ON aircraft (folder)")
+
+    def connect(self):
+        return sqlite3.connect(self.dbPath,timeout=10)
+
+    # ----- Folders -----
+
+    def folders(self):
+        with self.connect() as db:
+            return [row[0] for row in db.execute("SELECT path FROM folders ORDER BY path")]
+
+    def addFolder(self,folder):
+        with self.connect() as db:
+            db.execute("INSERT OR IGNORE INTO folders (path) VALUES (?)",(os.path.abspath(folder),))
+
+    def removeFolder(self,folder):
+        folder = os.path.abspath(folder)
+        with self.connect() as db:
+            db.execute("DELETE FROM folders WHERE path = ?",(folder,))
+            db.execute("DELETE FROM aircraft WHERE folder = ?",(folder,))
+
+    # ----- Scanning -----
+
+    def entry(self,path,folder,stamp):
+        try:
+            with open(path,"r") as f:
+                data = json.load(f)
+            aircraft = data["aircraft"]
+        except (OSError,json.JSONDecodeError,KeyError,TypeError):
+            return None
+        stats = aircraft.get("stats") or {}
+        try:
+            model = AircraftModel.fromStats(stats,folder=folder)
+            values = (model.weight,model.thrust,model.wingArea,model.wingSpan,model.CLMax,model.thrustToWeight)
+        except (RuntimeError,TypeError,ValueError):
+            # Created but stats not filled in yet, still listed by name
+            values = (None,) * 6
+        return (path,folder,os.path.basename(path),aircraft.get("name"),stats.get("Designation")) + values + (stamp[0],stamp[1])
+
+    def scan(self,folders=None):
+        counts = {"added": 0,"updated": 0,"removed": 0,"unchanged": 0}
+        folders = self.folders() if folders is None else [os.path.abspath(folder) for folder in folders]
+        with self.connect() as db:
+            for folder in folders:
+                known = {path: (mtime,size) for path, mtime, size in db.execute("SELECT path, mtime, size FROM aircraft WHERE folder = ?",(folder,))}
+                seen = set()
+                changed = []
+                try:
+                    entries = list(os.scandir(folder))
+                except OSError:
+                    entries = []
+                for item in entries:
+                    if not item.name.endswith(".json") or not item.is_file():
+                        continue
+                    st = item.stat()
+                    stamp = (st.st_mtime_ns,st.st_size)
+                    path = os.path.abspath(item.path)
+                    seen.add(path)
+                    if known.get(path) == stamp:
+                        counts["unchanged"] += 1
+                        continue
+                    row = self.entry(path,folder,stamp)
+                    if row is None:
+                        continue
+                    counts["updated" if path in known else "added"] += 1
+                    changed.append(row)
+                db.executemany("INSERT OR REPLACE INTO aircraft VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)",changed)
+                gone = [(path,) for path in known if path not in seen]
+                db.executemany("DELETE FROM aircraft WHERE path = ?",gone)
+                counts["removed"] += len(gone)
+        return counts
+
+    # Re-index one file after it was saved, only when it sits in a library folder
+    def updateFile(self,path):
+        path = os.path.abspath(path)
+        folder = os.path.dirname(path)
+        if folder not in self.folders():
+            return
+        try:
+            st = os.stat(path)
+        except OSError:
+            return
+        row = self.entry(path,folder,(st.st_mtime_ns,st.st_size))
+        if row is not None:
+            with self.connect() as db:
+                db.execute("INSERT OR REPLACE INTO aircraft VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)",row)
+
+    # ----- Querying -----
+
+    def search(self,text="",sortBy="name",descending=False,limit=None):
+        if sortBy not in self.columns:
+            sortBy = "name"
+        order = "DESC" if descending else "ASC"
+        sql = "SELECT path, " + ", ".join(self.columns) + " FROM aircraft"
+        args = []
+        text = text.strip()
+        if text:
+            pattern = f"%{text}%"
+            sql += " WHERE name LIKE ? OR designation LIKE ? OR file LIKE ?"
+            args += [pattern,pattern,pattern]
+        # NULLs (stats not filled in) always last
+        sql += f" ORDER BY {sortBy} IS NULL, {sortBy} COLLATE NOCASE {order}" if sortBy in ("name","designation") else f" ORDER BY {sortBy} IS NULL, {sortBy} {order}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(int(limit))
+        with self.connect() as db:
+            return db.execute(sql,args).fetchall()
+
+    def count(self,text=""):
+        text = text.strip()
+        with self.connect() as db:
+            if not text:
+                return db.execute("SELECT COUNT(*) FROM aircraft").fetchone()[0]
+            pattern = f"%{text}%"
+            return db.execute("SELECT COUNT(*) FROM aircraft WHERE name LIKE ? OR designation LIKE ? OR file LIKE ?",(pattern,pattern,pattern)).fetchone()[0]
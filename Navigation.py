@@ -1,10 +1,25 @@
-from PyQt5.QtWidgets import QStackedWidget
+from PyQt5.QtWidgets import QStackedWidget, QShortcut
+from PyQt5.QtGui import QKeySequence
+from PyQt5.QtCore import QTimer
+import time
+from AircraftRepository import AircraftRepository
+from Library import Library
 from screens.SelectScreen import SelectScreen
 from screens.CreateAircraft import CreateAircraft
 from screens.Home import Home
-from screens.AirSpeedIndicationGraph import AirSpeedIndicationGraph
-from screens.TurnPerformance import TurnPerformance
-from screens.ThrustGraph import ThrustGraph
+from StartupReport import timedImport
+from Profiling import stage
+from PlotWorker import PlotWorker
+
+# Graph screens pull in pyqtgraph and NumPy, so they are only imported the first time they are opened
+graphScreens = {
+    "createGraph": ("screens.AirSpeedIndicationGraph","AirSpeedIndicationGraph"),
+    "createAir": ("screens.TurnPerformance","TurnPerformance"),
+    "createThrust": ("screens.ThrustGraph","ThrustGraph"),
+    "createEnergy": ("screens.EnergyManeuverability","EnergyManeuverability"),
+}
+
+preloadModules = ["numpy","pyqtgraph"] + [module for module, _ in graphScreens.values()] + ["screens.FleetComparison"]
 
 class NavigationController:
     
@@ -12,27 +27,67 @@ class NavigationController:
     Handles navigation between different app screens
     
     Manages switching between layouts (eg., Select Screen -> Home) and keeps track of the current screen
+    
+    Screens are created the first time they are opened and reused afterwards while they show the same file,
+    screens that haven't been shown for idleLimit seconds are removed from the stack and freed
     """
     
+    idleLimit = 300
+    sweepInterval = 60 * 1000
+    pinned = ("start","home")
+    
     def __init__(self):
         self.stack = QStackedWidget()
         self.screens = {}
+        self.lastUsed = {}
+        self.repository = AircraftRepository()
+        self.library = Library()
+        self.repository.dataChanged.connect(self.library.updateFile)
         
         self.startScreen = SelectScreen(self)
         self.startScreen.fileSelected.connect(self.goToHome)
         self.startScreen.createAircraft.connect(self.goToCreateCharacter)
+        self.startScreen.compareFiles.connect(self.goToFleet)
         
         self.addScreen("start",self.startScreen)
         
         self.setCurrent("start")
         
+        self.sweepTimer = QTimer(self.stack)
+        self.sweepTimer.timeout.connect(self.releaseIdleScreens)
+        self.sweepTimer.start(self.sweepInterval)
+        
+        self.debugPanel = None
+        self.debugShortcut = QShortcut(QKeySequence("Ctrl+Shift+D"),self.stack)
+        self.debugShortcut.activated.connect(self.showDebugPanel)
+        
     def addScreen(self,name,widget):
+        if name in self.screens:
+            self.removeScreen(name)
         self.screens[name] = widget
         self.stack.addWidget(widget)    
     
+    def removeScreen(self,name):
+        widget = self.screens.pop(name,None)
+        self.lastUsed.pop(name,None)
+        if widget is None:
+            return
+        self.stack.removeWidget(widget)
+        # Every worker the screen owns (plot, carpet, envelope, grid...), not just the main one
+        for worker in widget.findChildren(PlotWorker):
+            worker.cancel()
+        if hasattr(widget,"onDataChanged"):
+            try:
+                self.repository.dataChanged.disconnect(widget.onDataChanged)
+            except TypeError:
+                pass
+        widget.deleteLater()
+    
     def setCurrent(self,name):
         if name in self.screens:
-            self.stack.setCurrentWidget(self.screens[name])
+            with stage(f"navigate:{name}"):
+                self.stack.setCurrentWidget(self.screens[name])
+            self.lastUsed[name] = time.monotonic()
         else:
             raise ValueError(f"Screen {name} not found")
     
@@ -40,6 +95,35 @@ class NavigationController:
         self.stack.setWindowTitle("Aircraft Calculator")
         self.stack.setGeometry(250,250,600,500)
         self.stack.show()
+        
+    # ----- Screen registry -----
+    
+    """
+    Reuses the screen called name if it was built for filePath, otherwise builds a new one with factory
+    
+    Reading the file through the repository on reuse re-parses it if it changed on disk, which
+    emits dataChanged so the reused screen refreshes itself
+    """
+    
+    def openScreen(self,name,filePath,factory):
+        widget = self.screens.get(name)
+        if widget is not None and self.repository.isSameFile(getattr(widget,"file",None),filePath):
+            self.repository.get(filePath)
+        else:
+            with stage(f"build:{name}"):
+                widget = factory(filePath)
+            self.addScreen(name,widget)
+        self.setCurrent(name)
+        return widget
+    
+    def releaseIdleScreens(self):
+        now = time.monotonic()
+        current = self.stack.currentWidget()
+        for name, widget in list(self.screens.items()):
+            if name in self.pinned or widget is current:
+                continue
+            if now - self.lastUsed.get(name,now) > self.idleLimit:
+                self.removeScreen(name)
 
     # ----- Changing Screens -----
 
@@ -49,37 +133,77 @@ class NavigationController:
     # ----- Emit Signals -----
     
     def goToHome(self, filePath=None):
-        self.homeScreen = Home(self,filePath)
-        self.homeScreen.createCharacterSignal.connect(self.goToCreateCharacter)
-        self.homeScreen.createGraphSignal.connect(self.goToGraph)
-        self.homeScreen.createAirSpeed.connect(self.goToAir)
-        self.homeScreen.createThrust.connect(self.goToThrust)
-        self.addScreen("home",self.homeScreen)
-        self.setCurrent("home")
+        self.openScreen("home",filePath,self.createHome)
+        
+    def createHome(self,filePath):
+        homeScreen = Home(self,filePath)
+        homeScreen.createCharacterSignal.connect(self.goToCreateCharacter)
+        homeScreen.createGraphSignal.connect(self.goToGraph)
+        homeScreen.createAirSpeed.connect(self.goToAir)
+        homeScreen.createThrust.connect(self.goToThrust)
+        homeScreen.createEnergy.connect(self.goToEnergy)
+        return homeScreen
     
     def goToCreateCharacter(self,filePath=None):
-        self.createCharacterScreen = CreateAircraft(filePath)
-        self.createCharacterScreen.finished.connect(self.goToHome)
-        self.addScreen("createChar",self.createCharacterScreen)
+        # Creation is a one-off form, always start it fresh
+        createCharacterScreen = CreateAircraft(filePath,self.repository)
+        createCharacterScreen.finished.connect(self.goToHome)
+        self.addScreen("createChar",createCharacterScreen)
         self.setCurrent("createChar")
     
     def goToGraph(self,filePath=None):
-        self.createGraph = AirSpeedIndicationGraph(filePath)
-        self.createGraph.finished.connect(self.goBack)
-        self.addScreen("createGraph",self.createGraph)
-        self.setCurrent("createGraph")
+        self.openScreen("createGraph",filePath,lambda f: self.createGraphScreen("createGraph",f))
         
     def goToAir(self,filePath=None):
-        self.createAir = TurnPerformance(filePath)
-        self.createAir.finished.connect(self.goBack)
-        self.addScreen("createAir",self.createAir)
-        self.setCurrent("createAir")
+        self.openScreen("createAir",filePath,lambda f: self.createGraphScreen("createAir",f))
         
     def goToThrust(self,filePath=None):
-        self.createThrust = ThrustGraph(filePath)
-        self.createThrust.finished.connect(self.goBack)
-        self.addScreen("createThrust",self.createThrust)
-        self.setCurrent("createThrust")
+        self.openScreen("createThrust",filePath,lambda f: self.createGraphScreen("createThrust",f))
+    
+    def goToEnergy(self,filePath=None):
+        self.openScreen("createEnergy",filePath,lambda f: self.createGraphScreen("createEnergy",f))
+        
+    def createGraphScreen(self,name,filePath):
+        moduleName, className = graphScreens[name]
+        screenClass = getattr(timedImport(moduleName),className)
+        screen = screenClass(filePath,self.repository)
+        screen.finished.connect(self.goBack)
+        return screen
+        
+    def goToFleet(self,filePaths):
+        # Built for one set of files, so a new comparison always replaces the old one
+        FleetComparison = timedImport("screens.FleetComparison").FleetComparison
+        with stage("build:fleet"):
+            fleetScreen = FleetComparison(filePaths,self.repository)
+        fleetScreen.finished.connect(self.goToStart)
+        self.addScreen("fleet",fleetScreen)
+        self.setCurrent("fleet")
+        
+    # ----- Background preloading -----
+    
+    """
+    Imports the heavy modules one per event loop pass once the first window is up,
+    so opening a graph later doesn't pay for them
+    """
+    
+    def preload(self,modules=None):
+        self.preloadQueue = list(preloadModules if modules is None else modules)
+        QTimer.singleShot(0,self.preloadNext)
+        
+    def preloadNext(self):
+        if not self.preloadQueue:
+            return
+        timedImport(self.preloadQueue.pop(0))
+        QTimer.singleShot(0,self.preloadNext)
+        
+    # ----- Debug panel (Ctrl+Shift+D) -----
+    
+    def showDebugPanel(self):
+        if self.debugPanel is None:
+            DebugPanel = timedImport("screens.DebugPanel").DebugPanel
+            self.debugPanel = DebugPanel(self)
+        self.debugPanel.show()
+        self.debugPanel.raise_()
         
     # ----- Go Back to Home -----
         
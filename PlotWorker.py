@@ -0,0 +1,133 @@
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+import traceback
+
+class PlotWorker(QObject):
+
+    """
+    Runs a screen's plot computation on the shared QThreadPool instead of the GUI thread
+
+    Each screen owns one worker, submitting new inputs supersedes whatever that screen still has queued or running,
+    a coarse preview result is posted first and the full resolution result after it
+
+    Jobs post through a _Relay the worker does not own, so a job still running when its screen is freed finishes
+    quietly instead of emitting on a deleted worker
+    """
+
+    resultReady = pyqtSignal(object,bool)
+    failed = pyqtSignal(str)
+
+    def __init__(self,parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool.globalInstance()
+        self.pending = None
+        self.relay = _Relay()
+        self.relay.posted.connect(self._deliver)
+        self.relay.error.connect(self._deliverError)
+        self.destroyed.connect(self.relay.retire)
+
+    def submit(self,compute,preview=None):
+        self.relay.generation += 1
+        self.takePending()
+        self.pending = PlotJob(self.relay,self.relay.generation,compute,preview)
+        self.relay.start(self.pool,self.pending)
+
+    def cancel(self):
+        self.relay.generation += 1
+        self.takePending()
+
+    # Only a job still queued is taken back, a running or finished one is left to the relay
+    def takePending(self):
+        if self.pending is not None and self.pool.tryTake(self.pending):
+            self.relay.jobs.discard(self.pending)
+        self.pending = None
+
+    def isCurrent(self,generation):
+        return self.relay.isCurrent(generation)
+
+    # ----- Back on the GUI thread -----
+
+    def _deliver(self,generation,result,final):
+        if not self.isCurrent(generation):
+            return
+        if final:
+            self.pending = None
+        self.resultReady.emit(result,final)
+
+    def _deliverError(self,generation,message):
+        if self.isCurrent(generation):
+            self.pending = None
+            self.failed.emit(message)
+
+# The last line of a failed job's traceback, the exception itself, short enough for a status label
+def failureText(message):
+    lines = message.strip().splitlines()
+    return lines[-1] if lines else "unknown error"
+
+class _Relay(QObject):
+
+    """
+    Outlives its PlotWorker, holds the generation counter and a reference to every started job until it has finished
+    (jobs are not auto-deleted, so tryTake never touches a runnable Qt already freed)
+    """
+
+    posted = pyqtSignal(int,object,bool)
+    error = pyqtSignal(int,str)
+    done = pyqtSignal(object)
+
+    def __init__(self):
+        super().__init__()
+        self.generation = 0
+        self.retired = False
+        self.jobs = set()
+        self.done.connect(self.release)
+
+    def start(self,pool,job):
+        self.jobs.add(job)
+        pool.start(job)
+
+    def release(self,job):
+        self.jobs.discard(job)
+
+    # Jobs still running when the interpreter exits find the relay torn down with everything else, nobody is listening
+    def send(self,signal,*args):
+        try:
+            getattr(self,signal).emit(*args)
+        except RuntimeError:
+            pass
+
+    def retire(self):
+        self.retired = True
+        self.generation += 1
+
+    def isCurrent(self,generation):
+        return not self.retired and generation == self.generation
+
+class PlotJob(QRunnable):
+    def __init__(self,relay,generation,compute,preview=None):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.relay = relay
+        self.generation = generation
+        self.stages = []
+        if preview is not None:
+            self.stages.append((preview,False))
+        self.stages.append((compute,True))
+
+    def run(self):
+        try:
+            for fn, final in self.stages:
+                # Stop as soon as newer inputs have been submitted for the same screen, or the screen is gone
+                if not self.relay.isCurrent(self.generation):
+                    return
+                try:
+                    result = fn()
+                except Exception:
+                    if self.relay.isCurrent(self.generation):
+                        self.relay.send("error",self.generation,traceback.format_exc())
+                    return
+                if not self.relay.isCurrent(self.generation):
+                    return
+                self.relay.send("posted",self.generation,result,final)
+        finally:
+            # Released on the GUI thread once run has returned
+            self.relay.send("done",self)
@@ -0,0 +1,97 @@
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+"""
+Lightweight timing of named stages (loading, unit conversion, physics, rendering, screen switches)
+
+Turned on by the FMC_PROFILE environment variable or setEnabled(True), while off stage() hands back one shared
+do-nothing context manager so instrumented code costs a function call and a global lookup
+
+Recorded stages can be exported as Chrome trace JSON (chrome://tracing or Perfetto), FMC_PROFILE_TRACE=<file>
+writes the trace when the program exits
+"""
+
+enabled = bool(os.environ.get("FMC_PROFILE")) or bool(os.environ.get("FMC_PROFILE_TRACE"))
+events = deque(maxlen=10000)
+origin = time.perf_counter()
+
+class _NullStage:
+    def __enter__(self):
+        return self
+    def __exit__(self,*exc):
+        return False
+
+nullStage = _NullStage()
+
+class _Stage:
+    __slots__ = ("name","start")
+    def __init__(self,name):
+        self.name = name
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    def __exit__(self,*exc):
+        end = time.perf_counter()
+        events.append((self.name,self.start - origin,end - self.start,threading.get_ident()))
+        return False
+
+def stage(name):
+    if not enabled:
+        return nullStage
+    return _Stage(name)
+
+def timed(name):
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args,**kwargs):
+            if not enabled:
+                return fn(*args,**kwargs)
+            with _Stage(name):
+                return fn(*args,**kwargs)
+        return wrapper
+    return decorate
+
+def setEnabled(flag):
+    global enabled
+    enabled = bool(flag)
+
+def clear():
+    events.clear()
+
+# ----- Reading results back -----
+
+def recent(count=50):
+    return list(events)[-count:]
+
+def summary():
+    stats = {}
+    for name, _, duration, _ in list(events):
+        entry = stats.setdefault(name,{"count": 0,"total": 0.0,"last": 0.0,"max": 0.0})
+        entry["count"] += 1
+        entry["total"] += duration
+        entry["last"] = duration
+        entry["max"] = max(entry["max"],duration)
+    for entry in stats.values():
+        entry["mean"] = entry["total"] / entry["count"]
+    return stats
+
+def chromeTrace():
+    pid = os.getpid()
+    traceEvents = []
+    for name, start, duration, tid in list(events):
+        category = name.split(":",1)[0]
+        traceEvents.append({"name": name,"cat": category,"ph": "X","ts": start * 1e6,"dur": duration * 1e6,"pid": pid,"tid": tid})
+    return {"traceEvents": traceEvents,"displayTimeUnit": "ms"}
+
+def exportChromeTrace(path):
+    with open(path,"w") as f:
+        json.dump(chromeTrace(),f)
+    return path
+
+if os.environ.get("FMC_PROFILE_TRACE"):
+    atexit.register(exportChromeTrace,os.environ["FMC_PROFILE_TRACE"])
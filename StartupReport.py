@@ -0,0 +1,37 @@
+import importlib
+import sys
+import time
+
+"""
+Startup timing, how long each lazily imported module took and how long until the first window was shown
+
+Turned on with --startup-report or the FMC_STARTUP_REPORT environment variable, the report is printed to stderr
+"""
+
+startTime = time.perf_counter()
+importTimes = {}
+firstWindowTime = None
+
+def timedImport(moduleName):
+    if moduleName in sys.modules:
+        return sys.modules[moduleName]
+    t = time.perf_counter()
+    module = importlib.import_module(moduleName)
+    importTimes[moduleName] = time.perf_counter() - t
+    return module
+
+def markFirstWindow():
+    global firstWindowTime
+    if firstWindowTime is None:
+        firstWindowTime = time.perf_counter() - startTime
+
+def report():
+    lines = ["Startup report:"]
+    for name, seconds in importTimes.items():
+        lines.append(f"  import {name:<40} {seconds * 1000:8.1f} ms")
+    if firstWindowTime is not None:
+        lines.append(f"  time to first window{'':<27} {firstWindowTime * 1000:8.1f} ms")
+    return "\n".join(lines)
+
+def printReport():
+    print(report(),file=sys.stderr)
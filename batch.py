@@ -0,0 +1,151 @@
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from engine.Aircraft import loadAircraft, AircraftModel
+from engine.Turn import turnCurves
+from engine.Thrust import thrustCurves, levelSpeeds
+from engine.AirSpeed import returnTASminusIAS
+from engine.Envelope import flightEnvelope
+from engine.FleetFile import FleetFile
+
+"""
+Headless batch run of every graph for a directory of aircraft .json files
+
+Usage: python batch.py <aircraft folder or fleet.fmcf> <output folder> [--workers N] [--alt M] [--ias KT] [--isa-dev K]
+
+Each aircraft is computed in its own process and written to <output folder>/<file name>.json,
+nothing here imports PyQt5 so it can run on machines without a display. The output folder can't be the one the
+aircraft files (or the fleet file) are in, the results would replace them
+
+A packed fleet file is memory-mapped by every worker instead of parsing one .json per aircraft,
+workers take contiguous chunks of rows
+"""
+
+def evaluateAircraft(filePath,outDir,altM=1000.0,VIASkt=120.0,dT=0.0):
+    return evaluateData(loadAircraft(filePath),filePath,outDir,altM,VIASkt,dT,os.path.dirname(os.path.abspath(filePath)))
+
+# One bad row doesn't fail its chunk, returns the written paths and (row label, error) for each row that failed
+def evaluateFleetRows(fleetPath,start,stop,outDir,altM=1000.0,VIASkt=120.0,dT=0.0):
+    fleet = FleetFile(fleetPath)
+    folder = os.path.dirname(os.path.abspath(fleetPath))
+    written = []
+    errors = []
+    for i in range(start,stop):
+        try:
+            written.append(evaluateData(fleet.toData(i),fleet.source(i) or f"aircraft{i + 1}.json",outDir,altM,VIASkt,dT,folder))
+        except Exception as e:
+            errors.append((f"{fleetPath}[{i}]",str(e)))
+    return written, errors
+
+# folder is where the aircraft's aero table files are looked up
+def evaluateData(data,filePath,outDir,altM=1000.0,VIASkt=120.0,dT=0.0,folder=None):
+    model = AircraftModel.fromData(data,folder)
+
+    machVals = np.linspace(0.2,1.5,100)
+    instant, sustained = turnCurves(machVals,altM,model.wingArea,model.wingSpan,model.weight,model.thrust,model.CLMax,dT=dT,aero=model.aero)
+
+    VArray, TReq, TAvail, maxLevelSpeed = thrustCurves(model.wingArea,model.wingSpan,model.weight,model.thrust,altM,dT=dT,aero=model.aero)
+    VMin, VMax, VMinDrag, DMin = levelSpeeds(model.wingArea,model.wingSpan,model.weight,model.thrust,altM,dT=dT,aero=model.aero)
+
+    envelopeAlts, VMinAlt, VMaxAlt, VStall, climbRate, absoluteCeiling, serviceCeiling = flightEnvelope(model.wingArea,model.wingSpan,model.weight,model.thrust,model.CLMax,dT=dT,aero=model.aero)
+
+    alts, delta, tas = returnTASminusIAS(VIASkt,dT=dT)
+
+    result = {
+        "file": filePath,
+        "name": data["aircraft"].get("name"),
+        "altitude": altM,
+        "isaDeviation": dT,
+        "turn": {
+            "mach": machVals.tolist(),
+            "instantaneous": instant.tolist(),
+            "sustained": sustained.tolist(),
+        },
+        "thrust": {
+            "speed": VArray.tolist(),
+            "required": TReq.tolist(),
+            "available": TAvail.tolist(),
+            "maxLevelSpeed": maxLevelSpeed,
+            "minLevelSpeed": None if np.isnan(VMin) else float(VMin),
+            "minDragSpeed": float(VMinDrag),
+            "minDrag": float(DMin),
+        },
+        "envelope": {
+            "altitude": envelopeAlts.tolist(),
+            "minLevelSpeed": [None if np.isnan(v) else v for v in VMinAlt.tolist()],
+            "maxLevelSpeed": [None if np.isnan(v) else v for v in VMaxAlt.tolist()],
+            "stallSpeed": VStall.tolist(),
+            "bestClimbRate": climbRate.tolist(),
+            "absoluteCeiling": None if np.isnan(absoluteCeiling) else float(absoluteCeiling),
+            "serviceCeiling": None if np.isnan(serviceCeiling) else float(serviceCeiling),
+        },
+        "airspeed": {
+            "ias": VIASkt,
+            "altitude": alts.tolist(),
+            "tasMinusIas": delta.tolist(),
+            "tas": tas.tolist(),
+        },
+    }
+
+    outPath = os.path.join(outDir,os.path.basename(filePath))
+    with open(outPath,"w") as f:
+        json.dump(result,f)
+    return outPath
+
+def findAircraftFiles(folder):
+    files = []
+    for name in sorted(os.listdir(folder)):
+        if name.endswith(".json"):
+            files.append(os.path.join(folder,name))
+    return files
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute turn, thrust and TAS vs IAS curves for a folder of aircraft")
+    parser.add_argument("folder",help="Folder of aircraft .json files, or a packed fleet file (.fmcf)")
+    parser.add_argument("output",help="Folder the results are written to")
+    parser.add_argument("--workers",type=int,default=None,help="Number of worker processes (default: CPU count)")
+    parser.add_argument("--alt",type=float,default=1000.0,help="Altitude in m for the turn and thrust curves")
+    parser.add_argument("--ias",type=float,default=120.0,help="Indicated airspeed in kt for the TAS vs IAS curve")
+    parser.add_argument("--isa-dev",type=float,default=0.0,help="ISA temperature deviation in K (hot day > 0, cold day < 0)")
+    args = parser.parse_args(argv)
+    packed = args.folder.endswith(".fmcf")
+
+    # Results are named after the aircraft files, written next to them they would replace the inputs
+    inputFolder = os.path.dirname(os.path.abspath(args.folder)) if packed else args.folder
+    if os.path.realpath(args.output) == os.path.realpath(inputFolder):
+        parser.error(f"Results would overwrite the aircraft files in {inputFolder}, pick another output folder")
+
+    os.makedirs(args.output,exist_ok=True)
+
+    failed = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        if packed:
+            total = len(FleetFile(args.folder))
+            chunk = 256
+            futures = {pool.submit(evaluateFleetRows,args.folder,start,min(start + chunk,total),args.output,args.alt,args.ias,args.isa_dev): (f"{args.folder}[{start}:{min(start + chunk,total)}]",min(start + chunk,total) - start)
+                       for start in range(0,total,chunk)}
+        else:
+            files = findAircraftFiles(args.folder)
+            total = len(files)
+            futures = {pool.submit(evaluateAircraft,f,args.output,args.alt,args.ias,args.isa_dev): (f,1) for f in files}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                label, count = futures[future]
+                failed += count
+                print(f"{label}: {e}",file=sys.stderr)
+                continue
+            if packed:
+                for label, error in result[1]:
+                    failed += 1
+                    print(f"{label}: {error}",file=sys.stderr)
+
+    print(f"{total - failed}/{total} aircraft written to {args.output}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+import bisect
+import math
+import numpy as np
+
+"""
+Scalar reference versions of the physics kernels, as they were written inside the screens
+
+The benchmarks time these against the array based engine and check that both give the same numbers
+"""
+
+def sustainedN(V,rho,S,W,TAvail,CD0,k,gLimit=9):
+    q = 0.5 * rho * V**2
+    nCandidates = np.linspace(1.0,gLimit,200)
+    best = 1
+    for n in nCandidates:
+        CL = n * W / (q * S)
+        CD = CD0 + k * CL**2
+        D = q * S * CD
+        if TAvail >= D:
+            best = n
+        else:
+            break
+    return best
+
+def liftCurve(pref,alphaDeg):
+    postStall = pref["Post-Stall Behaviour"]
+
+    alphaRad = math.radians(alphaDeg)
+
+    alphaStall = pref["Alpha Stall"]
+    CLMax = pref["CL Max"]
+    CLSlope = pref["CL Slope"]
+
+    if alphaDeg <= alphaStall:
+        CL = CLSlope * alphaRad
+        return min(CL,CLMax)
+    else:
+        if postStall["Is Capped"]:
+            return CLMax
+        else:
+            pct = float(postStall["Percentage"])
+            CLMin = CLMax * pct
+            dropWidth = 5.0
+            alphaDropEnd = alphaStall + dropWidth
+            if alphaDeg <= alphaDropEnd:
+                t = (alphaDeg - alphaStall) / dropWidth
+                return CLMax * (1-t) + CLMin * t
+            else:
+                return CLMin
+
+def atmosphere(altM):
+    g = 9.80665
+    gamma = 1.4
+    R = 287.05
+    T0 = 288.15
+    p0 = 101325
+    L = -0.0065
+    if altM <= 11000:
+        T = T0 + L * altM
+        p = p0 * (T/T0) ** (-g / (L*R))
+    else:
+        T = 216.65
+        p = p0 * 0.22336 * math.exp(-g*(altM - 11000) / (R*T))
+    rho = p/(R*T)
+    a = math.sqrt(gamma*R*T)
+    return T,rho,a
+
+# ISA temperature and pressure from the layer equations, written out per layer up to 32 km (nothing shared with engine)
+def isaTP(altM):
+    g = 9.80665
+    R = 287.05287
+    T0 = 288.15
+    p0 = 101325.0
+    T11 = T0 - 0.0065 * 11000
+    p11 = p0 * (T11/T0) ** (g / (0.0065*R))
+    p20 = p11 * math.exp(-g*9000 / (R*T11))
+    if altM <= 11000:
+        T = T0 - 0.0065 * altM
+        return T, p0 * (T/T0) ** (g / (0.0065*R))
+    if altM <= 20000:
+        return T11, p11 * math.exp(-g*(altM - 11000) / (R*T11))
+    if altM <= 32000:
+        T = T11 + 0.001 * (altM - 20000)
+        return T, p20 * (T/T11) ** (-g / (0.001*R))
+    raise ValueError(f"Reference ISA only goes up to 32000 m, not {altM}")
+
+# All seven standard layers, walked up one at a time, nothing above 84852 m (the values at the top are kept)
+def isaLayersTP(altM):
+    g = 9.80665
+    R = 287.05287
+    layers = [(0,-0.0065),(11000,0.0),(20000,0.001),(32000,0.0028),(47000,0.0),(51000,-0.0028),(71000,-0.002)]
+    altM = min(altM,84852.0)
+    T, p = 288.15, 101325.0
+    for i, (base, L) in enumerate(layers):
+        top = layers[i+1][0] if i + 1 < len(layers) else altM
+        h = min(altM,top) - base
+        if L == 0:
+            p = p * math.exp(-g*h / (R*T))
+        else:
+            TNext = T + L * h
+            p = p * (TNext/T) ** (-g / (L*R))
+            T = TNext
+        if altM <= top:
+            break
+    return T, p
+
+def returnTASminusIAS(VIASkt=120,hminft=0,hmaxft=40000,stepft=500,gamma=1.4,R=287.05287):
+    kt = 1852 / 3600
+    a0 = math.sqrt(gamma*R*288.15)
+    alts = np.arange(hminft,hmaxft+stepft,stepft,dtype=float)
+    tas = []
+    for h in alts:
+        T, p = isaTP(h * 0.3048)
+        mach = machFromPitotRatio(101325 * pitotRatio(VIASkt*kt/a0) / p)
+        tas.append(mach * math.sqrt(gamma*R*T) / kt)
+    tas = np.array(tas)
+    delta = tas-VIASkt
+    return alts,delta,tas
+
+def pitotRatio(mach,gamma=1.4):
+    if mach <= 1.0:
+        return (1 + (gamma-1)/2 * mach**2) ** (gamma/(gamma-1)) - 1
+    # Rayleigh pitot, normal shock in front of the probe
+    return ((gamma+1)**2 * mach**2 / (4*gamma*mach**2 - 2*(gamma-1))) ** (gamma/(gamma-1)) * (1 - gamma + 2*gamma*mach**2) / (gamma+1) - 1
+
+# Bisection on the pitot relation, slow but nothing to converge wrongly
+def machFromPitotRatio(ratio):
+    lo, hi = 0.0, 20.0
+    for _ in range(60):
+        mid = 0.5 * (lo + hi)
+        if pitotRatio(mid) < ratio:
+            lo = mid
+        else:
+            hi = mid
+    return 0.5 * (lo + hi)
+
+def TASFromCAS(VCASArray,altArray,gamma=1.4,R=287.05287):
+    a0 = math.sqrt(gamma*R*288.15)
+    tas = []
+    for VCAS, h in zip(VCASArray,altArray):
+        T, p = isaTP(h)
+        tas.append(machFromPitotRatio(101325 * pitotRatio(VCAS/a0) / p) * math.sqrt(gamma*R*T))
+    return np.array(tas)
+
+def maxLevelSpeed(VArray,rho,wingArea,wingSpan,weight,thrust,CD0=0.012,e=0.8):
+    diff = thrustRequired(VArray,rho,wingArea,wingSpan,weight,CD0,e) - thrust * (0.7 + 0.3 * rho / 1.225)
+    crossings = np.where(np.sign(diff[:-1]) != np.sign(diff[1:]))[0]
+    i = crossings[-1]
+    return VArray[i] - diff[i] * (VArray[i+1] - VArray[i]) / (diff[i+1] - diff[i])
+
+def thrustRequired(VArray,rho,wingArea,wingSpan,weight,CD0=0.012,e=0.8):
+    k = 1.0 / (math.pi * (wingSpan**2/wingArea) * e)
+    TReq = []
+    for V in VArray:
+        q = 0.5 * rho * V**2
+        CL = weight / (q * wingArea)
+        TReq.append(q * wingArea * (CD0 + k * CL**2))
+    return np.array(TReq)
+
+def tableLookup(machAxis,altAxis,values,machVals,alts):
+    result = []
+    for mach, h in zip(machVals,alts):
+        mach = min(max(mach,machAxis[0]),machAxis[-1])
+        h = min(max(h,altAxis[0]),altAxis[-1])
+        i = min(max(bisect.bisect_right(machAxis,mach) - 1,0),len(machAxis) - 2)
+        j = min(max(bisect.bisect_right(altAxis,h) - 1,0),len(altAxis) - 2)
+        t = (mach - machAxis[i]) / (machAxis[i+1] - machAxis[i])
+        u = (h - altAxis[j]) / (altAxis[j+1] - altAxis[j])
+        result.append((1-t)*(1-u)*values[i][j] + t*(1-u)*values[i+1][j] + (1-t)*u*values[i][j+1] + t*u*values[i+1][j+1])
+    return np.array(result)
@@ -0,0 +1,250 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import benchmarks.Reference as Reference
+from engine.Atmosphere import atmosphere, standardTP, rho0
+from engine.AirSpeed import returnTASminusIAS, TASFromCAS
+from engine.Thrust import thrustCurves, levelSpeeds
+from engine.Turn import sustainedN
+from engine.Lift import analyticLift
+from engine.Aero import gridInterp
+
+"""
+Headless micro-benchmarks for the physics kernels
+
+Usage: python benchmarks/runBenchmarks.py [--output FILE] [--baseline FILE] [--update-baseline] [--threshold 0.25]
+
+Every kernel is timed at several grid sizes, the array version against the scalar reference (reference only up to
+referenceLimit points, the scalar loops get slow) and both results are checked to agree within the kernel's tolerance
+
+Results are written as JSON and compared against the stored baseline, a kernel that got slower than the baseline by more
+than the threshold, or that no longer matches its reference, makes the run exit with 1
+
+Timings only mean something on the machine that made them, so no baseline is shipped: the first full run on a machine
+records benchmarks/baseline.json and only checks the references, later runs are also compared against it
+"""
+
+here = os.path.dirname(os.path.abspath(__file__))
+referenceLimit = 10000
+
+# Same numbers as the example aircraft (a.json), already in SI
+aircraft = {
+    "wingArea": 20.0,
+    "wingSpan": 10.0,
+    "weight": 10000.0 * 9.80665,
+    "thrust": 15000.0 * 4.44822,
+    "CLMax": 1.6,
+}
+liftStats = {
+    "CL Slope": 5.7,
+    "CL Max": 1.6,
+    "Alpha Stall": 15.0,
+    "Post-Stall Behaviour": {"Is Capped": False, "Percentage": "0.6"},
+}
+
+kernels = {}
+
+def kernel(name,sizes,tolerance):
+    def register(setup):
+        kernels[name] = {"sizes": sizes, "tolerance": tolerance, "setup": setup}
+        return setup
+    return register
+
+def maxRelativeError(a,b):
+    a = np.asarray(a,dtype=float)
+    b = np.asarray(b,dtype=float)
+    return float(np.max(np.abs(a - b) / np.maximum(np.abs(b),1e-12)))
+
+# ----- Kernels -----
+# Each setup(size) returns (fast, reference, compare), reference is None when there is nothing to compare
+
+@kernel("sustainedN",[100,1000,10000,100000],tolerance=1.0)
+def setupSustainedN(size):
+    _,rho,a = atmosphere(1000.0)
+    V = np.linspace(0.2,1.5,size) * a
+    S, span = aircraft["wingArea"], aircraft["wingSpan"]
+    k = 1.0 / (np.pi * (span**2/S) * 0.8)
+    TAvail = aircraft["thrust"] * rho / rho0
+    args = (rho,S,aircraft["weight"],TAvail,0.02,k,9.0)
+    fast = lambda: sustainedN(V,*args)
+    reference = lambda: np.array([Reference.sustainedN(v,*args) for v in V])
+    # The scan steps through load factor in (9 - 1)/199 increments, so that is the tolerance in n
+    step = 8.0 / 199
+    compare = lambda f, r: float(np.max(np.abs(f - r))) / step
+    return fast, reference, compare
+
+@kernel("liftCurve",[200,2000,20000,200000],tolerance=1e-12)
+def setupLiftCurve(size):
+    alphas = np.linspace(-5,30,size)
+    postStall = liftStats["Post-Stall Behaviour"]
+    args = (liftStats["CL Slope"],liftStats["CL Max"],liftStats["Alpha Stall"],postStall["Is Capped"],float(postStall["Percentage"]))
+    fast = lambda: analyticLift(alphas,*args)
+    reference = lambda: np.array([Reference.liftCurve(liftStats,a) for a in alphas])
+    compare = lambda f, r: float(np.max(np.abs(f - r)))
+    return fast, reference, compare
+
+@kernel("atmosphere",[100,1000,10000,100000,1000000],tolerance=1e-4)
+def setupAtmosphere(size):
+    # The old model is a two-layer one, so only compare where both are defined the same way
+    alts = np.linspace(0,20000,size)
+    fast = lambda: np.array(atmosphere(alts))
+    reference = lambda: np.array([Reference.atmosphere(h) for h in alts]).T
+    return fast, reference, maxRelativeError
+
+@kernel("isaLayers",[100,1000,10000,100000,1000000],tolerance=1e-7)
+def setupIsaLayers(size):
+    # Every layer and past the top of the model, where the engine has to hold the values at 84852 m
+    alts = np.linspace(0,100000,size)
+    fast = lambda: np.array(standardTP(alts))
+    reference = lambda: np.array([Reference.isaLayersTP(h) for h in alts]).T
+    return fast, reference, maxRelativeError
+
+@kernel("returnTASminusIAS",[81,801,8001,80001],tolerance=1e-7)
+def setupTASminusIAS(size):
+    # The reference has its own exact ISA and pitot inversion, the engine reads pressure off the 10 m table (about 6e-8)
+    stepft = 40000 / (size - 1)
+    fast = lambda: returnTASminusIAS(250,0,40000,stepft)[2]
+    reference = lambda: Reference.returnTASminusIAS(250,0,40000,stepft)[2]
+    return fast, reference, maxRelativeError
+
+@kernel("TASFromCAS",[100,1000,10000,1000000],tolerance=1e-7)
+def setupTASFromCAS(size):
+    # Scattered telemetry-like samples, about a third of them supersonic
+    rng = np.random.default_rng(0)
+    VCAS = rng.uniform(50,900,size)
+    alts = rng.uniform(0,20000,size)
+    fast = lambda: TASFromCAS(VCAS,alts)
+    reference = lambda: Reference.TASFromCAS(VCAS,alts)
+    return fast, reference, maxRelativeError
+
+@kernel("inducedDrag",[300,3000,30000,300000],tolerance=1e-9)
+def setupInducedDrag(size):
+    VArray = np.linspace(10,400,size)
+    _,rho,_ = atmosphere(1000.0)
+    args = (aircraft["wingArea"],aircraft["wingSpan"],aircraft["weight"])
+    fast = lambda: thrustCurves(*args,aircraft["thrust"],1000.0,VArray=VArray)[1]
+    reference = lambda: Reference.thrustRequired(VArray,rho,*args)
+    return fast, reference, maxRelativeError
+
+@kernel("levelSpeeds",[1,10,100,100000],tolerance=1e-4)
+def setupLevelSpeeds(size):
+    # size altitudes solved at once, the reference scans a fine speed grid per altitude (VMax stays under 1200 m/s up to 6 km)
+    alts = np.linspace(0,6000,size)
+    args = (aircraft["wingArea"],aircraft["wingSpan"],aircraft["weight"],aircraft["thrust"])
+    VArray = np.linspace(10,1200,5000)
+    fast = lambda: levelSpeeds(*args,alts)[1]
+    reference = lambda: np.array([Reference.maxLevelSpeed(VArray,atmosphere(h)[1],*args) for h in alts])
+    return fast, reference, maxRelativeError
+
+@kernel("aeroTable",[100,1000,10000,1000000],tolerance=1e-12)
+def setupAeroTable(size):
+    # CD0 over a 200 Mach x 100 altitude table, queried at size scattered points (a few outside the table)
+    machAxis = np.linspace(0,3,200)
+    altAxis = np.linspace(0,20000,100)
+    values = 0.015 + 0.02 * np.tanh(4 * (machAxis[:,None] - 1)) + 1e-7 * altAxis[None,:]
+    rng = np.random.default_rng(0)
+    machVals = rng.uniform(-0.1,3.1,size)
+    alts = rng.uniform(-500,20500,size)
+    fast = lambda: gridInterp([machAxis,altAxis],values,[machVals,alts])
+    reference = lambda: Reference.tableLookup(machAxis.tolist(),altAxis.tolist(),values.tolist(),machVals,alts)
+    return fast, reference, maxRelativeError
+
+# ----- Timing -----
+
+def timeIt(fn,minTime=0.05,repeat=3):
+    t = time.perf_counter()
+    fn()
+    once = max(time.perf_counter() - t,1e-7)
+    number = max(1,int(minTime / once))
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best,(time.perf_counter() - t) / number)
+    return best
+
+def runKernel(name,spec):
+    results = {}
+    for size in spec["sizes"]:
+        fast, reference, compare = spec["setup"](size)
+        entry = {"seconds": timeIt(fast)}
+        if reference is not None and size <= referenceLimit:
+            entry["referenceSeconds"] = timeIt(reference,repeat=1)
+            entry["speedup"] = entry["referenceSeconds"] / entry["seconds"]
+            entry["error"] = compare(fast(),reference())
+            entry["matches"] = entry["error"] <= spec["tolerance"]
+        results[str(size)] = entry
+    return results
+
+def compareBaseline(results,baseline,threshold):
+    problems = []
+    for name, sizes in results.items():
+        for size, entry in sizes.items():
+            if entry.get("matches") is False:
+                problems.append(f"{name}[{size}] no longer matches its reference (error {entry['error']:.3g})")
+            old = baseline.get(name,{}).get(size)
+            if old is None:
+                continue
+            entry["baselineSeconds"] = old["seconds"]
+            entry["ratio"] = entry["seconds"] / old["seconds"]
+            if entry["ratio"] > 1 + threshold:
+                problems.append(f"{name}[{size}] is {entry['ratio']:.2f}x slower than the baseline")
+    return problems
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the physics kernels")
+    parser.add_argument("--output",default=os.path.join(here,"latest.json"),help="Where to write the results JSON")
+    parser.add_argument("--baseline",default=os.path.join(here,"baseline.json"),help="Baseline results to compare against")
+    parser.add_argument("--update-baseline",action="store_true",help="Store this run as the new baseline")
+    parser.add_argument("--threshold",type=float,default=0.25,help="Allowed slowdown against the baseline (0.25 = 25%%)")
+    parser.add_argument("--kernel",action="append",help="Only run the named kernel (can be repeated)")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, spec in kernels.items():
+        if args.kernel and name not in args.kernel:
+            continue
+        results[name] = runKernel(name,spec)
+        for size, entry in results[name].items():
+            line = f"{name:<20} {size:>8} {entry['seconds'] * 1e3:10.3f} ms"
+            if "speedup" in entry:
+                line += f"   x{entry['speedup']:<8.1f} error {entry['error']:.2g}"
+            print(line)
+
+    baseline = {}
+    recordBaseline = args.update_baseline or (not os.path.exists(args.baseline) and not args.kernel)
+    if os.path.exists(args.baseline):
+        with open(args.baseline,"r") as f:
+            baseline = json.load(f)["results"]
+    problems = compareBaseline(results,baseline,args.threshold)
+
+    report = {
+        "machine": {"python": platform.python_version(),"numpy": np.__version__,"platform": platform.platform()},
+        "threshold": args.threshold,
+        "results": results,
+        "problems": problems,
+    }
+    with open(args.output,"w") as f:
+        json.dump(report,f,indent=4)
+    if recordBaseline:
+        with open(args.baseline,"w") as f:
+            json.dump(report,f,indent=4)
+
+    for problem in problems:
+        print(f"REGRESSION: {problem}",file=sys.stderr)
+    if not baseline and recordBaseline:
+        print(f"No baseline at {args.baseline} yet, this run is stored as the baseline (timings not compared)")
+    elif not baseline:
+        print(f"No baseline at {args.baseline}, a full run (without --kernel) or --update-baseline stores one")
+    return 1 if problems else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
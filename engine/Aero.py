@@ -0,0 +1,200 @@
+import itertools
+import math
+import os
+import numpy as np
+
+"""
+Mach dependent aerodynamic coefficients, CD0, k (induced drag factor) and CL Max, read from tables in the aircraft file
+
+    "Aero Tables": {
+        "CD0": {"Mach": [0.0, 0.8, 1.0, 1.2, 2.0], "values": [0.016, 0.018, 0.040, 0.045, 0.038]},
+        "k": {"Mach": [...], "Altitude": [...], "file": "k.npy"},
+        "CL Max": {"Mach": [...], "values": [...]}
+    }
+
+Every table has a Mach axis and optionally an Altitude axis (m), values are indexed in that order, (Mach, Altitude),
+either inline or from a .npy file (relative to the aircraft file) which is memory-mapped, never read into memory whole
+
+Lookups are multilinear on the table grid and held at the end values outside it, a query array of any shape touches
+only the 2^d corner cells around each point, so a table of hundreds of MB costs a few pages per lookup.
+A .npy file is mapped once per process and shared by every aircraft (and what-if copy) that refers to it
+
+Coefficients without a table fall back to the scalar values the physics is called with
+"""
+
+tableFields = {"CD0": "CD0","k": "k","CL Max": "CLMax"}
+tableAxes = ["Mach","Altitude"]
+
+_mapped = {}
+
+def _mapFile(path):
+    try:
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns,st.st_size)
+        cached = _mapped.get(path)
+        if cached is None or cached[0] != stamp:
+            cached = (stamp,np.load(path,mmap_mode="r",allow_pickle=False))
+            _mapped[path] = cached
+    except (OSError,ValueError) as error:
+        raise RuntimeError(f"Aero table file not readable: {path} ({error})")
+    return cached
+
+def gridInterp(axes,values,points):
+    points = np.broadcast_arrays(*[np.asarray(p,dtype=float) for p in points])
+    lows = []
+    weights = []
+    for axis, p in zip(axes,points):
+        p = np.clip(p,axis[0],axis[-1])
+        i = np.clip(np.searchsorted(axis,p,side="right") - 1,0,len(axis) - 2)
+        lows.append(i)
+        weights.append((p - axis[i]) / (axis[i + 1] - axis[i]))
+    result = np.zeros(points[0].shape)
+    for corner in itertools.product((0,1),repeat=len(axes)):
+        weight = 1.0
+        for c, t in zip(corner,weights):
+            weight = weight * (t if c else 1.0 - t)
+        result += weight * values[tuple(i + c for i, c in zip(lows,corner))]
+    return result
+
+class AeroTable:
+
+    """
+    One coefficient over a (Mach[, Altitude]) grid, values may be a read-only memory map shared with other tables
+    """
+
+    __slots__ = ("names","axes","values","source","scale")
+
+    def __init__(self,names,axes,values,source=None,scale=1.0):
+        self.names = names
+        self.axes = axes
+        self.values = values
+        self.source = source
+        self.scale = scale
+
+    @classmethod
+    def fromEntry(cls,field,entry,folder=None):
+        if not isinstance(entry,dict) or "Mach" not in entry:
+            raise RuntimeError(f"Aero table {field} needs a Mach axis")
+        names = [name for name in tableAxes if name in entry]
+        axes = []
+        for name in names:
+            try:
+                axis = np.asarray(entry[name],dtype=float)
+            except (TypeError,ValueError):
+                raise RuntimeError(f"Aero table {field} {name} axis must be numeric")
+            if axis.ndim != 1 or axis.size < 2 or np.any(np.diff(axis) <= 0):
+                raise RuntimeError(f"Aero table {field} {name} axis needs at least 2 strictly increasing values")
+            axis.flags.writeable = False
+            axes.append(axis)
+
+        source = None
+        if "file" in entry:
+            source = os.path.abspath(os.path.join(folder or "",entry["file"]))
+            values = _mapFile(source)[1]
+        elif "values" in entry:
+            try:
+                values = np.asarray(entry["values"],dtype=float)
+            except (TypeError,ValueError):
+                raise RuntimeError(f"Aero table {field} values must be numeric")
+            values.flags.writeable = False
+        else:
+            raise RuntimeError(f"Aero table {field} needs values or a file")
+        if values.shape != tuple(axis.size for axis in axes) or values.dtype.kind not in "fiu":
+            raise RuntimeError(f"Aero table {field} values must be numeric and shaped {tuple(axis.size for axis in axes)} ({', '.join(names)})")
+        return cls(names,axes,values,source)
+
+    def __call__(self,mach,altM):
+        queries = {"Mach": mach,"Altitude": altM}
+        values = gridInterp(self.axes,self.values,[queries[name] for name in self.names])
+        return values * self.scale if self.scale != 1.0 else values
+
+    def scaled(self,factor):
+        return AeroTable(self.names,self.axes,self.values,self.source,self.scale * factor)
+
+    # Stable identity for cache keys, a mapped file is identified by its path and stamp instead of hashing its contents
+    def identity(self):
+        identity = {"axes": dict(zip(self.names,self.axes)),"scale": self.scale}
+        if self.source is not None:
+            identity["file"] = [self.source,*_mapFile(self.source)[0]]
+        else:
+            identity["values"] = self.values
+        return identity
+
+class AeroTables:
+
+    """
+    The tabulated coefficients of one aircraft, any of CD0, k and CLMax may be None (not tabulated)
+    """
+
+    __slots__ = ("CD0","k","CLMax")
+
+    def __init__(self,CD0=None,k=None,CLMax=None):
+        self.CD0 = CD0
+        self.k = k
+        self.CLMax = CLMax
+
+    @classmethod
+    def fromStats(cls,entry,folder=None):
+        if not isinstance(entry,dict):
+            raise RuntimeError("Aero Tables must map CD0, k or CL Max to a table")
+        unknown = set(entry) - set(tableFields)
+        if unknown:
+            raise RuntimeError(f"Unknown aero tables: {', '.join(sorted(unknown))}")
+        return cls(**{attr: AeroTable.fromEntry(field,entry[field],folder) for field, attr in tableFields.items() if field in entry})
+
+    # Level speeds and climb rates lose their closed form once drag depends on Mach
+    @property
+    def hasDrag(self):
+        return self.CD0 is not None or self.k is not None
+
+    def coefficients(self,mach,altM,CD0,k,CLMax=None):
+        return (CD0 if self.CD0 is None else self.CD0(mach,altM),
+                k if self.k is None else self.k(mach,altM),
+                CLMax if self.CLMax is None or CLMax is None else self.CLMax(mach,altM))
+
+    def scaled(self,CLMax=1.0):
+        if self.CLMax is None or CLMax == 1.0:
+            return self
+        return AeroTables(self.CD0,self.k,self.CLMax.scaled(CLMax))
+
+    def sources(self):
+        return [table.source for table in (self.CD0,self.k,self.CLMax) if table is not None and table.source is not None]
+
+    def identity(self):
+        return {field: getattr(self,attr).identity() for field, attr in tableFields.items() if getattr(self,attr) is not None}
+
+def inducedDragFactor(wingArea,wingSpan,e=0.8):
+    return 1.0 / (np.pi * (wingSpan**2/wingArea) * e)
+
+def aeroCoefficients(aero,mach,altM,CD0,k,CLMax=None):
+    if aero is None:
+        return CD0, k, CLMax
+    return aero.coefficients(mach,altM,CD0,k,CLMax)
+
+# ----- Solving against tabulated coefficients -----
+
+"""
+With Mach dependent drag the level speeds and best climb speed have no closed form, they are bracketed on a Mach grid
+(a trailing axis, so every altitude and aircraft is still one pass) and then refined on the bracket
+"""
+
+scanMach = np.linspace(0.02,10.0,1000)
+
+def refineCrossing(f,lo,hi,iterations=40):
+    loSign = f(lo) >= 0
+    for _ in range(iterations):
+        mid = 0.5 * (lo + hi)
+        same = (f(mid) >= 0) == loSign
+        lo = np.where(same,mid,lo)
+        hi = np.where(same,hi,mid)
+    return 0.5 * (lo + hi)
+
+def refineMaximum(f,lo,hi,iterations=40):
+    ratio = (math.sqrt(5.0) - 1.0) / 2.0
+    for _ in range(iterations):
+        a = hi - ratio * (hi - lo)
+        b = lo + ratio * (hi - lo)
+        higher = f(a) >= f(b)
+        hi = np.where(higher,b,hi)
+        lo = np.where(higher,lo,a)
+    return 0.5 * (lo + hi)
@@ -0,0 +1,153 @@
+import numpy as np
+from engine.Atmosphere import isa, gamma, p0, rho0, a0
+
+"""
+Airspeed conversions between CAS, EAS, TAS and Mach, in every direction, on NumPy arrays
+
+Speeds are m/s and altitudes m (pressure altitude, dT shifts temperature only), both broadcast against each other,
+so alts[:,None] with speeds[None,:] converts a whole altitude x speed grid in one pass
+
+CAS and Mach are tied through the impact (pitot) pressure qc, isentropic below Mach 1 and the Rayleigh pitot relation
+(normal shock ahead of the probe) above it, CAS is the speed giving the same qc at sea level standard conditions.
+The supersonic Rayleigh inversion is a few Newton steps run only on the supersonic points
+
+The knots / feet helpers at the bottom are what the TAS vs IAS screen and the batch tools use
+"""
+
+kt = 1852.0 / 3600.0
+ft = 0.3048
+
+_exponent = gamma / (gamma - 1.0)
+# Rayleigh pitot written as (qc + p)/p = rayleighC * M^2 * (1 - (gamma-1)/(2*gamma*M^2))^(-1/(gamma-1))
+rayleighC = ((gamma + 1.0) / 2.0)**_exponent * ((gamma + 1.0) / (2.0 * gamma))**(1.0 / (gamma - 1.0))
+# qc/p at Mach 1, where the subsonic and Rayleigh branches meet
+sonicRatio = (1.0 + (gamma - 1.0) / 2.0)**_exponent - 1.0
+
+def returnTPRho(hm,dT=0.0):
+    T,p,rho,_ = isa(hm,dT)
+    return T,p,rho
+
+# ----- Impact pressure -----
+
+def impactPressureRatio(mach):
+    mach = np.asarray(mach,dtype=float)
+    subsonic = (1.0 + (gamma - 1.0) / 2.0 * mach**2)**_exponent - 1.0
+    with np.errstate(divide="ignore",invalid="ignore"):
+        supersonic = rayleighC * mach**2 * (1.0 - (gamma - 1.0) / (2.0 * gamma * mach**2))**(-1.0 / (gamma - 1.0)) - 1.0
+    return np.where(mach <= 1.0,subsonic,supersonic)
+
+def machFromImpactPressureRatio(ratio,iterations=5):
+    ratio = np.asarray(ratio,dtype=float)
+    mach = np.sqrt(2.0 / (gamma - 1.0) * ((1.0 + np.maximum(ratio,0.0))**(1.0 / _exponent) - 1.0))
+    supersonic = ratio > sonicRatio
+    if np.any(supersonic):
+        # Newton on log(p0/p) against x = M^2, quadratic from x = 1 up, 4 steps reach round-off anywhere past Mach 1
+        logTotal = np.log(ratio[supersonic] + 1.0)
+        c = (gamma - 1.0) / (2.0 * gamma)
+        n = 1.0 / (gamma - 1.0)
+        x = np.maximum(np.exp(logTotal) / rayleighC,1.0)
+        for _ in range(iterations):
+            error = np.log(rayleighC * x) - n * np.log(1.0 - c / x) - logTotal
+            x = x - error * x * (x - c) / (x - c - n * c)
+        mach = np.array(mach)
+        mach[supersonic] = np.sqrt(x)
+    return mach
+
+# ----- Conversions, Mach is the pivot -----
+
+# CAS only depends on the static pressure, the composite conversions below look the atmosphere up once
+def _machFromCAS(VCAS,p):
+    return machFromImpactPressureRatio(p0 * impactPressureRatio(np.asarray(VCAS,dtype=float) / a0) / p)
+
+def _CASFromMach(mach,p):
+    return a0 * machFromImpactPressureRatio(p * impactPressureRatio(mach) / p0)
+
+def machFromCAS(VCAS,altM,dT=0.0):
+    _, p, _, _ = isa(altM,dT)
+    return _machFromCAS(VCAS,p)
+
+def CASFromMach(mach,altM,dT=0.0):
+    _, p, _, _ = isa(altM,dT)
+    return _CASFromMach(mach,p)
+
+def TASFromMach(mach,altM,dT=0.0):
+    _, _, _, a = isa(altM,dT)
+    return np.asarray(mach,dtype=float) * a
+
+def machFromTAS(VTAS,altM,dT=0.0):
+    _, _, _, a = isa(altM,dT)
+    return np.asarray(VTAS,dtype=float) / a
+
+def EASFromTAS(VTAS,altM,dT=0.0):
+    _, _, rho, _ = isa(altM,dT)
+    return np.asarray(VTAS,dtype=float) * np.sqrt(rho / rho0)
+
+def TASFromEAS(VEAS,altM,dT=0.0):
+    _, _, rho, _ = isa(altM,dT)
+    return np.asarray(VEAS,dtype=float) * np.sqrt(rho0 / rho)
+
+# EAS = M * sqrt(gamma * p / rho0), so it only needs the pressure
+def EASFromMach(mach,altM,dT=0.0):
+    _, p, _, _ = isa(altM,dT)
+    return np.asarray(mach,dtype=float) * np.sqrt(gamma * p / rho0)
+
+def machFromEAS(VEAS,altM,dT=0.0):
+    _, p, _, _ = isa(altM,dT)
+    return np.asarray(VEAS,dtype=float) / np.sqrt(gamma * p / rho0)
+
+def TASFromCAS(VCAS,altM,dT=0.0):
+    _, p, _, a = isa(altM,dT)
+    return _machFromCAS(VCAS,p) * a
+
+def CASFromTAS(VTAS,altM,dT=0.0):
+    _, p, _, a = isa(altM,dT)
+    return _CASFromMach(np.asarray(VTAS,dtype=float) / a,p)
+
+def EASFromCAS(VCAS,altM,dT=0.0):
+    _, p, _, _ = isa(altM,dT)
+    return _machFromCAS(VCAS,p) * np.sqrt(gamma * p / rho0)
+
+def CASFromEAS(VEAS,altM,dT=0.0):
+    _, p, _, _ = isa(altM,dT)
+    return _CASFromMach(np.asarray(VEAS,dtype=float) / np.sqrt(gamma * p / rho0),p)
+
+speedKinds = {
+    "CAS": (machFromCAS,CASFromMach),
+    "EAS": (machFromEAS,EASFromMach),
+    "TAS": (machFromTAS,TASFromMach),
+    "Mach": (lambda mach, altM, dT=0.0: np.asarray(mach,dtype=float),lambda mach, altM, dT=0.0: np.asarray(mach,dtype=float)),
+}
+
+# Any of CAS, EAS, TAS (m/s) and Mach to any other
+def convertSpeed(value,fromKind,toKind,altM,dT=0.0):
+    if fromKind not in speedKinds or toKind not in speedKinds:
+        raise ValueError(f"Speeds are one of {', '.join(speedKinds)}, not {fromKind} / {toKind}")
+    mach = speedKinds[fromKind][0](value,altM,dT)
+    return speedKinds[toKind][1](mach,altM,dT)
+
+# ----- Knots and feet -----
+
+"""
+Difference between TAS and IAS speeds between altitudes (IAS taken as CAS, no instrument or position error)
+
+This calculation is not plane dependent and is the same for every
+"""
+
+def returnTASfromCASAlt(VIASkt,hft,dT=0.0):
+    return TASFromCAS(np.asarray(VIASkt,dtype=float) * kt,np.asarray(hft,dtype=float) * ft,dT) / kt
+
+def returnTASminusIAS(VIASkt=120,hminft=0,hmaxft=40000,stepft=500,dT=0.0):
+    alts = np.arange(hminft,hmaxft+stepft,stepft,dtype=float)
+    tas = returnTASfromCASAlt(VIASkt,alts,dT)
+    delta = tas-VIASkt
+    return alts,delta,tas
+
+"""
+TAS - IAS for many indicated airspeeds at once, rows are altitudes (ft) and columns IAS (kt), one broadcast pass
+"""
+
+def TASminusIASGrid(VIASkt,alts,dT=0.0):
+    VIASkt = np.asarray(VIASkt,dtype=float)
+    alts = np.asarray(alts,dtype=float)
+    tas = returnTASfromCASAlt(VIASkt[None,:],alts[:,None],dT)
+    return tas - VIASkt[None,:], tas
@@ -0,0 +1,154 @@
+import json
+import math
+
+"""
+Reads aircraft .json files and converts their stats to SI units, AircraftModel is the SI form every screen uses
+
+Kept free of any Qt imports so the physics can be run headless (eg., from batch.py), and of NumPy at import time since
+the start screen loads this module, engine.Lift and engine.Aero are only imported for files that carry tables
+"""
+
+def loadAircraft(file):
+    try:
+        with open(file,"r") as f:
+            return json.load(f)
+    except(FileNotFoundError,json.JSONDecodeError):
+        raise RuntimeError(f"Aircraft file not found or invalid: {file}")
+
+g0 = 9.80665
+
+# One table per kind of quantity, factors to SI (N, m², m), exact definitions (1 lb = 0.45359237 kg, 1 ft = 0.3048 m)
+forceUnits = {
+    "N": 1.0,
+    "kN": 1000.0,
+    "kg": g0,
+    "kgf": g0,
+    "t": 1000.0 * g0,
+    "lb": 0.45359237 * g0,
+    "lbf": 0.45359237 * g0,
+}
+areaUnits = {"m²": 1.0,"ft²": 0.3048**2}
+lengthUnits = {"m": 1.0,"ft": 0.3048}
+
+def _toSI(pref,field,units):
+    entry = pref.get(field)
+    if not isinstance(entry,dict) or "value" not in entry:
+        raise RuntimeError(f"Missing aircraft stat: {field}")
+    unit = entry.get("unit")
+    if unit is None:
+        # Files written before units were stored are already SI
+        return float(entry["value"])
+    if unit not in units:
+        raise RuntimeError(f"Unknown unit for {field}: {unit}")
+    return float(entry["value"]) * units[unit]
+
+class AircraftModel:
+
+    """
+    One aircraft in SI units, built once from the .json stats and shared by every screen and the batch tools
+
+    Derived quantities are worked out at construction so the physics reads plain attributes,
+    k is the induced drag factor 1/(pi*AR*e) at the default e = 0.8 (inducedDragFactor for any other e)
+
+    liftTable is (alpha, CL) when the file carries a measured "Lift Table", CL Max then defaults to the table's peak,
+    aero holds the file's Mach dependent "Aero Tables" (engine.Aero), table files are resolved against folder
+    """
+
+    __slots__ = ("name","designation","wingArea","wingSpan","weight","thrust","afterburnerThrust",
+                 "CLMax","CLSlope","alphaStall","isCapped","percentage","statedThrustToWeight","liftTable","aero",
+                 "aspectRatio","k","wingLoading","thrustToWeight")
+
+    def __init__(self,wingArea,wingSpan,weight,thrust,CLMax,CLSlope=0.0,alphaStall=0.0,isCapped=False,percentage=0.0,
+                 afterburnerThrust=0.0,statedThrustToWeight=0.0,name=None,designation=None,liftTable=None,aero=None):
+        if wingArea <= 0 or wingSpan <= 0 or weight <= 0:
+            raise RuntimeError("Wing area, wing span and weight must be positive")
+        self.name = name
+        self.designation = designation
+        self.wingArea = float(wingArea)
+        self.wingSpan = float(wingSpan)
+        self.weight = float(weight)
+        self.thrust = float(thrust)
+        self.afterburnerThrust = float(afterburnerThrust)
+        self.CLMax = float(CLMax)
+        self.CLSlope = float(CLSlope)
+        self.alphaStall = float(alphaStall)
+        self.isCapped = bool(isCapped)
+        self.percentage = float(percentage)
+        self.statedThrustToWeight = float(statedThrustToWeight)
+        self.liftTable = liftTable
+        self.aero = aero
+
+        self.aspectRatio = self.wingSpan**2 / self.wingArea
+        self.k = self.inducedDragFactor()
+        self.wingLoading = self.weight / self.wingArea
+        self.thrustToWeight = self.thrust / self.weight
+
+    @classmethod
+    def fromStats(cls,pref,name=None,folder=None):
+        postStall = pref.get("Post-Stall Behaviour",{})
+        liftTable = None
+        if "Lift Table" in pref:
+            from engine.Lift import parseLiftTable
+            liftTable = parseLiftTable(pref["Lift Table"])
+        aero = None
+        if "Aero Tables" in pref:
+            from engine.Aero import AeroTables
+            aero = AeroTables.fromStats(pref["Aero Tables"],folder)
+        return cls(
+            wingArea=_toSI(pref,"Wing Area",areaUnits),
+            wingSpan=_toSI(pref,"Wing Span",lengthUnits),
+            weight=_toSI(pref,"Weight",forceUnits),
+            thrust=_toSI(pref,"Thrust",forceUnits),
+            afterburnerThrust=_toSI(pref,"Afterburner Power",forceUnits) if "Afterburner Power" in pref else 0.0,
+            CLMax=pref.get("CL Max",float(liftTable[1].max()) if liftTable is not None else 0.0),
+            CLSlope=pref.get("CL Slope",0.0),
+            alphaStall=pref.get("Alpha Stall",0.0),
+            isCapped=postStall.get("Is Capped",False),
+            percentage=postStall.get("Percentage") or 0.0,
+            statedThrustToWeight=pref.get("Thrust To Weight",0.0),
+            name=name,
+            designation=pref.get("Designation"),
+            liftTable=liftTable,
+            aero=aero,
+        )
+
+    @classmethod
+    def fromData(cls,data,folder=None):
+        return cls.fromStats(data["aircraft"]["stats"],data["aircraft"].get("name"),folder)
+
+    def inducedDragFactor(self,e=0.8):
+        return 1.0 / (math.pi * self.aspectRatio * e)
+
+    # Copy with weight, thrust and CL Max multiplied, for what-if studies (lift and CL Max tables are scaled with CL Max)
+    def scaled(self,weight=1.0,thrust=1.0,CLMax=1.0):
+        liftTable = self.liftTable
+        if liftTable is not None and CLMax != 1.0:
+            liftTable = (liftTable[0],liftTable[1] * CLMax)
+        return AircraftModel(self.wingArea,self.wingSpan,self.weight * weight,self.thrust * thrust,self.CLMax * CLMax,
+                             self.CLSlope,self.alphaStall,self.isCapped,self.percentage,self.afterburnerThrust * thrust,
+                             self.statedThrustToWeight,self.name,self.designation,liftTable,
+                             None if self.aero is None else self.aero.scaled(CLMax))
+
+    # The normalized stats dict, stable identity for cache keys
+    def stats(self):
+        return {
+            "wingArea": self.wingArea,
+            "wingSpan": self.wingSpan,
+            "weight": self.weight,
+            "thrust": self.thrust,
+            "CLMax": self.CLMax,
+            "CL Slope": self.CLSlope,
+            "Alpha Stall": self.alphaStall,
+            "Thrust To Weight": self.statedThrustToWeight,
+            "Is Capped": self.isCapped,
+            "Percentage": self.percentage,
+            "Lift Table": None if self.liftTable is None else [self.liftTable[0],self.liftTable[1]],
+            "Aero Tables": None if self.aero is None else self.aero.identity(),
+        }
+
+    # Table files outside the .json, for caches keyed by the aircraft file
+    def sources(self):
+        return [] if self.aero is None else self.aero.sources()
+
+    def __repr__(self):
+        return f"AircraftModel({self.name!r}, S={self.wingArea:.2f} m², b={self.wingSpan:.2f} m, W={self.weight:.0f} N, T={self.thrust:.0f} N)"
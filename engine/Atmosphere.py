@@ -0,0 +1,89 @@
+import numpy as np
+
+"""
+International Standard Atmosphere shared by every screen and the batch tools
+
+Covers the standard layers from sea level up to 84852 m (geopotential), higher altitudes get the values at 84852 m.
+Altitudes can be scalars or arrays
+
+Values come from a precomputed table that is linearly interpolated (pressure in log space), altitudes
+outside of the table or exact=True use the closed form layer equations instead. The table is evenly spaced,
+so the row of each altitude is computed directly instead of searched for (millions of samples per call)
+
+dT is the ISA deviation in Kelvin (hot day > 0, cold day < 0), it shifts temperature at a fixed pressure altitude
+"""
+
+g0 = 9.80665 # gravity in m/s^2
+R = 287.05287 # in J/(kg*K)
+gamma = 1.4
+T0 = 288.15 # In Kelvin
+p0 = 101325 # In Pa
+rho0 = p0 / (R * T0)
+a0 = np.sqrt(gamma * R * T0)
+
+# Base altitude (m), base temperature (K) and lapse rate (K/m) of each layer
+layerBase = np.array([0.0,11000.0,20000.0,32000.0,47000.0,51000.0,71000.0])
+layerLapse = np.array([-0.0065,0.0,0.001,0.0028,0.0,-0.0028,-0.002])
+topAltitude = 84852.0
+
+def _layerBaseValues():
+    TBase = [T0]
+    pBase = [p0]
+    for i in range(1,len(layerBase)):
+        h = layerBase[i] - layerBase[i-1]
+        T, p = _inLayer(TBase[-1],pBase[-1],layerLapse[i-1],h)
+        TBase.append(T)
+        pBase.append(p)
+    return np.array(TBase), np.array(pBase)
+
+def _inLayer(Tb,pb,L,h):
+    T = Tb + L * h
+    with np.errstate(divide="ignore",invalid="ignore"):
+        pLapse = pb * (T / Tb) ** (-g0 / (L * R))
+        pIso = pb * np.exp(-g0 * h / (R * Tb))
+    return T, np.where(L == 0,pIso,pLapse)
+
+layerT, layerP = _layerBaseValues()
+
+# The model ends at topAltitude, anything above it gets the values at the top
+def exactTP(altM):
+    altM = np.minimum(np.asarray(altM,dtype=float),topAltitude)
+    i = np.clip(np.searchsorted(layerBase,altM,side="right") - 1,0,len(layerBase) - 1)
+    return _inLayer(layerT[i],layerP[i],layerLapse[i],altM - layerBase[i])
+
+# ----- Lookup table -----
+
+tableStep = 10.0
+tableAlt = np.arange(0.0,80000.0 + tableStep,tableStep)
+tableT, _p = exactTP(tableAlt)
+tableLogP = np.log(_p)
+del _p
+tableTSlope = np.diff(tableT)
+tableLogPSlope = np.diff(tableLogP)
+
+def standardTP(altM,exact=False):
+    altM = np.asarray(altM,dtype=float)
+    if exact:
+        return exactTP(altM)
+    x = (altM - tableAlt[0]) * (1.0 / tableStep)
+    i = np.clip(x.astype(np.intp),0,tableAlt.size - 2)
+    t = x - i
+    T = tableT[i] + t * tableTSlope[i]
+    p = np.exp(tableLogP[i] + t * tableLogPSlope[i])
+    outside = (altM < tableAlt[0]) | (altM > tableAlt[-1])
+    if np.any(outside):
+        TExact, pExact = exactTP(altM)
+        T = np.where(outside,TExact,T)
+        p = np.where(outside,pExact,p)
+    return T, p
+
+def isa(altM,dT=0.0,exact=False):
+    T, p = standardTP(altM,exact)
+    T = T + dT
+    rho = p / (R * T)
+    a = np.sqrt(gamma * R * T)
+    return T, p, rho, a
+
+def atmosphere(altM,dT=0.0):
+    T, _, rho, a = isa(altM,dT)
+    return T, rho, a
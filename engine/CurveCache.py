@@ -0,0 +1,108 @@
+from collections import OrderedDict
+import hashlib
+import json
+import threading
+import numpy as np
+
+"""
+Process wide memoization of computed curves
+
+Keys are a hash of the normalized aircraft stats plus the plot inputs (altitude, Mach grid, IAS range, g-limit, ...),
+so the same aircraft plotted again from any screen (or a rebuilt screen) is served from memory
+
+Entries are evicted least recently used first once the arrays held go over maxBytes,
+cached arrays are made read-only since every caller shares them
+"""
+
+def _normalize(value):
+    if isinstance(value,np.ndarray):
+        digest = hashlib.sha1(np.ascontiguousarray(value).tobytes()).hexdigest()
+        return {"array": digest, "shape": value.shape, "dtype": str(value.dtype)}
+    if isinstance(value,dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value,(list,tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value,np.generic):
+        return value.item()
+    return value
+
+def curveKey(kind,stats,params):
+    payload = json.dumps([kind,_normalize(stats),_normalize(params)],sort_keys=True,default=repr)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+def _sizeOf(value):
+    if isinstance(value,np.ndarray):
+        return value.nbytes
+    if isinstance(value,dict):
+        return sum(_sizeOf(v) for v in value.values())
+    if isinstance(value,(list,tuple)):
+        return sum(_sizeOf(v) for v in value) + 8 * len(value)
+    return 16
+
+def _freeze(value):
+    if isinstance(value,np.ndarray):
+        value.flags.writeable = False
+    elif isinstance(value,dict):
+        for v in value.values():
+            _freeze(v)
+    elif isinstance(value,(list,tuple)):
+        for v in value:
+            _freeze(v)
+    return value
+
+class CurveCache:
+    def __init__(self,maxBytes=64 * 1024 * 1024):
+        self.maxBytes = maxBytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self,key):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key][0]
+            self.misses += 1
+            return None
+
+    def put(self,key,value):
+        size = _sizeOf(value)
+        if size > self.maxBytes:
+            return value
+        _freeze(value)
+        with self.lock:
+            if key in self.entries:
+                self.bytes -= self.entries.pop(key)[1]
+            self.entries[key] = (value,size)
+            self.bytes += size
+            while self.bytes > self.maxBytes:
+                _, (_, oldSize) = self.entries.popitem(last=False)
+                self.bytes -= oldSize
+        return value
+
+    def getOrCompute(self,kind,stats,params,compute):
+        key = curveKey(kind,stats,params)
+        value = self.get(key)
+        if value is None:
+            value = self.put(key,compute())
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def statistics(self):
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "bytes": self.bytes,
+                "maxBytes": self.maxBytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+curveCache = CurveCache()
@@ -0,0 +1,174 @@
+import hashlib
+import os
+import threading
+import numpy as np
+from engine.CurveCache import curveKey
+from Profiling import timed
+
+"""
+Optional on-disk cache of computed curves, stored as compressed .npz files
+
+Turned on by the FMC_DISK_CACHE environment variable (a folder, or 1 for ~/.cache/FlightModelCalculator)
+
+Entries are keyed by a hash of the aircraft file contents plus the model version, which includes a hash of the physics
+source files, so editing either the aircraft or the physics invalidates old entries without any bookkeeping.
+Anything else a result depends on, drag constants and grids set by the screen, has to be in the params it passes.
+Table files an aircraft refers to (sources) are keyed by path, mtime and size only, they can be hundreds of MB
+
+Once the folder goes over maxBytes the oldest entries are deleted first
+
+Writing is best effort, a cache folder that can't be created or written to (removed, read-only, disk full) never fails
+the computation, the folder is turned off at start or the entry is simply not stored
+"""
+
+MODEL_VERSION = "1"
+
+physicsModules = ["Aero.py","Aircraft.py","AirSpeed.py","Atmosphere.py","Energy.py","Envelope.py","Lift.py","Thrust.py","Turn.py"]
+
+def modelVersion():
+    digest = hashlib.sha1(MODEL_VERSION.encode("utf-8"))
+    folder = os.path.dirname(os.path.abspath(__file__))
+    for name in physicsModules:
+        path = os.path.join(folder,name)
+        if os.path.exists(path):
+            with open(path,"rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+# ----- Converting results to and from .npz -----
+
+def _pack(result):
+    arrays = {}
+    isTuple = isinstance(result,tuple)
+    items = result if isTuple else (result,)
+    noneMask = []
+    for i, value in enumerate(items):
+        noneMask.append(value is None)
+        if value is not None:
+            arrays[f"r{i}"] = np.asarray(value)
+    arrays["noneMask"] = np.array(noneMask,dtype=bool)
+    arrays["isTuple"] = np.array(isTuple)
+    return arrays
+
+def _unpack(npz):
+    noneMask = npz["noneMask"]
+    items = []
+    for i, isNone in enumerate(noneMask):
+        if isNone:
+            items.append(None)
+            continue
+        value = npz[f"r{i}"]
+        items.append(value.item() if value.ndim == 0 else value)
+    return tuple(items) if bool(npz["isTuple"]) else items[0]
+
+class DiskCache:
+    def __init__(self,folder=None,maxBytes=256 * 1024 * 1024):
+        self.folder = folder
+        self.maxBytes = maxBytes
+        self.version = modelVersion()
+        self.digests = {}
+        self.lock = threading.Lock()
+        if folder is not None:
+            try:
+                os.makedirs(folder,exist_ok=True)
+            except OSError:
+                self.folder = None
+
+    @property
+    def enabled(self):
+        return self.folder is not None
+
+    # Hashing the file is skipped while its mtime and size are unchanged
+    def fileDigest(self,filePath):
+        if filePath is None:
+            return None
+        st = os.stat(filePath)
+        stamp = (st.st_mtime_ns,st.st_size)
+        cached = self.digests.get(filePath)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        digest = hashlib.sha256()
+        with open(filePath,"rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20),b""):
+                digest.update(chunk)
+        digest = digest.hexdigest()
+        self.digests[filePath] = (stamp,digest)
+        return digest
+
+    def key(self,kind,filePath,params,sources=()):
+        stamps = []
+        for source in sources:
+            st = os.stat(source)
+            stamps.append([source,st.st_mtime_ns,st.st_size])
+        return curveKey(kind,{"file": self.fileDigest(filePath),"model": self.version,"sources": stamps},params)
+
+    def path(self,key):
+        return os.path.join(self.folder,key + ".npz")
+
+    @timed("cache:diskLoad")
+    def load(self,key):
+        path = self.path(key)
+        try:
+            with np.load(path,allow_pickle=False) as npz:
+                return _unpack(npz)
+        except (OSError,KeyError,ValueError):
+            return None
+
+    @timed("cache:diskSave")
+    def save(self,key,result):
+        path = self.path(key)
+        tmpPath = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmpPath,"wb") as f:
+                np.savez_compressed(f,**_pack(result))
+            os.replace(tmpPath,path)
+        except OSError:
+            try:
+                os.remove(tmpPath)
+            except OSError:
+                pass
+            return False
+        self.evict()
+        return True
+
+    def evict(self):
+        with self.lock:
+            entries = []
+            total = 0
+            try:
+                for entry in os.scandir(self.folder):
+                    if entry.name.endswith(".npz"):
+                        st = entry.stat()
+                        entries.append((st.st_mtime,st.st_size,entry.path))
+                        total += st.st_size
+            except OSError:
+                return
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.maxBytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                total -= size
+
+    def loadOrCompute(self,kind,filePath,params,compute,sources=()):
+        if not self.enabled:
+            return compute()
+        key = self.key(kind,filePath,params,sources)
+        result = self.load(key)
+        if result is None:
+            result = compute()
+            self.save(key,result)
+        return result
+
+def _folderFromEnvironment():
+    folder = os.environ.get("FMC_DISK_CACHE","").strip()
+    if not folder or folder == "0":
+        return None
+    if folder == "1":
+        return os.path.join(os.path.expanduser("~"),".cache","FlightModelCalculator")
+    return folder
+
+diskCache = DiskCache(_folderFromEnvironment())
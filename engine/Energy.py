@@ -0,0 +1,30 @@
+import numpy as np
+from engine.Aero import aeroCoefficients, inducedDragFactor
+from engine.Atmosphere import atmosphere, rho0
+
+"""
+Specific excess power (Ps) over a load factor x altitude x Mach grid, evaluated in one broadcast pass
+
+Ps = (T - D) * V / W with the same drag polar and thrust lapse used by the turn curves,
+CD0 and k come from the aircraft's aero tables at each (altitude, Mach) cell when it has them
+"""
+
+def specificExcessPower(TForce,DForce,V,W):
+    return (TForce - DForce) * V / W
+
+def psGrid(machVals,alts,nVals,wingArea,wingSpan,weight,thrust,CD0=0.02,e=0.8,dT=0.0,aero=None):
+    machVals = np.asarray(machVals,dtype=float)
+    alts = np.asarray(alts,dtype=float)
+    nVals = np.asarray(nVals,dtype=float)
+    _,rho,a = atmosphere(alts,dT)
+
+    CD0, k, _ = aeroCoefficients(aero,machVals[None,:],alts[:,None],CD0,inducedDragFactor(wingArea,wingSpan,e))
+    V = a[:,None] * machVals[None,:]
+    qS = 0.5 * rho[:,None] * V**2 * wingArea
+    TAvail = (thrust * (rho/rho0))[:,None]
+
+    # Drag = qS*CD0 + k*(n*W)^2/qS, the induced part is the only term that depends on n
+    parasite = qS * CD0
+    induced = k * weight**2 / qS
+    D = parasite[None,:,:] + (nVals**2)[:,None,None] * induced[None,:,:]
+    return specificExcessPower(TAvail[None,:,:],D,V[None,:,:],weight)
@@ -0,0 +1,100 @@
+import numpy as np
+from engine.Aero import inducedDragFactor, refineMaximum, scanMach
+from engine.Atmosphere import atmosphere
+from engine.Thrust import levelSpeeds, thrustAvailable
+
+"""
+Level flight envelope over altitude, with the same drag polar and thrust lapse as the thrust curves
+
+At each altitude the minimum level speed is the higher of the stall speed (from CL Max) and the lower thrust = drag root,
+the maximum level speed is the upper thrust = drag root, the envelope closes where the two meet
+
+Ceilings come from the best rate of climb, RoC = (T - D) * V / W, whose optimum speed on the parabolic polar is closed form:
+    V^2 = (T + sqrt(T^2 + 12*CD0*k*W^2)) / (3*rho*S*CD0)
+absolute ceiling is where the best RoC reaches 0, service ceiling where it drops to 100 ft/min
+
+Aircraft inputs may be arrays shaped (N, 1) against the altitude axis, every altitude is solved in one broadcast pass
+
+With aero tables the stall speed is iterated on CL Max at the stall Mach, and the best climb speed is found on a Mach scan
+"""
+
+serviceClimbRate = 100 * 0.3048 / 60
+
+def stallSpeed(wingArea,weight,CLMax,rho):
+    return np.sqrt(2.0 * weight / (rho * wingArea * CLMax))
+
+# CL Max(Mach) moves the stall speed, which moves the Mach it is read at, a few fixed point steps settle it at low Mach
+def tabulatedStallSpeed(wingArea,weight,CLMax,rho,a,altM,aero,iterations=6):
+    VStall = stallSpeed(wingArea,weight,CLMax,rho)
+    if aero is None or aero.CLMax is None:
+        return VStall
+    for _ in range(iterations):
+        VStall = stallSpeed(wingArea,weight,aero.CLMax(VStall / a,altM),rho)
+    return VStall
+
+def bestClimbRate(wingArea,wingSpan,weight,thrust,CLMax,altM,CD0=0.012,e=0.8,dT=0.0,aero=None):
+    k = inducedDragFactor(wingArea,wingSpan,e)
+    _, rho, a = atmosphere(altM,dT)
+    TAvail = thrustAvailable(thrust,rho)
+    if aero is not None and (aero.hasDrag or aero.CLMax is not None):
+        return tabulatedClimbRate(wingArea,weight,TAvail,CLMax,rho,a,altM,CD0,k,aero)
+    VBest = np.sqrt((TAvail + np.sqrt(TAvail**2 + 12.0 * CD0 * k * weight**2)) / (3.0 * rho * wingArea * CD0))
+    # Excess power falls off either side of the optimum, so below stall the best available is at stall
+    V = np.maximum(VBest,stallSpeed(wingArea,weight,CLMax,rho))
+    qS = 0.5 * rho * V**2 * wingArea
+    D = qS * CD0 + k * weight**2 / qS
+    return (TAvail - D) * V / weight
+
+def tabulatedClimbRate(wingArea,weight,TAvail,CLMax,rho,a,altM,CD0,k,aero):
+    machStall = tabulatedStallSpeed(wingArea,weight,CLMax,rho,a,altM,aero) / a
+    wingArea, weight, TAvail, rho, a, altM, CD0, k, machStall = [np.asarray(x,dtype=float)[...,None] for x in (wingArea,weight,TAvail,rho,a,altM,CD0,k,machStall)]
+
+    def climbRate(mach):
+        mach = np.maximum(mach,machStall)
+        qS = 0.5 * rho * (mach * a)**2 * wingArea
+        CD0M, kM, _ = aero.coefficients(mach,altM,CD0,k)
+        return (TAvail - qS * CD0M - kM * weight**2 / qS) * mach * a / weight
+
+    best = np.argmax(climbRate(scanMach),axis=-1)[...,None]
+    last = scanMach.size - 1
+    machBest = refineMaximum(climbRate,scanMach[np.maximum(best - 1,0)],scanMach[np.minimum(best + 1,last)])
+    return climbRate(machBest)[...,0]
+
+def flightEnvelope(wingArea,wingSpan,weight,thrust,CLMax,alts=None,CD0=0.012,e=0.8,dT=0.0,aero=None,ceilingIterations=24):
+    if alts is None:
+        alts = np.arange(0,25001,100,dtype=float)
+    alts = np.asarray(alts,dtype=float)
+    _, rho, a = atmosphere(alts,dT)
+
+    VThrustMin, VMax, _, _ = levelSpeeds(wingArea,wingSpan,weight,thrust,alts,CD0=CD0,e=e,dT=dT,aero=aero)
+    VStall = tabulatedStallSpeed(wingArea,weight,CLMax,rho,a,alts,aero)
+    VMin = np.fmax(VStall,VThrustMin)
+    closed = ~(VMax >= VMin)
+    VMin = np.where(closed,np.nan,VMin)
+    VMax = np.where(closed,np.nan,VMax)
+
+    climb = lambda h: bestClimbRate(wingArea,wingSpan,weight,thrust,CLMax,h,CD0=CD0,e=e,dT=dT,aero=aero)
+    climbRate = climb(alts)
+    absoluteCeiling = ceiling(climb,alts,climbRate,0.0,ceilingIterations)
+    serviceCeiling = ceiling(climb,alts,climbRate,serviceClimbRate,ceilingIterations)
+    return alts, VMin, VMax, VStall, climbRate, absoluteCeiling, serviceCeiling
+
+"""
+Altitude where climb(h) first drops below threshold, bracketed on the swept grid then bisected to about a centimetre
+
+NaN when the aircraft is already below the threshold at the lowest altitude, or still above it at the top of the sweep
+"""
+
+def ceiling(climb,alts,climbRate,threshold,iterations=24):
+    below = climbRate < threshold
+    first = np.argmax(below,axis=-1)
+    valid = below.any(axis=-1) & (first > 0)
+    first = np.where(valid,first,1)
+    lo = alts[first - 1]
+    hi = alts[first]
+    for _ in range(iterations):
+        mid = 0.5 * (lo + hi)
+        isBelow = climb(mid[...,None])[...,0] < threshold
+        hi = np.where(isBelow,mid,hi)
+        lo = np.where(isBelow,lo,mid)
+    return np.where(valid,0.5 * (lo + hi),np.nan)
@@ -0,0 +1,64 @@
+import numpy as np
+from engine.Aircraft import AircraftModel
+from engine.Atmosphere import atmosphere
+from engine.Thrust import levelSpeeds, thrustAvailable, thrustCurves
+from engine.Turn import turnCurves
+
+"""
+Many aircraft evaluated at once, their SI stats are stacked into (N, 1) columns so every curve
+broadcasts over an aircraft axis instead of looping per aircraft
+
+Results come back as (N, points) arrays, one row per aircraft in the order they were given
+
+Aircraft with aero tables (fleet["aero"]) can't share one broadcast, their rows are recomputed one aircraft at a time
+"""
+
+fleetFields = ["wingArea","wingSpan","weight","thrust","CLMax"]
+
+# folders are where each aircraft's table files are looked up (normally the folder of its .json)
+def stackFleet(datas,folders=None):
+    models = [AircraftModel.fromData(data,folders[i] if folders is not None else None) for i, data in enumerate(datas)]
+    fleet = {field: np.array([getattr(model,field) for model in models],dtype=float).reshape(-1,1) for field in fleetFields}
+    fleet["names"] = [data["aircraft"].get("name") or f"Aircraft {i + 1}" for i, data in enumerate(datas)]
+    fleet["aero"] = [model.aero for model in models]
+    return fleet
+
+def concatFleets(fleets):
+    fleet = {field: np.concatenate([f[field] for f in fleets]) if fleets else np.zeros((0,1)) for field in fleetFields}
+    fleet["names"] = [name for f in fleets for name in f["names"]]
+    fleet["aero"] = [aero for f in fleets for aero in f.get("aero") or [None] * len(f["names"])]
+    return fleet
+
+def _tabulatedRows(fleet):
+    for i, aero in enumerate(fleet.get("aero") or []):
+        if aero is not None:
+            yield i, aero, [fleet[field][i,0] for field in fleetFields]
+
+def fleetTurnCurves(fleet,machVals,altM=1000.0,CD0=0.02,e=0.8,gLimit=9.0,dT=0.0):
+    instant, sustained = turnCurves(machVals,altM,fleet["wingArea"],fleet["wingSpan"],fleet["weight"],fleet["thrust"],fleet["CLMax"],CD0=CD0,e=e,gLimit=gLimit,dT=dT)
+    for i, aero, stats in _tabulatedRows(fleet):
+        instant[i], sustained[i] = turnCurves(machVals,altM,*stats,CD0=CD0,e=e,gLimit=gLimit,dT=dT,aero=aero)
+    return instant, sustained
+
+def fleetThrustCurves(fleet,VArray,altM=1000.0,CD0=0.012,e=0.8,dT=0.0):
+    _,rho,_ = atmosphere(altM,dT)
+    k = 1.0 / (np.pi * (fleet["wingSpan"]**2/fleet["wingArea"]) * e)
+
+    q = 0.5 * rho * VArray[None,:]**2
+    CL = fleet["weight"] / (q * fleet["wingArea"])
+    TReq = q * fleet["wingArea"] * (CD0 + k * CL**2)
+    for i, aero, stats in _tabulatedRows(fleet):
+        TReq[i] = thrustCurves(*stats[:4],altM,VArray=VArray,CD0=CD0,e=e,dT=dT,aero=aero)[1]
+    TAvail = thrustAvailable(fleet["thrust"],rho)
+    maxLevelSpeed = fleetLevelSpeeds(fleet,altM,CD0=CD0,e=e,dT=dT)[1][:,0]
+
+    return TReq, np.broadcast_to(TAvail,TReq.shape), maxLevelSpeed
+
+# (VMin, VMax, VMinDrag, DMin), each (N, len(altM)) for an array of altitudes
+def fleetLevelSpeeds(fleet,altM=1000.0,CD0=0.012,e=0.8,dT=0.0):
+    alts = np.atleast_1d(np.asarray(altM,dtype=float))[None,:]
+    VMin, VMax, VMinDrag, DMin = levelSpeeds(fleet["wingArea"],fleet["wingSpan"],fleet["weight"],fleet["thrust"],alts,CD0=CD0,e=e,dT=dT)
+    DMin = np.array(np.broadcast_to(DMin,VMin.shape))
+    for i, aero, stats in _tabulatedRows(fleet):
+        VMin[i], VMax[i], VMinDrag[i], DMin[i] = levelSpeeds(*stats[:4],alts[0],CD0=CD0,e=e,dT=dT,aero=aero)
+    return VMin, VMax, VMinDrag, DMin
@@ -0,0 +1,243 @@
+import json
+import os
+import struct
+import numpy as np
+from engine.Aero import AeroTables
+from engine.Aircraft import loadAircraft, AircraftModel
+
+"""
+Packed fleet file (.fmcf), many aircraft in one file instead of one indented .json each
+
+Layout (little endian):
+    header          magic, version, record size, row count, string count, then the byte offsets of each section
+    records         one fixed-width row per aircraft (recordDtype), the normalized SI stats plus the values and
+                    unit codes the .json was written with, so exporting gives back the same file
+    string offsets  uint64, string count + 1 entries into the string blob
+    string blob     utf-8 names, designations, post-stall percentages, source file names, lift tables and aero tables
+                    (as JSON, an aero table's .npy path is rewritten relative to the fleet file when packing)
+
+Records and strings are memory-mapped, opening a fleet of any size only reads the header,
+columns are read straight off the mapping (eg., fleet.records["weight"])
+"""
+
+MAGIC = b"FMCFLEET"
+VERSION = 3
+headerFormat = "<8sIIQQQQQ"
+headerSize = struct.calcsize(headerFormat)
+noString = np.uint32(0xFFFFFFFF)
+
+# Same fields and unit choices as CreateAircraft.setStats, a unit code is the index into its list
+valueFields = {
+    "Weight": ["kg","t","lb"],
+    "Thrust": ["lbf","kN","kgf"],
+    "Afterburner Power": ["lbf","kN","kgf"],
+    "Wing Area": ["ft²","m²"],
+    "Wing Span": ["ft","m"],
+}
+# CL Max has no unit, so it is stored once in its SI column
+plainFields = ["Thrust To Weight","CL Slope","CL Max","Alpha Stall"]
+siFields = ["wingArea","wingSpan","weight","thrust","CLMax"]
+
+def _column(field):
+    return field.replace(" ","").replace("-","")
+
+recordDtype = np.dtype(
+    [("name","<u4"),("designation","<u4"),("source","<u4"),("percentage","<u4"),("liftTable","<u4"),("aeroTables","<u4")]
+    + [(field,"<f8") for field in siFields]
+    + [(_column(field) + "Value","<f8") for field in valueFields]
+    + [(_column(field) + "Unit","u1") for field in valueFields]
+    + [(_column(field),"<f8") for field in plainFields if _column(field) not in siFields]
+    + [("isCapped","u1")]
+)
+
+# ----- Writing -----
+
+class _StringTable:
+    def __init__(self):
+        self.ids = {}
+        self.strings = []
+
+    def add(self,text):
+        if text is None:
+            return noString
+        text = str(text)
+        if text not in self.ids:
+            self.ids[text] = len(self.strings)
+            self.strings.append(text.encode("utf-8"))
+        return self.ids[text]
+
+    def offsets(self):
+        return np.concatenate([[0],np.cumsum([len(s) for s in self.strings],dtype=np.uint64)]).astype("<u8")
+
+def _unitCode(field,unit):
+    units = valueFields[field]
+    return units.index(unit) if unit in units else 255
+
+# Aero table files are relative to the file that refers to them, so moving the stats next to another file rewrites them
+def _rebaseAeroTables(entry,fromFolder,toFolder):
+    entry = {field: dict(table) if isinstance(table,dict) else table for field, table in entry.items()}
+    for table in entry.values():
+        if isinstance(table,dict) and "file" in table:
+            target = os.path.abspath(os.path.join(fromFolder or "",table["file"]))
+            try:
+                table["file"] = os.path.relpath(target,os.path.abspath(toFolder or ""))
+            except ValueError:
+                # Another drive (Windows), only an absolute path reaches it
+                table["file"] = target
+    return entry
+
+def writeFleet(path,datas,sources=None):
+    records = np.zeros(len(datas),dtype=recordDtype)
+    strings = _StringTable()
+    fleetFolder = os.path.dirname(os.path.abspath(path))
+    for i, data in enumerate(datas):
+        aircraft = data["aircraft"]
+        stats = aircraft["stats"]
+        folder = os.path.dirname(os.path.abspath(sources[i])) if sources is not None else None
+        model = AircraftModel.fromStats(stats,folder=folder)
+        row = records[i]
+        row["name"] = strings.add(aircraft.get("name"))
+        row["designation"] = strings.add(stats.get("Designation"))
+        row["source"] = strings.add(os.path.basename(sources[i]) if sources is not None else None)
+        for field in siFields:
+            row[field] = getattr(model,field)
+        for field in valueFields:
+            entry = stats.get(field,{"value": 0.0,"unit": None})
+            row[_column(field) + "Value"] = entry["value"]
+            row[_column(field) + "Unit"] = _unitCode(field,entry["unit"])
+        for field in plainFields:
+            if _column(field) not in siFields:
+                row[_column(field)] = stats.get(field,0.0)
+        postStall = stats.get("Post-Stall Behaviour",{})
+        row["isCapped"] = bool(postStall.get("Is Capped",False))
+        row["percentage"] = strings.add(postStall.get("Percentage"))
+        row["liftTable"] = strings.add(json.dumps(stats["Lift Table"]) if "Lift Table" in stats else None)
+        row["aeroTables"] = strings.add(json.dumps(_rebaseAeroTables(stats["Aero Tables"],folder,fleetFolder)) if "Aero Tables" in stats else None)
+
+    offsets = strings.offsets()
+    recordsOffset = headerSize
+    offsetsOffset = recordsOffset + records.nbytes
+    blobOffset = offsetsOffset + offsets.nbytes
+    header = struct.pack(headerFormat,MAGIC,VERSION,recordDtype.itemsize,len(records),len(strings.strings),
+                         recordsOffset,offsetsOffset,blobOffset)
+    tmpPath = f"{path}.{os.getpid()}.tmp"
+    with open(tmpPath,"wb") as f:
+        f.write(header)
+        f.write(records.tobytes())
+        f.write(offsets.tobytes())
+        for s in strings.strings:
+            f.write(s)
+    os.replace(tmpPath,path)
+    return len(records)
+
+# ----- Reading -----
+
+class FleetFile:
+    def __init__(self,path):
+        self.path = path
+        with open(path,"rb") as f:
+            header = f.read(headerSize)
+        if len(header) < headerSize:
+            raise RuntimeError(f"Fleet file too short: {path}")
+        magic, version, itemSize, self.count, stringCount, recordsOffset, offsetsOffset, blobOffset = struct.unpack(headerFormat,header)
+        if magic != MAGIC or version != VERSION or itemSize != recordDtype.itemsize:
+            raise RuntimeError(f"Not a version {VERSION} fleet file: {path}")
+        self.records = np.memmap(path,dtype=recordDtype,mode="r",offset=recordsOffset,shape=(self.count,)) if self.count else np.zeros(0,dtype=recordDtype)
+        self.offsets = np.memmap(path,dtype="<u8",mode="r",offset=offsetsOffset,shape=(stringCount + 1,))
+        size = int(self.offsets[-1])
+        self.blob = np.memmap(path,dtype=np.uint8,mode="r",offset=blobOffset,shape=(size,)) if size else np.zeros(0,dtype=np.uint8)
+
+    def __len__(self):
+        return self.count
+
+    def string(self,stringId):
+        if stringId == noString:
+            return None
+        start, end = int(self.offsets[stringId]), int(self.offsets[stringId + 1])
+        return self.blob[start:end].tobytes().decode("utf-8")
+
+    def names(self):
+        return [self.string(i) or f"Aircraft {n + 1}" for n, i in enumerate(self.records["name"])]
+
+    def designations(self):
+        return [self.string(i) for i in self.records["designation"]]
+
+    def aero(self,index):
+        aeroTables = self.string(self.records[index]["aeroTables"])
+        if aeroTables is None:
+            return None
+        return AeroTables.fromStats(json.loads(aeroTables),os.path.dirname(os.path.abspath(self.path)))
+
+    # Same shape as engine.Fleet.stackFleet, only the rows that have aero tables are parsed
+    def fleet(self,rows=slice(None)):
+        fleet = {field: np.asarray(self.records[field][rows],dtype=float)[:,None] for field in siFields}
+        indices = np.arange(self.count)[rows]
+        names = self.names()
+        fleet["names"] = [names[i] for i in indices]
+        fleet["aero"] = [None] * len(indices)
+        for n in np.flatnonzero(self.records["aeroTables"][indices] != noString):
+            fleet["aero"][n] = self.aero(indices[n])
+        return fleet
+
+    # Back to the .json schema written by CreateAircraft.saveStats
+    def toData(self,index):
+        row = self.records[index]
+        stats = {}
+        for field, units in valueFields.items():
+            code = int(row[_column(field) + "Unit"])
+            stats[field] = {"value": float(row[_column(field) + "Value"]),"unit": units[code] if code < len(units) else None}
+        for field in plainFields:
+            stats[field] = float(row[_column(field)])
+        postStall = {"Is Capped": bool(row["isCapped"])}
+        percentage = self.string(row["percentage"])
+        if percentage is not None:
+            postStall["Percentage"] = percentage
+        stats["Post-Stall Behaviour"] = postStall
+        liftTable = self.string(row["liftTable"])
+        if liftTable is not None:
+            stats["Lift Table"] = json.loads(liftTable)
+        aeroTables = self.string(row["aeroTables"])
+        if aeroTables is not None:
+            stats["Aero Tables"] = json.loads(aeroTables)
+        designation = self.string(row["designation"])
+        if designation is not None:
+            stats["Designation"] = designation
+        return {"aircraft": {"name": self.string(row["name"]),"stats": stats}}
+
+    def source(self,index):
+        return self.string(self.records[index]["source"])
+
+# ----- Converting folders of .json files -----
+
+# Files that can't be read or have no complete stats yet (SelectScreen creates them empty) are left out,
+# returns the packed count and (file, reason) for each skipped file
+def importJson(files,path):
+    datas = []
+    packed = []
+    skipped = []
+    for file in files:
+        try:
+            data = loadAircraft(file)
+            AircraftModel.fromData(data,os.path.dirname(os.path.abspath(file)))
+        except (RuntimeError,KeyError,TypeError,ValueError) as error:
+            skipped.append((file,str(error) if isinstance(error,RuntimeError) else f"Missing or invalid aircraft data ({error!r})"))
+            continue
+        datas.append(data)
+        packed.append(file)
+    return writeFleet(path,datas,packed), skipped
+
+def exportJson(path,folder):
+    fleet = FleetFile(path)
+    os.makedirs(folder,exist_ok=True)
+    written = []
+    for i in range(len(fleet)):
+        name = fleet.source(i) or f"aircraft{i + 1}.json"
+        outPath = os.path.join(folder,name)
+        data = fleet.toData(i)
+        stats = data["aircraft"]["stats"]
+        if "Aero Tables" in stats:
+            stats["Aero Tables"] = _rebaseAeroTables(stats["Aero Tables"],os.path.dirname(os.path.abspath(path)),folder)
+        with open(outPath,"w") as f:
+            json.dump(data,f,indent=4)
+        written.append(outPath)
+    return written
@@ -0,0 +1,46 @@
+import numpy as np
+
+"""
+Lift coefficient against angle of attack, evaluated on whole alpha arrays of any shape in one pass
+
+Analytic model: CL = CL Slope * alpha up to Alpha Stall (never above CL Max), after the stall either capped at CL Max
+or dropping linearly over dropWidth degrees to Percentage * CL Max and staying there
+
+Tabular model: an aircraft file may carry its own measured curve,
+    "Lift Table": {"alpha": [deg, ...], "CL": [...]}
+which is linearly interpolated and held at its end values outside the table
+"""
+
+dropWidth = 5.0
+
+def analyticLift(alphaDeg,CLSlope,CLMax,alphaStall,isCapped=False,percentage=0.0):
+    alphaDeg = np.asarray(alphaDeg,dtype=float)
+    linear = np.minimum(CLSlope * np.radians(alphaDeg),CLMax)
+    if isCapped:
+        postStall = np.full_like(linear,CLMax)
+    else:
+        t = np.clip((alphaDeg - alphaStall) / dropWidth,0.0,1.0)
+        postStall = CLMax * (1.0 - t) + CLMax * percentage * t
+    return np.where(alphaDeg <= alphaStall,linear,postStall)
+
+def tabularLift(alphaDeg,tableAlpha,tableCL):
+    return np.interp(np.asarray(alphaDeg,dtype=float),tableAlpha,tableCL)
+
+def parseLiftTable(entry):
+    try:
+        tableAlpha = np.asarray(entry["alpha"],dtype=float)
+        tableCL = np.asarray(entry["CL"],dtype=float)
+    except (KeyError,TypeError,ValueError):
+        raise RuntimeError("Lift Table needs matching numeric alpha and CL lists")
+    if tableAlpha.ndim != 1 or tableAlpha.shape != tableCL.shape or tableAlpha.size < 2:
+        raise RuntimeError("Lift Table needs matching numeric alpha and CL lists")
+    if np.any(np.diff(tableAlpha) <= 0):
+        raise RuntimeError("Lift Table alpha values must be strictly increasing")
+    tableAlpha.flags.writeable = False
+    tableCL.flags.writeable = False
+    return tableAlpha, tableCL
+
+def liftCoefficient(model,alphaDeg):
+    if model.liftTable is not None:
+        return tabularLift(alphaDeg,*model.liftTable)
+    return analyticLift(alphaDeg,model.CLSlope,model.CLMax,model.alphaStall,model.isCapped,model.percentage)
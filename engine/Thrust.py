@@ -0,0 +1,99 @@
+import numpy as np
+from engine.Aero import aeroCoefficients, inducedDragFactor, refineCrossing, refineMaximum, scanMach
+from engine.Atmosphere import atmosphere, rho0
+
+"""
+Thrust required (drag) and thrust available against true airspeed at one altitude
+
+VMax is the upper root of thrust required = thrust available, solved in closed form by levelSpeeds
+"""
+
+def thrustAvailable(thrust,rho):
+    return thrust * (0.7 + 0.3 * rho / rho0)
+
+"""
+Level flight speeds straight from the parabolic drag polar, D = qS*CD0 + k*W^2/(qS)
+
+Thrust available does not depend on speed, so D = T is a quadratic in qS:
+    CD0*(qS)^2 - T*(qS) + k*W^2 = 0
+its two roots are the min and max level speeds, and minimum drag (D = 2W*sqrt(k*CD0)) sits at qS = W*sqrt(k/CD0)
+
+Every input broadcasts, so arrays of altitudes and aircraft are solved in one pass,
+speeds come back as NaN where thrust never reaches the minimum drag (no level flight possible)
+
+When aero tables make CD0 or k depend on Mach the roots are found on a Mach scan instead (tabulatedLevelSpeeds)
+"""
+
+def levelSpeeds(wingArea,wingSpan,weight,thrust,altM=1000,CD0=0.012,e=0.8,dT=0.0,aero=None):
+    k = inducedDragFactor(wingArea,wingSpan,e)
+    _, rho, a = atmosphere(altM,dT)
+    TAvail = thrustAvailable(thrust,rho)
+    if aero is not None and aero.hasDrag:
+        return tabulatedLevelSpeeds(wingArea,weight,TAvail,rho,a,altM,CD0,k,aero)
+
+    disc = TAvail**2 - 4.0 * CD0 * k * weight**2
+    root = np.sqrt(np.where(disc >= 0,disc,np.nan))
+    qSMax = (TAvail + root) / (2.0 * CD0)
+    # Written as c/(b/2 + root/2) rather than (b - root)/2a so it keeps its precision when TAvail >> drag
+    qSMin = 2.0 * k * weight**2 / (TAvail + root)
+    qSMinDrag = weight * np.sqrt(k / CD0)
+
+    VMin = np.sqrt(2.0 * qSMin / (rho * wingArea))
+    VMax = np.sqrt(2.0 * qSMax / (rho * wingArea))
+    VMinDrag = np.sqrt(2.0 * qSMinDrag / (rho * wingArea))
+    DMin = 2.0 * weight * np.sqrt(k * CD0)
+    return VMin, VMax, VMinDrag, DMin
+
+"""
+Level speeds with Mach dependent CD0 and k, drag is swept over scanMach on a trailing axis and each root is
+bisected inside its bracket, the minimum drag speed is refined by golden section around the lowest scan point
+
+VMin and VMax are the first and last crossings, so a transonic drag rise that splits level flight into a subsonic
+and a supersonic band reports the outer limits of both, VMax is NaN when thrust still exceeds drag at the top of the scan
+"""
+
+def tabulatedLevelSpeeds(wingArea,weight,TAvail,rho,a,altM,CD0,k,aero):
+    wingArea, weight, TAvail, rho, a, altM, CD0, k = [np.asarray(x,dtype=float)[...,None] for x in (wingArea,weight,TAvail,rho,a,altM,CD0,k)]
+
+    def drag(mach):
+        qS = 0.5 * rho * (mach * a)**2 * wingArea
+        CD0M, kM, _ = aero.coefficients(mach,altM,CD0,k)
+        return qS * CD0M + kM * weight**2 / qS
+
+    excess = lambda mach: TAvail - drag(mach)
+    D = drag(scanMach)
+    level = TAvail >= D
+    last = scanMach.size - 1
+    first = np.argmax(level,axis=-1)[...,None]
+    final = last - np.argmax(level[...,::-1],axis=-1)[...,None]
+    possible = level.any(axis=-1)
+
+    machMin = refineCrossing(excess,scanMach[np.maximum(first - 1,0)],scanMach[first])
+    machMax = refineCrossing(excess,scanMach[final],scanMach[np.minimum(final + 1,last)])
+    lowest = np.argmin(D,axis=-1)[...,None]
+    machMinDrag = refineMaximum(lambda mach: -drag(mach),scanMach[np.maximum(lowest - 1,0)],scanMach[np.minimum(lowest + 1,last)])
+
+    VMin = np.where(possible,(machMin * a)[...,0],np.nan)
+    VMax = np.where(possible & (final[...,0] < last),(machMax * a)[...,0],np.nan)
+    VMinDrag = (machMinDrag * a)[...,0]
+    DMin = drag(machMinDrag)[...,0]
+    return VMin, VMax, VMinDrag, DMin
+
+def thrustCurves(wingArea,wingSpan,weight,thrust,altM=1000,VArray=None,CD0=0.012,e=0.8,dT=0.0,points=300,aero=None):
+    VMin, VMax, VMinDrag, DMin = levelSpeeds(wingArea,wingSpan,weight,thrust,altM,CD0,e,dT,aero)
+    if VArray is None:
+        # Widened past 400 m/s when needed so VMax is always on the plot
+        upper = 400.0 if np.isnan(VMax) else max(400.0,1.1 * float(VMax))
+        VArray = np.linspace(10,upper,points)
+    _, rho, a = atmosphere(altM,dT)
+    CD0, k, _ = aeroCoefficients(aero,VArray / a,altM,CD0,inducedDragFactor(wingArea,wingSpan,e))
+
+    q = 0.5 * rho * VArray**2
+    CL = weight / (q * wingArea)
+    CD = CD0 + k * CL**2
+    TReq = q * wingArea * CD
+    TAvail = thrustAvailable(thrust,rho)
+    TAvailCurve = np.full_like(VArray,TAvail)
+
+    maxLevelSpeed = None if np.isnan(VMax) else float(VMax)
+    return VArray, TReq, TAvailCurve, maxLevelSpeed
@@ -0,0 +1,67 @@
+import numpy as np
+from engine.Aero import aeroCoefficients, inducedDragFactor
+from engine.Atmosphere import atmosphere, rho0
+
+"""
+Array based turn performance, evaluates a whole Mach grid in one pass
+
+Instantaneous load factor is limited by CL Max and the g-limit, sustained load factor is solved
+in closed form from thrust = drag on the parabolic drag polar CD = CD0 + k * CL^2
+
+With aero tables (engine.Aero) CD0, k and CL Max are looked up at each point's Mach and altitude,
+the closed forms still hold point by point since they are solved at a fixed speed
+"""
+
+g = 9.80665
+
+def turnRateFromN(n,V):
+    n = np.asarray(n,dtype=float)
+    omega = g * np.sqrt(np.maximum(n**2 - 1.0,0.0)) / V
+    return np.where(n <= 1.0, 0.0, omega * 180.0 / np.pi)
+
+def instantaneousN(CLMax,S,W,rho,V,gLimit=9.0):
+    q = 0.5 * rho * V**2
+    return np.minimum(q * CLMax * S / W, gLimit)
+
+"""
+Thrust = drag with D = q*S*(CD0 + k*(n*W/(q*S))^2) gives n = (q*S/W) * sqrt((T/(q*S) - CD0)/k)
+
+When thrust can't hold level flight at 1g the result is 1 (no sustained turn), matching the old scan
+"""
+
+def sustainedN(V,rho,S,W,TAvail,CD0,k,gLimit=9.0):
+    q = 0.5 * rho * V**2
+    qS = q * S
+    excess = np.maximum(TAvail/qS - CD0, 0.0)
+    n = (qS/W) * np.sqrt(excess/k)
+    return np.clip(n,1.0,gLimit)
+
+# ----- Full curves -----
+
+def turnRates(V,rho,wingArea,wingSpan,weight,thrust,CLMax,CD0=0.02,e=0.8,gLimit=9.0,k=None):
+    if k is None:
+        k = inducedDragFactor(wingArea,wingSpan,e)
+    TAvail = thrust * (rho/rho0)
+
+    nInst = instantaneousN(CLMax,wingArea,weight,rho,V,gLimit)
+    nSust = np.minimum(sustainedN(V,rho,wingArea,weight,TAvail,CD0,k,gLimit),np.maximum(nInst,1.0))
+
+    return turnRateFromN(nInst,V), turnRateFromN(nSust,V)
+
+def turnCurves(machVals,altM,wingArea,wingSpan,weight,thrust,CLMax,CD0=0.02,e=0.8,gLimit=9.0,dT=0.0,aero=None):
+    machVals = np.asarray(machVals,dtype=float)
+    _,rho,a = atmosphere(altM,dT)
+    CD0, k, CLMax = aeroCoefficients(aero,machVals,altM,CD0,inducedDragFactor(wingArea,wingSpan,e),CLMax)
+    return turnRates(machVals * a,rho,wingArea,wingSpan,weight,thrust,CLMax,CD0,e,gLimit,k)
+
+"""
+Turn rates over a whole altitude x Mach grid in one pass, rows are altitudes and columns Mach numbers
+"""
+
+def turnCarpet(machVals,alts,wingArea,wingSpan,weight,thrust,CLMax,CD0=0.02,e=0.8,gLimit=9.0,dT=0.0,aero=None):
+    machVals = np.asarray(machVals,dtype=float)
+    alts = np.asarray(alts,dtype=float)
+    _,rho,a = atmosphere(alts,dT)
+    V = a[:,None] * machVals[None,:]
+    CD0, k, CLMax = aeroCoefficients(aero,machVals[None,:],alts[:,None],CD0,inducedDragFactor(wingArea,wingSpan,e),CLMax)
+    return turnRates(V,rho[:,None],wingArea,wingSpan,weight,thrust,CLMax,CD0,e,gLimit,k)
@@ -0,0 +1,239 @@
+import argparse
+import csv
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from engine.Aircraft import loadAircraft, AircraftModel
+from engine.AirSpeed import returnTASminusIAS
+from engine.FleetFile import FleetFile
+from engine.Lift import liftCoefficient
+from engine.Thrust import thrustCurves
+from engine.Turn import turnCurves
+
+"""
+Headless export of the curves behind the turn, lift, thrust and TAS vs IAS screens, as data and as images
+
+Usage: python export.py <aircraft .json, folder or fleet.fmcf> [...] <output folder>
+                        [--formats csv,npz,png,svg] [--workers N] [--alt M] [--ias KT] [--isa-dev K] [--size 1200x800]
+
+Every aircraft gets its own folder, <output folder>/<name>/, holding one .csv per curve (turn, lift, thrust, airspeed),
+<name>.npz with all of them, and a .png / .svg of each plot drawn with pyqtgraph the way the screens draw it.
+<output folder>/summary.csv has one line per aircraft for quick comparison
+
+Aircraft are spread over at most --workers processes (a fleet file in chunks of rows), images are rendered inside the
+workers on Qt's offscreen platform, so no display is needed and the parent process never imports PyQt5
+"""
+
+formatNames = ["csv","npz","png","svg"]
+chunk = 64
+
+# curve: (title, x column, [(column, legend, pen colour, dashed)], x label, y label), columns are (name, unit)
+plotSpecs = {
+    "turn": ("Turn Performance",("mach",""),[(("instantaneous","deg/s"),"Instantaneous",'r',False),(("sustained","deg/s"),"Sustained",'g',False)],"Mach","Turn Rate (deg/s)"),
+    "lift": ("Lift Curve",("alpha","deg"),[(("CL",""),"CL",'r',False)],"Angle of Attack (deg)","CL"),
+    "thrust": ("Thrust",("speed","m/s"),[(("required","N"),"Thrust Required (D)",'r',False),(("available","N"),"Thrust Available",'b',True)],"Speed (m/s)","Thrust (N)"),
+    "airspeed": ("TAS vs IAS",("altitude","ft"),[(("TASminusIAS","kt"),"TAS - IAS",'k',False)],"Altitude (ft)","TAS - IAS (kt)"),
+}
+
+# ----- Curve data, same inputs as the screens -----
+
+def curveData(model,altM=1000.0,VIASkt=120.0,dT=0.0,gLimit=9.0):
+    machVals = np.linspace(0.2,1.5,100)
+    instant, sustained = turnCurves(machVals,altM,model.wingArea,model.wingSpan,model.weight,model.thrust,model.CLMax,CD0=0.02,e=0.8,gLimit=gLimit,dT=dT,aero=model.aero)
+    alphas = np.linspace(-5,30,200)
+    VArray, TReq, TAvail, maxLevelSpeed = thrustCurves(model.wingArea,model.wingSpan,model.weight,model.thrust,altM,dT=dT,aero=model.aero)
+    alts, delta, tas = returnTASminusIAS(VIASkt,dT=dT)
+    curves = {
+        "turn": {"mach": machVals,"instantaneous": instant,"sustained": sustained},
+        "lift": {"alpha": alphas,"CL": liftCoefficient(model,alphas)},
+        "thrust": {"speed": VArray,"required": TReq,"available": TAvail},
+        "airspeed": {"altitude": alts,"TASminusIAS": delta,"TAS": tas},
+    }
+    return curves, maxLevelSpeed
+
+def columnUnits(name):
+    _, x, lines, _, _ = plotSpecs[name]
+    units = dict([x] + [column for column, _, _, _ in lines])
+    units.setdefault("TAS","kt")
+    return units
+
+def writeData(curves,folder,name,formats):
+    if "csv" in formats:
+        for curve, columns in curves.items():
+            units = columnUnits(curve)
+            header = ",".join(f"{column} ({units[column]})" if units.get(column) else column for column in columns)
+            np.savetxt(os.path.join(folder,f"{curve}.csv"),np.column_stack(list(columns.values())),delimiter=",",header=header,comments="",fmt="%.10g")
+    if "npz" in formats:
+        np.savez_compressed(os.path.join(folder,f"{name}.npz"),**{f"{curve}_{column}": values for curve, columns in curves.items() for column, values in columns.items()})
+
+# ----- Rendering, only ever imported inside a worker -----
+
+_app = None
+
+def initWorker(render):
+    global _app
+    if not render:
+        return
+    os.environ["QT_QPA_PLATFORM"] = "offscreen"
+    from PyQt5.QtWidgets import QApplication
+    import pyqtgraph as pg
+    _app = QApplication.instance() or QApplication([])
+    pg.setConfigOption('background','w')
+    pg.setConfigOption('foreground','k')
+    pg.setConfigOption('antialias',True)
+
+def renderPlots(curves,folder,title,formats,size):
+    import pyqtgraph as pg
+    import pyqtgraph.exporters
+    for curve, (plotTitle, (x, _), lines, xLabel, yLabel) in plotSpecs.items():
+        widget = pg.PlotWidget(title=f"{plotTitle}: {title}")
+        widget.resize(*size)
+        plotItem = widget.plotItem
+        plotItem.setLabel("bottom",xLabel)
+        plotItem.setLabel("left",yLabel)
+        plotItem.showGrid(x=True,y=True,alpha=0.3)
+        if len(lines) > 1:
+            plotItem.addLegend()
+        for (column, _), legend, colour, dashed in lines:
+            pen = pg.mkPen(colour,width=2,style=pg.QtCore.Qt.DashLine) if dashed else pg.mkPen(colour,width=2)
+            plotItem.plot(curves[curve][x],curves[curve][column],pen=pen,name=legend)
+        # Laid out like an on-screen plot before exporting, offscreen windows are never displayed
+        widget.show()
+        # Twice, the axes only widen to fit their tick labels after the first paint
+        for _ in range(2):
+            widget.repaint()
+            _app.processEvents()
+        if "png" in formats:
+            exporter = pg.exporters.ImageExporter(plotItem)
+            exporter.parameters()["width"] = size[0]
+            exporter.export(os.path.join(folder,f"{curve}.png"))
+        if "svg" in formats:
+            pg.exporters.SVGExporter(plotItem).export(os.path.join(folder,f"{curve}.svg"))
+        widget.close()
+        widget.deleteLater()
+    _app.processEvents()
+
+# ----- One aircraft -----
+
+def exportData(data,name,source,outDir,options,folder=None):
+    model = AircraftModel.fromData(data,folder)
+    curves, maxLevelSpeed = curveData(model,options["alt"],options["ias"],options["dT"])
+    aircraftDir = os.path.join(outDir,name)
+    os.makedirs(aircraftDir,exist_ok=True)
+    writeData(curves,aircraftDir,name,options["formats"])
+    if {"png","svg"} & set(options["formats"]):
+        renderPlots(curves,aircraftDir,data["aircraft"].get("name") or name,options["formats"],options["size"])
+    turn = curves["turn"]
+    return [name,source,data["aircraft"].get("name") or "",float(np.max(turn["instantaneous"])),float(np.max(turn["sustained"])),
+            float("nan") if maxLevelSpeed is None else maxLevelSpeed]
+
+# Jobs return their summary rows and (label, error) for each aircraft that failed, one bad fleet row doesn't fail its chunk
+def exportFile(filePath,name,outDir,options):
+    return [exportData(loadAircraft(filePath),name,filePath,outDir,options,os.path.dirname(os.path.abspath(filePath)))], []
+
+def exportFleetRows(fleetPath,rows,outDir,options):
+    fleet = FleetFile(fleetPath)
+    folder = os.path.dirname(os.path.abspath(fleetPath))
+    summary = []
+    errors = []
+    for i, name in rows:
+        try:
+            summary.append(exportData(fleet.toData(i),name,f"{fleetPath}[{i}]",outDir,options,folder))
+        except Exception as e:
+            errors.append((f"{fleetPath}[{i}]",str(e)))
+    return summary, errors
+
+# ----- Collecting the inputs -----
+
+def uniqueName(name,taken):
+    base, n = name, 2
+    while name in taken:
+        name = f"{base}_{n}"
+        n += 1
+    taken.add(name)
+    return name
+
+# (function, arguments before outDir, label, aircraft count) per job, names are unique across every input
+def collectJobs(inputs):
+    jobs = []
+    taken = set()
+    for path in inputs:
+        if path.endswith(".fmcf"):
+            fleet = FleetFile(path)
+            rows = [(i,uniqueName(os.path.splitext(fleet.source(i) or f"aircraft{i + 1}")[0],taken)) for i in range(len(fleet))]
+            for start in range(0,len(rows),chunk):
+                jobs.append((exportFleetRows,(path,rows[start:start + chunk]),f"{path}[{start}:{start + len(rows[start:start + chunk])}]",len(rows[start:start + chunk])))
+            continue
+        files = [os.path.join(path,name) for name in sorted(os.listdir(path)) if name.endswith(".json")] if os.path.isdir(path) else [path]
+        for file in files:
+            jobs.append((exportFile,(file,uniqueName(os.path.splitext(os.path.basename(file))[0],taken)),file,1))
+    return jobs
+
+def parseSize(text):
+    try:
+        width, height = (int(v) for v in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Size is WIDTHxHEIGHT, not {text}")
+    return width, height
+
+def parseFormats(text):
+    formats = [f.strip().lower() for f in text.split(",") if f.strip()]
+    unknown = [f for f in formats if f not in formatNames]
+    if unknown or not formats:
+        raise argparse.ArgumentTypeError(f"Formats are any of {', '.join(formatNames)}, not {text}")
+    return formats
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the curve data and plots of many aircraft without opening the app")
+    parser.add_argument("inputs",nargs="+",help="Aircraft .json files, folders of them or packed fleet files (.fmcf)")
+    parser.add_argument("output",help="Folder the exports are written to")
+    parser.add_argument("--formats",type=parseFormats,default=["csv","npz","png"],help="Comma separated, any of csv,npz,png,svg (default: csv,npz,png)")
+    parser.add_argument("--workers",type=int,default=min(os.cpu_count() or 1,8),help="Number of worker processes (default: CPU count, at most 8)")
+    parser.add_argument("--alt",type=float,default=1000.0,help="Altitude in m for the turn and thrust curves")
+    parser.add_argument("--ias",type=float,default=120.0,help="Indicated airspeed in kt for the TAS vs IAS curve")
+    parser.add_argument("--isa-dev",type=float,default=0.0,help="ISA temperature deviation in K (hot day > 0, cold day < 0)")
+    parser.add_argument("--size",type=parseSize,default=(1200,800),help="Image size in pixels, WIDTHxHEIGHT (default: 1200x800)")
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    try:
+        jobs = collectJobs(args.inputs)
+    except (OSError,RuntimeError) as e:
+        print(e,file=sys.stderr)
+        return 1
+    os.makedirs(args.output,exist_ok=True)
+    options = {"formats": args.formats,"alt": args.alt,"ias": args.ias,"dT": args.isa_dev,"size": args.size}
+    render = bool({"png","svg"} & set(args.formats))
+
+    total = sum(count for _, _, _, count in jobs)
+    failed = 0
+    summary = []
+    with ProcessPoolExecutor(max_workers=args.workers,initializer=initWorker,initargs=(render,)) as pool:
+        futures = {pool.submit(function,*jobArgs,args.output,options): (label,count) for function, jobArgs, label, count in jobs}
+        for future in as_completed(futures):
+            try:
+                rows, errors = future.result()
+            except Exception as e:
+                label, count = futures[future]
+                failed += count
+                print(f"{label}: {e}",file=sys.stderr)
+                continue
+            summary += rows
+            for label, error in errors:
+                failed += 1
+                print(f"{label}: {error}",file=sys.stderr)
+
+    summary.sort(key=lambda row: row[0])
+    with open(os.path.join(args.output,"summary.csv"),"w",newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["folder","source","name","max instantaneous turn (deg/s)","max sustained turn (deg/s)","max level speed (m/s)"])
+        for row in summary:
+            writer.writerow([value if isinstance(value,str) else f"{value:.6g}" for value in row])
+
+    print(f"{total - failed}/{total} aircraft exported to {args.output}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+import argparse
+import os
+import sys
+import time
+from engine.FleetFile import FleetFile, importJson, exportJson
+
+"""
+Convert between folders of aircraft .json files and packed fleet files (.fmcf)
+
+Usage:
+    python fleet.py import <aircraft folder> <fleet.fmcf>
+    python fleet.py export <fleet.fmcf> <output folder>
+    python fleet.py info <fleet.fmcf>
+
+Like batch.py nothing here imports PyQt5
+"""
+
+def findJson(folder):
+    return [os.path.join(folder,name) for name in sorted(os.listdir(folder)) if name.endswith(".json")]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pack aircraft .json files into a fleet file and back")
+    commands = parser.add_subparsers(dest="command",required=True)
+    packCommand = commands.add_parser("import",help="Pack a folder of aircraft .json files into a fleet file")
+    packCommand.add_argument("folder",help="Folder of aircraft .json files")
+    packCommand.add_argument("fleet",help="Fleet file to write")
+    unpackCommand = commands.add_parser("export",help="Write every aircraft in a fleet file back out as .json")
+    unpackCommand.add_argument("fleet",help="Fleet file to read")
+    unpackCommand.add_argument("folder",help="Folder the .json files are written to")
+    infoCommand = commands.add_parser("info",help="Show what a fleet file holds")
+    infoCommand.add_argument("fleet",help="Fleet file to read")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "import":
+            count, skipped = importJson(findJson(args.folder),args.fleet)
+            for file, reason in skipped:
+                print(f"{file}: skipped, {reason}",file=sys.stderr)
+            print(f"{count} aircraft packed into {args.fleet}" + (f", {len(skipped)} skipped" if skipped else ""))
+        elif args.command == "export":
+            written = exportJson(args.fleet,args.folder)
+            print(f"{len(written)} aircraft written to {args.folder}")
+        else:
+            t = time.perf_counter()
+            fleet = FleetFile(args.fleet)
+            opened = time.perf_counter() - t
+            print(f"{args.fleet}: {len(fleet)} aircraft, opened in {opened * 1e3:.2f} ms")
+            for name, designation in list(zip(fleet.names(),fleet.designations()))[:20]:
+                print(f"  {name} ({designation or 'no designation'})")
+            if len(fleet) > 20:
+                print(f"  ... and {len(fleet) - 20} more")
+    except (RuntimeError,OSError) as e:
+        print(e,file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
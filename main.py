@@ -1,20 +1,44 @@
+import StartupReport
+import argparse
+import os
 import sys
 from PyQt5.QtWidgets import QApplication
-from Navigation import NavigationController
+from PyQt5.QtCore import QTimer
 
 # Applying QSS Stylesheet to program
 def load_stylesheet(app,filename):
     with open(filename,"r") as f:
         app.setStyleSheet(f.read())
 
+def parseArgs():
+    parser = argparse.ArgumentParser(description="Aircraft Calculator")
+    parser.add_argument("--startup-report",action="store_true",help="Print module import times and time to first window")
+    parser.add_argument("--no-preload",action="store_true",help="Don't import the graph screens in the background after startup")
+    args, qtArgs = parser.parse_known_args()
+    args.report = args.startup_report or bool(os.environ.get("FMC_STARTUP_REPORT"))
+    return args, qtArgs
+
+def firstWindowShown(args,controller):
+    StartupReport.markFirstWindow()
+    if args.report:
+        StartupReport.printReport()
+    if not args.no_preload:
+        controller.preload()
+
 if __name__ in "__main__":
     
-    app = QApplication([])
+    args, qtArgs = parseArgs()
+    
+    app = QApplication(sys.argv[:1] + qtArgs)
     
     load_stylesheet(app,"main.qss")
     
     # Create Navigation Controller, starting the program
+    NavigationController = StartupReport.timedImport("Navigation").NavigationController
     controller = NavigationController()
     controller.show()
     
-    sys.exit(app.exec_())
\ No newline at end of file
+    # Runs on the first event loop pass, after the window has been shown
+    QTimer.singleShot(0,lambda: firstWindowShown(args,controller))
+    
+    sys.exit(app.exec_())
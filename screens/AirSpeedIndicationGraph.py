@@ -1,31 +1,62 @@
-from PyQt5.QtWidgets import QWidget, QPushButton, QLabel, QHBoxLayout, QVBoxLayout, QLineEdit
-import json
-from PyQt5.QtCore import pyqtSignal
-from PyQt5.QtGui import QDoubleValidator
+from PyQt5.QtWidgets import QWidget, QPushButton, QLabel, QHBoxLayout, QVBoxLayout, QLineEdit, QComboBox
+from PyQt5.QtCore import pyqtSignal, QRectF
 import numpy as np
 import pyqtgraph as pg
-    
+from engine.AirSpeed import returnTASminusIAS, TASminusIASGrid
+from engine.CurveCache import curveCache, curveKey
+from engine.DiskCache import diskCache
+from PlotWorker import PlotWorker, failureText
+from Profiling import timed
+
 """
 Create a graph of the difference betweeen TAS and IAS speeds between altitudes
 
 This calculation is not plane dependent and is the same for every
+
+The family and heatmap modes evaluate every IAS against every altitude in one broadcast (engine.AirSpeed.TASminusIASGrid),
+hovering reads the nearest computed value back out of those arrays, nothing is recomputed while the mouse moves
 """
 
+defaultFamily = [100.0,150.0,200.0,250.0,300.0,350.0,400.0,450.0,500.0]
+
+def parseSpeeds(text):
+    speeds = []
+    for part in text.replace(";",",").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            value = float(part)
+        except ValueError:
+            raise ValueError(f"Not a speed: {part}")
+        if value <= 0:
+            raise ValueError(f"IAS must be positive: {part}")
+        speeds.append(value)
+    return speeds
+
 class AirSpeedIndicationGraph(QWidget):
-    
+
     finished = pyqtSignal()
-    def __init__(self,file):
+    def __init__(self,file,repository):
         super().__init__()
         self.file = file
+        self.repository = repository
+        self.repository.dataChanged.connect(self.onDataChanged)
+        self.worker = PlotWorker(self)
+        self.worker.resultReady.connect(self.drawDifference)
+        self.worker.failed.connect(self.plotFailed)
+        self.gridWorker = PlotWorker(self)
+        self.gridWorker.resultReady.connect(self.drawGrid)
+        self.gridWorker.failed.connect(self.plotFailed)
+        self.gridIAS = np.arange(100,501,5,dtype=float)
+        self.gridAlts = np.arange(0,40001,500,dtype=float)
+        # (alts, IAS list, TAS - IAS (nAlt, nIAS), TAS) of whatever is on screen, read by the hover readout
+        self.shown = None
         self.initUI()
-        
+
     def initUI(self):
-        try:
-            with open(self.file,"r") as f:
-                self.data = json.load(f)
-        except(FileNotFoundError,json.JSONDecodeError):
-            raise RuntimeError("Home file not found error")
-        
+        self.data = self.repository.get(self.file)
+
         self.main = QVBoxLayout()
         self.row1 = QHBoxLayout()
         self.row2 = QHBoxLayout()
@@ -36,79 +67,183 @@ class AirSpeedIndicationGraph(QWidget):
         pg.setConfigOption('background','w')
         pg.setConfigOption('foreground','k')
         self.plotWidget = pg.PlotWidget()
+        self.plotWidget.showGrid(x=True,y=True,alpha=0.3)
+        self.plotWidget.plotItem.addLegend()
         self.row2.addWidget(self.plotWidget)
-        
-        self.plot()
+
+        self.heatmap = pg.ImageItem()
+        self.heatmap.setLookupTable(pg.colormap.get("viridis").getLookupTable())
+        self.heatmapLevels = []
+        for level in [25,50,100,150,200,250,300]:
+            curve = pg.IsocurveItem(level=level,pen=pg.mkPen('w',width=1))
+            curve.setParentItem(self.heatmap)
+            self.heatmapLevels.append(curve)
+        self.hoverLine = pg.InfiniteLine(angle=90,pen=pg.mkPen((120,120,120),width=1))
+        self.hoverLine.setZValue(10)
+        self.plotWidget.scene().sigMouseMoved.connect(self.mouseMoved)
+
+        self.modeCombo = QComboBox()
+        self.modeCombo.addItems(["Single IAS","IAS Family","Heatmap"])
+        self.modeCombo.currentIndexChanged.connect(self.changeMode)
         self.inputTAS = QLineEdit()
-        self.inputTAS.setPlaceholderText("Enter TAS Speed...")
-        self.inputTAS.setValidator(QDoubleValidator())
+        self.inputTAS.setPlaceholderText("Enter IAS (kt)...")
+        self.inputTAS.returnPressed.connect(lambda: self.plot())
         self.plotAgain = QPushButton("Plot")
-        self.plotAgain.clicked.connect(self.plot)
-        
+        self.plotAgain.clicked.connect(lambda: self.plot())
+
+        self.row3.addWidget(self.modeCombo)
         self.row3.addWidget(self.inputTAS)
         self.row3.addWidget(self.plotAgain)
-        
+
+        self.readout = QLabel("")
+
         self.backButton = QPushButton("Go Back")
         self.backButton.clicked.connect(self.goBack)
         self.row4.addWidget(self.backButton)
-        
+
         self.main.addLayout(self.row1)
         self.main.addLayout(self.row2)
+        self.main.addWidget(self.readout)
         self.main.addLayout(self.row3)
         self.main.addLayout(self.row4)
-        
+        self.plot()
+
         self.setLayout(self.main)
-    
+
+    # ----- Aircraft file changed -----
+
+    def onDataChanged(self,path):
+        if self.repository.isSameFile(path,self.file):
+            self.data = self.repository.get(self.file)
+
     def goBack(self):
         self.finished.emit()
-        
+
     # ----- Calculating TAS and CAS differences -----
-        
-    def returnTPRho(self,hm):
-        
-        T0 = 288.15 #In Kelvin
-        L = 0.0064 #K/m lapse rate up to 11km
-        p0 = 101325 #In Pa
-        g0 = 9.80665 # gravity in m/s^2
-        R = 287.05287 #in J
-        
-        T = T0 - L*hm
-        p = p0 * (T/T0)**(g0/(R*L))
-        rho = p/(R*T)
-        return T,p,rho
-
-    def returnTASfromCASAlt(self,VIASkt,hft):
-        R = 287.05287 #in J
-        T0 = 288.15 #In Kelvin
-        p0 = 101325 #In Pa
-        gamma = 1.4
-        Vc = VIASkt * 0.514444
-        h = hft
-        a0 = (gamma*R*T0)**0.5
-        qc0 = p0 * ((1+(gamma-1)/2 * (Vc/a0)**2)**(gamma/(gamma-1))-1)
-        T,p,_ = self.returnTPRho(h)
-        M = ((2/(gamma-1)) * ((1+qc0/p)**((gamma-1)/gamma)-1))**0.5
-        a = (gamma*R*T)**0.5
-        VTAS = a*M
-        return VTAS/0.514444
 
+    # IAS is taken as CAS, engine.AirSpeed converts the whole altitude grid at once (Rayleigh pitot above Mach 1)
+    @timed("compute:airspeed")
     def returnTASminusIAS(self,VIASkt=120,hminft=0,hmaxft=40000,stepft=500):
-        alts = np.arange(hminft,hmaxft+stepft,stepft,dtype=float)
-        tas = np.array([self.returnTASfromCASAlt(VIASkt,h)for h in alts])
-        delta = tas-VIASkt
-        return alts,delta,tas
+        return returnTASminusIAS(VIASkt,hminft,hmaxft,stepft)
+
+    @timed("compute:airspeedGrid")
+    def computeGrid(self,speeds,alts):
+        delta, tas = TASminusIASGrid(speeds,alts)
+        return alts, speeds, delta, tas
 
     # ----- Plot the difference
 
+    def changeMode(self,index):
+        self.inputTAS.setPlaceholderText(["Enter IAS (kt)...","IAS list (kt), eg. 150, 250, 350...","Heatmap over 100-500 kt"][index])
+        self.inputTAS.setEnabled(index != 2)
+        self.plot()
+
+    @timed("prepare:airspeed")
     def plot(self,VIASKt=120,hminft=0,hmaxft=40000,stepft=500):
         try:
-            V = float(self.inputTAS.text())
-            alts,delta,tas = self.returnTASminusIAS(V,hminft,hmaxft,stepft)
-        except:
-            alts,delta,tas = self.returnTASminusIAS(VIASKt,hminft,hmaxft,stepft)
-        self.plotWidget.clear()
-        self.plotWidget.setLabel('left','TAS - IAS (kt)',color='k',size='14pt')
-        self.plotWidget.setLabel('bottom','Altitude (ft)',color='k',size='14pt')
-        self.plotWidget.showGrid(x=True,y=True,alpha=0.3)
-        self.plotWidget.plot(alts,delta,pen=pg.mkPen(width=2))
-        
\ No newline at end of file
+            speeds = parseSpeeds(self.inputTAS.text())
+        except ValueError as error:
+            self.readout.setText(str(error))
+            return
+        mode = self.modeCombo.currentIndex()
+        if mode == 1:
+            self.plotFamily(np.array(speeds or defaultFamily,dtype=float),np.arange(hminft,hmaxft+stepft,stepft,dtype=float))
+            return
+        if mode == 2:
+            self.plotGrid()
+            return
+        V = speeds[0] if speeds else VIASKt
+        # Not plane dependent, so the key only holds the IAS and altitude range
+        params = {"ias": V,"altitude": (hminft,hmaxft,stepft)}
+        key = curveKey("airspeed",None,params)
+        cached = curveCache.get(key)
+        if cached is not None:
+            self.worker.cancel()
+            self.drawDifference(cached)
+            return
+        self.worker.submit(lambda: curveCache.put(key,diskCache.loadOrCompute("airspeed",None,params,lambda: self.returnTASminusIAS(V,hminft,hmaxft,stepft))),lambda: self.returnTASminusIAS(V,hminft,hmaxft,stepft*4))
+
+    # A handful of curves is cheap enough to compute in place
+    def plotFamily(self,speeds,alts):
+        self.worker.cancel()
+        self.gridWorker.cancel()
+        params = {"ias": speeds,"altitude": alts}
+        self.drawFamily(curveCache.getOrCompute("airspeedGrid",None,params,lambda: self.computeGrid(speeds,alts)))
+
+    def plotGrid(self):
+        self.worker.cancel()
+        params = {"ias": self.gridIAS,"altitude": self.gridAlts}
+        key = curveKey("airspeedGrid",None,params)
+        cached = curveCache.get(key)
+        if cached is not None:
+            self.gridWorker.cancel()
+            self.drawGrid(cached)
+            return
+        self.gridWorker.submit(lambda: curveCache.put(key,diskCache.loadOrCompute("airspeedGrid",None,params,lambda: self.computeGrid(self.gridIAS,self.gridAlts))))
+
+    def resetPlot(self,bottom,left):
+        plotItem = self.plotWidget.plotItem
+        plotItem.clear()
+        plotItem.setLabel('left',left,color='k',size='14pt')
+        plotItem.setLabel('bottom',bottom,color='k',size='14pt')
+        plotItem.addItem(self.hoverLine,ignoreBounds=True)
+        self.hoverLine.setVisible(False)
+        return plotItem
+
+    @timed("render:airspeed")
+    def drawDifference(self,result,final=True):
+        if self.modeCombo.currentIndex() != 0:
+            return
+        alts,delta,tas = result
+        plotItem = self.resetPlot('Altitude (ft)','TAS - IAS (kt)')
+        plotItem.plot(alts,delta,pen=pg.mkPen(width=2))
+        VIASkt = float(tas[0] - delta[0])
+        self.shown = (alts,np.array([VIASkt]),delta[:,None],tas[:,None])
+        self.readout.setText("")
+
+    @timed("render:airspeedFamily")
+    def drawFamily(self,result):
+        alts, speeds, delta, tas = result
+        plotItem = self.resetPlot('Altitude (ft)','TAS - IAS (kt)')
+        for i, V in enumerate(speeds):
+            pen = pg.mkPen(pg.intColor(i,hues=len(speeds)),width=2)
+            plotItem.plot(alts,delta[:,i],pen=pen,name=f"{V:g} kt")
+        self.shown = (alts,speeds,delta,tas)
+        self.readout.setText("")
+
+    @timed("render:airspeedGrid")
+    def drawGrid(self,result,final=True):
+        if self.modeCombo.currentIndex() != 2:
+            return
+        alts, speeds, delta, tas = result
+        plotItem = self.resetPlot('IAS (kt)','Altitude (ft)')
+        # ImageItem is indexed [x, y], so the (altitude, IAS) grid is transposed
+        image = delta.T
+        self.heatmap.setImage(image,levels=(0.0,max(float(np.max(image)),1.0)))
+        self.heatmap.setRect(QRectF(speeds[0],alts[0],speeds[-1]-speeds[0],alts[-1]-alts[0]))
+        for curve in self.heatmapLevels:
+            curve.setData(image)
+        plotItem.addItem(self.heatmap)
+        self.shown = (alts,speeds,delta,tas)
+        self.readout.setText("Contours every 50 kt of TAS - IAS (25 kt first)")
+
+    def plotFailed(self,message):
+        self.readout.setText(f"Plot failed: {failureText(message)}")
+
+    # ----- Hover readout -----
+
+    def mouseMoved(self,pos):
+        if self.shown is None or not self.plotWidget.sceneBoundingRect().contains(pos):
+            return
+        point = self.plotWidget.plotItem.vb.mapSceneToView(pos)
+        alts, speeds, delta, tas = self.shown
+        if self.modeCombo.currentIndex() == 2:
+            i = int(np.argmin(np.abs(alts - point.y())))
+            j = int(np.argmin(np.abs(speeds - point.x())))
+            self.readout.setText(f"{alts[i]:.0f} ft, IAS {speeds[j]:g} kt: TAS {tas[i,j]:.1f} kt, TAS - IAS {delta[i,j]:.1f} kt")
+            return
+        i = int(np.argmin(np.abs(alts - point.x())))
+        self.hoverLine.setValue(alts[i])
+        self.hoverLine.setVisible(True)
+        values = ", ".join(f"{V:g} kt: TAS {tas[i,j]:.1f} ({delta[i,j]:+.1f})" for j, V in enumerate(speeds))
+        self.readout.setText(f"{alts[i]:.0f} ft   {values}")
@@ -1,7 +1,7 @@
 from PyQt5.QtWidgets import QWidget,  QLabel, QHBoxLayout, QVBoxLayout,QMessageBox, QLineEdit, QPushButton, QDialog, QComboBox, QCheckBox
 from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtGui import QDoubleValidator
-import json,os
+import os
 
 class CreateAircraft(QWidget):
     
@@ -13,9 +13,10 @@ class CreateAircraft(QWidget):
     
     finished = pyqtSignal(str)
     
-    def __init__(self, filePath = None):
+    def __init__(self, filePath = None, repository = None):
         super().__init__()
         self.filePath = filePath
+        self.repository = repository
         
         self.loadFiles()
         self.initUI()
@@ -31,15 +32,13 @@ class CreateAircraft(QWidget):
         self.fileName = "CustomDesignations.json"
         desPath = os.path.join(newFolder,self.fileName)
         try:
-            with open(desPath,"r") as f:
-                self.desData = json.load(f)
-        except(FileNotFoundError,json.JSONDecodeError):
+            self.desData = self.repository.get(desPath)
+        except RuntimeError:
             self.desData = {}
             
         try:
-            with open(self.filePath,"r") as f:
-                self.data = json.load(f)
-        except(FileNotFoundError,json.JSONDecodeError):
+            self.data = self.repository.get(self.filePath)
+        except RuntimeError:
             raise RuntimeError("Error File Not Found (CreateAircraft self.data)!")
         
     def initUI(self):
@@ -70,8 +69,7 @@ class CreateAircraft(QWidget):
         
         self.data["aircraft"]["name"] = self.aircraftName
         
-        with open(self.filePath, "w") as f:
-            json.dump(self.data,f,indent=4)
+        self.repository.save(self.filePath,self.data)
 
         self.setStats()
             
@@ -174,15 +172,20 @@ class CreateAircraft(QWidget):
 
         aircraftClass = self.combo.currentText()
         if aircraftClass == "Custom...":
-            popup = CreateClassPopup(self.data, self.filePath, self)
+            popup = CreateClassPopup(self.data, self.filePath, self.repository, self)
             if popup.exec() == QDialog.Rejected:
                 return
         else:
             stats["Designation"] = aircraftClass
 
+        # Tables aren't edited on this screen, keep the ones the file already has
+        previous = self.data["aircraft"].get("stats") or {}
+        for key in ("Lift Table","Aero Tables"):
+            if key in previous:
+                stats[key] = previous[key]
+
         self.data["aircraft"]["stats"] = stats
-        with open(self.filePath, "w") as f:
-            json.dump(self.data, f, indent=4)
+        self.repository.save(self.filePath, self.data)
 
         QMessageBox.information(self, "Saved", "Info saved")
         self.end()
@@ -210,10 +213,11 @@ Create Custom Class and add it to a file for future storage
 """
 
 class CreateClassPopup(QDialog):
-    def __init__(self,data,filePath,parent=None):
+    def __init__(self,data,filePath,repository,parent=None):
         super().__init__(parent)
         self.data = data
         self.filePath = filePath
+        self.repository = repository
         self.setWindowFlags(Qt.Dialog | Qt.FramelessWindowHint)
         self.setModal(True)
         self.main = QVBoxLayout()
@@ -242,8 +246,10 @@ class CreateClassPopup(QDialog):
         self.fileName = "CustomDesignations.json"
         desPath = os.path.join(newFolder,self.fileName)
         
-        with open(desPath,"r") as f:
-            self.desData = json.load(f)
+        try:
+            self.desData = self.repository.get(desPath)
+        except RuntimeError:
+            self.desData = {}
         
         if "designations" not in self.desData:
             self.desData["designations"] = {}
@@ -256,9 +262,7 @@ class CreateClassPopup(QDialog):
         self.desData["designations"][self.input.text().strip()] = {}
         self.data["aircraft"]["stats"]["designation"] = self.input.text().strip()
         
-        with open(self.filePath, "w") as f:
-            json.dump(self.data,f,indent=4)
-        with open(desPath,"w") as f:
-            json.dump(self.desData,f,indent=4)
+        self.repository.save(self.filePath,self.data)
+        self.repository.save(desPath,self.desData)
         QMessageBox.information(self,"Saved","Class Saved")
         self.accept()
\ No newline at end of file
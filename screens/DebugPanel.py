@@ -0,0 +1,83 @@
+from PyQt5.QtWidgets import QWidget, QPushButton, QLabel, QHBoxLayout, QVBoxLayout, QCheckBox, QTableWidget, QTableWidgetItem, QFileDialog, QHeaderView
+from PyQt5.QtCore import QTimer
+import Profiling
+from engine.CurveCache import curveCache
+from engine.DiskCache import diskCache
+
+class DebugPanel(QWidget):
+
+    """
+    Debug window showing recent stage timings and cache statistics
+
+    Opened with Ctrl+Shift+D, profiling can be switched on here as well as with FMC_PROFILE
+    """
+
+    def __init__(self,controller):
+        super().__init__()
+        self.controller = controller
+        self.setWindowTitle("Debug")
+        self.initUI()
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(1000)
+
+    def initUI(self):
+        self.main = QVBoxLayout()
+
+        row1 = QHBoxLayout()
+        self.enabledBox = QCheckBox("Profiling enabled")
+        self.enabledBox.setChecked(Profiling.enabled)
+        self.enabledBox.toggled.connect(Profiling.setEnabled)
+        self.clearButton = QPushButton("Clear")
+        self.clearButton.clicked.connect(self.clear)
+        self.exportButton = QPushButton("Export Trace")
+        self.exportButton.clicked.connect(self.exportTrace)
+        row1.addWidget(self.enabledBox)
+        row1.addWidget(self.clearButton)
+        row1.addWidget(self.exportButton)
+
+        self.table = QTableWidget(0,5)
+        self.table.setHorizontalHeaderLabels(["Stage","Count","Last (ms)","Mean (ms)","Max (ms)"])
+        self.table.horizontalHeader().setSectionResizeMode(0,QHeaderView.Stretch)
+
+        self.cacheLabel = QLabel()
+
+        self.main.addLayout(row1)
+        self.main.addWidget(self.table)
+        self.main.addWidget(self.cacheLabel)
+        self.setLayout(self.main)
+        self.resize(560,400)
+        self.refresh()
+
+    def refresh(self):
+        if not self.isVisible():
+            return
+        stats = Profiling.summary()
+        self.table.setRowCount(len(stats))
+        for row, name in enumerate(sorted(stats)):
+            entry = stats[name]
+            values = [name,str(entry["count"]),f"{entry['last'] * 1e3:.2f}",f"{entry['mean'] * 1e3:.2f}",f"{entry['max'] * 1e3:.2f}"]
+            for col, value in enumerate(values):
+                self.table.setItem(row,col,QTableWidgetItem(value))
+
+        cache = curveCache.statistics()
+        lookups = cache["hits"] + cache["misses"]
+        hitRate = 100 * cache["hits"] / lookups if lookups else 0
+        lines = [
+            f"Curve cache: {cache['entries']} entries, {cache['bytes'] / 1e6:.1f} / {cache['maxBytes'] / 1e6:.0f} MB, "
+            f"{cache['hits']} hits, {cache['misses']} misses ({hitRate:.0f}%)",
+            f"Disk cache: {diskCache.folder if diskCache.enabled else 'off'}",
+            f"Aircraft files parsed: {len(self.controller.repository.entries)}",
+            f"Screens alive: {', '.join(sorted(self.controller.screens))}",
+        ]
+        self.cacheLabel.setText("\n".join(lines))
+
+    def clear(self):
+        Profiling.clear()
+        self.refresh()
+
+    def exportTrace(self):
+        path, _ = QFileDialog.getSaveFileName(self,"Export Trace","trace.json","Chrome Trace (*.json)")
+        if path:
+            Profiling.exportChromeTrace(path)
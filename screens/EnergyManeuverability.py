@@ -0,0 +1,135 @@
+from PyQt5.QtWidgets import QWidget, QPushButton, QLabel, QHBoxLayout, QVBoxLayout, QComboBox
+from PyQt5.QtCore import pyqtSignal, QRectF
+import numpy as np
+import pyqtgraph as pg
+from engine.Energy import psGrid
+from engine.CurveCache import curveCache, curveKey
+from engine.DiskCache import diskCache
+from PlotWorker import PlotWorker, failureText
+from Profiling import timed
+
+"""
+Energy-maneuverability diagram, contours of specific excess power (Ps) over Mach and altitude
+
+The whole Mach x altitude x load factor grid is computed once, picking a load factor only swaps which slice is drawn
+
+Ps > 0 means the aircraft can still climb or accelerate at that load factor, Ps = 0 is the sustained limit
+"""
+
+class EnergyManeuverability(QWidget):
+    finished = pyqtSignal()
+    def __init__(self,file,repository):
+        super().__init__()
+        self.file = file
+        self.repository = repository
+        self.repository.dataChanged.connect(self.onDataChanged)
+        self.machVals = np.linspace(0.2,1.5,300)
+        self.alts = np.linspace(0,15000,300)
+        self.nVals = np.arange(1,10,dtype=float)
+        self.CD0 = 0.02
+        self.e = 0.8
+        self.levels = [-200,-100,-50,0,50,100,200]
+        self.ps = None
+        self.worker = PlotWorker(self)
+        self.worker.resultReady.connect(self.drawGrid)
+        self.worker.failed.connect(self.plotFailed)
+        self.initUI()
+
+    def initUI(self):
+        self.data = self.repository.get(self.file)
+
+        self.main = QVBoxLayout()
+        self.row1 = QHBoxLayout()
+        self.row2 = QHBoxLayout()
+        self.row3 = QHBoxLayout()
+        self.row4 = QHBoxLayout()
+        self.title = QLabel("Specific Excess Power")
+        self.row1.addWidget(self.title)
+        pg.setConfigOption('background','w')
+        pg.setConfigOption('foreground','k')
+        self.plotWidget = pg.PlotWidget(title="Ps (m/s)")
+        self.plotWidget.plotItem.setLabel("bottom","Mach",units="")
+        self.plotWidget.plotItem.setLabel("left","Altitude",units="m")
+        self.image = pg.ImageItem()
+        self.image.setLookupTable(pg.colormap.get("viridis").getLookupTable())
+        self.plotWidget.addItem(self.image)
+        self.isocurves = []
+        for level in self.levels:
+            pen = pg.mkPen('k',width=2) if level == 0 else pg.mkPen('w',width=1)
+            curve = pg.IsocurveItem(level=level,pen=pen)
+            curve.setParentItem(self.image)
+            self.isocurves.append(curve)
+        self.row2.addWidget(self.plotWidget)
+
+        self.nLabel = QLabel("Load Factor:")
+        self.nCombo = QComboBox()
+        self.nCombo.addItems([f"{n:g} g" for n in self.nVals])
+        self.nCombo.currentIndexChanged.connect(self.showLoadFactor)
+        self.row3.addWidget(self.nLabel)
+        self.row3.addWidget(self.nCombo)
+        self.status = QLabel("")
+        self.status.setWordWrap(True)
+        self.row3.addWidget(self.status)
+
+        self.backButton = QPushButton("Go Back")
+        self.backButton.clicked.connect(self.goBack)
+        self.row4.addWidget(self.backButton)
+
+        self.main.addLayout(self.row1)
+        self.main.addLayout(self.row2)
+        self.main.addLayout(self.row3)
+        self.main.addLayout(self.row4)
+
+        self.setLayout(self.main)
+        self.plot()
+
+    # ----- Compute the full grid once -----
+
+    @timed("prepare:energy")
+    def plot(self):
+        model = self.repository.model(self.file)
+        params = {"mach": self.machVals,"altitude": self.alts,"n": self.nVals,"CD0": self.CD0,"e": self.e}
+        key = curveKey("energy",model.stats(),params)
+        cached = curveCache.get(key)
+        if cached is not None:
+            self.worker.cancel()
+            self.drawGrid(cached)
+            return
+        self.worker.submit(lambda: curveCache.put(key,diskCache.loadOrCompute("energy",self.file,params,lambda: self.computeGrid(model,self.machVals,self.alts),model.sources())),lambda: self.computeGrid(model,self.machVals[::5],self.alts[::5]))
+
+    @timed("compute:energy")
+    def computeGrid(self,model,machVals,alts):
+        ps = psGrid(machVals,alts,self.nVals,model.wingArea,model.wingSpan,model.weight,model.thrust,CD0=self.CD0,e=self.e,aero=model.aero)
+        return machVals, alts, ps
+
+    def drawGrid(self,result,final=True):
+        self.gridMach, self.gridAlts, self.ps = result
+        if final:
+            self.status.setText("")
+        self.showLoadFactor(self.nCombo.currentIndex())
+
+    def plotFailed(self,message):
+        self.status.setText(f"Plot failed: {failureText(message)}")
+
+    @timed("render:energy")
+    def showLoadFactor(self,index):
+        if self.ps is None:
+            return
+        # ImageItem is indexed [x, y], so the (altitude, Mach) slice is transposed
+        ps = self.ps[index].T
+        self.image.setImage(ps,levels=(float(np.min(ps)),float(np.max(ps))))
+        self.image.setRect(QRectF(self.gridMach[0],self.gridAlts[0],self.gridMach[-1]-self.gridMach[0],self.gridAlts[-1]-self.gridAlts[0]))
+        for curve in self.isocurves:
+            curve.setData(ps)
+
+    # ----- Aircraft file changed -----
+
+    def onDataChanged(self,path):
+        if self.repository.isSameFile(path,self.file):
+            self.data = self.repository.get(self.file)
+            self.plot()
+
+    # ----- Go back to Home -----
+
+    def goBack(self):
+        self.finished.emit()
@@ -0,0 +1,182 @@
+from PyQt5.QtWidgets import QWidget, QPushButton, QLabel, QHBoxLayout, QVBoxLayout, QLineEdit, QListWidget, QListWidgetItem
+from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtGui import QDoubleValidator
+import os
+import numpy as np
+import pyqtgraph as pg
+from engine.Fleet import stackFleet, concatFleets, fleetTurnCurves, fleetThrustCurves
+from engine.FleetFile import FleetFile
+from PlotWorker import PlotWorker, failureText
+from Profiling import timed
+
+"""
+Compare the turn and thrust curves of many aircraft files on the same plots
+
+All aircraft are stacked into arrays and computed in one batched pass, unticking an aircraft in the list only hides its curves
+
+Packed fleet files (.fmcf) are read straight from their columns, every aircraft in them is added
+"""
+
+class FleetComparison(QWidget):
+    finished = pyqtSignal()
+    def __init__(self,files,repository):
+        super().__init__()
+        self.files = list(files)
+        self.repository = repository
+        self.repository.dataChanged.connect(self.onDataChanged)
+        self.machVals = np.linspace(0.2,1.5,100)
+        self.VArray = np.linspace(10,400,300)
+        self.curves = []
+        self.worker = PlotWorker(self)
+        self.worker.resultReady.connect(self.drawFleet)
+        self.worker.failed.connect(self.plotFailed)
+        self.initUI()
+
+    def initUI(self):
+        self.main = QVBoxLayout()
+        self.row1 = QHBoxLayout()
+        self.row2 = QHBoxLayout()
+        self.row3 = QHBoxLayout()
+        self.row4 = QHBoxLayout()
+        self.title = QLabel(f"Fleet Comparison ({len(self.files)} aircraft)")
+        self.row1.addWidget(self.title)
+        pg.setConfigOption('background','w')
+        pg.setConfigOption('foreground','k')
+        self.plotTurn = pg.PlotWidget(title="Sustained Turn Rate")
+        self.plotTurn.plotItem.setLabel("bottom","Mach",units="")
+        self.plotTurn.plotItem.setLabel("left","Turn Rate",units="deg/s")
+        self.plotTurn.plotItem.addLegend()
+        self.plotThrust = pg.PlotWidget(title="Thrust Required")
+        self.plotThrust.plotItem.setLabel("bottom","Speed",units="m/s")
+        self.plotThrust.plotItem.setLabel("left","Thrust",units="N")
+        self.aircraftList = QListWidget()
+        self.aircraftList.setMaximumWidth(180)
+        self.aircraftList.itemChanged.connect(self.toggleAircraft)
+        self.row2.addWidget(self.plotTurn)
+        self.row2.addWidget(self.plotThrust)
+        self.row2.addWidget(self.aircraftList)
+
+        self.inputAlt = QLineEdit()
+        self.inputAlt.setPlaceholderText("Enter Altitude (m)...")
+        self.inputAlt.setValidator(QDoubleValidator())
+        self.plotAgain = QPushButton("Plot")
+        self.plotAgain.clicked.connect(lambda: self.plot())
+        self.status = QLabel("")
+        self.status.setWordWrap(True)
+        self.row3.addWidget(self.inputAlt)
+        self.row3.addWidget(self.plotAgain)
+        self.row3.addWidget(self.status)
+
+        self.backButton = QPushButton("Go Back")
+        self.backButton.clicked.connect(self.goBack)
+        self.row4.addWidget(self.backButton)
+
+        self.main.addLayout(self.row1)
+        self.main.addLayout(self.row2)
+        self.main.addLayout(self.row3)
+        self.main.addLayout(self.row4)
+        self.setLayout(self.main)
+        self.plot()
+
+    # ----- Batched computation -----
+
+    @timed("prepare:fleet")
+    def plot(self):
+        # Text still being typed ("-", "1e") plots at the default altitude
+        try:
+            altM = float(self.inputAlt.text().strip())
+        except ValueError:
+            altM = 1000.0
+        datas = []
+        packed = []
+        self.loaded = []
+        folders = []
+        skipped = []
+        for file in self.files:
+            if file.endswith(".fmcf"):
+                continue
+            # Built through the repository first, files without complete or numeric stats are left out instead of failing the fleet
+            try:
+                data = self.repository.get(file)
+                self.repository.model(file)
+            except (RuntimeError,ValueError) as error:
+                skipped.append(f"{os.path.basename(file)} ({error})")
+                continue
+            except (KeyError,TypeError):
+                skipped.append(f"{os.path.basename(file)} (no stats)")
+                continue
+            datas.append(data)
+            folders.append(os.path.dirname(os.path.abspath(file)))
+            self.loaded.append(os.path.basename(file))
+        for file in self.files:
+            if not file.endswith(".fmcf"):
+                continue
+            try:
+                fleetFile = FleetFile(file)
+                packed.append(fleetFile.fleet())
+            except (OSError,RuntimeError) as error:
+                skipped.append(f"{os.path.basename(file)} ({error})")
+                continue
+            self.loaded += [fleetFile.source(i) or os.path.basename(file) for i in range(len(fleetFile))]
+        self.status.setText(f"Skipped {len(skipped)}: " + ", ".join(skipped) if skipped else "")
+        fleet = concatFleets([stackFleet(datas,folders)] + packed)
+        self.worker.submit(lambda: self.computeFleet(fleet,altM))
+
+    @timed("compute:fleet")
+    def computeFleet(self,fleet,altM):
+        turnInstant, turnSustained = fleetTurnCurves(fleet,self.machVals,altM)
+        TReq, TAvail, maxLevelSpeed = fleetThrustCurves(fleet,self.VArray,altM)
+        return fleet["names"], turnSustained, TReq, TAvail
+
+    @timed("render:fleet")
+    def drawFleet(self,result,final=True):
+        names, turnSustained, TReq, TAvail = result
+        hidden = {self.aircraftList.item(i).data(Qt.UserRole) for i in range(self.aircraftList.count())
+                  if self.aircraftList.item(i).checkState() == Qt.Unchecked}
+
+        self.title.setText(f"Fleet Comparison ({len(names)} aircraft)")
+        self.plotTurn.plotItem.clear()
+        self.plotThrust.plotItem.clear()
+        self.aircraftList.blockSignals(True)
+        self.aircraftList.clear()
+        self.curves = []
+        for i, name in enumerate(names):
+            color = pg.intColor(i,hues=max(len(names),1))
+            label = f"{name} ({self.loaded[i]})"
+            turn = self.plotTurn.plotItem.plot(self.machVals,turnSustained[i],pen=pg.mkPen(color,width=2),name=label)
+            thrust = self.plotThrust.plotItem.plot(self.VArray,TReq[i],pen=pg.mkPen(color,width=2))
+            available = self.plotThrust.plotItem.plot(self.VArray,TAvail[i],pen=pg.mkPen(color,width=1,style=Qt.DashLine))
+            self.curves.append((turn,thrust,available))
+
+            item = QListWidgetItem(label)
+            item.setData(Qt.UserRole,i)
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(Qt.Unchecked if i in hidden else Qt.Checked)
+            item.setForeground(pg.mkColor(color))
+            self.aircraftList.addItem(item)
+            for curve in self.curves[i]:
+                curve.setVisible(i not in hidden)
+        self.aircraftList.blockSignals(False)
+
+    # Kept after any skipped files, those are still worth knowing about
+    def plotFailed(self,message):
+        skipped = self.status.text()
+        self.status.setText(f"{skipped} (plot failed: {failureText(message)})" if skipped else f"Plot failed: {failureText(message)}")
+
+    def toggleAircraft(self,item):
+        i = item.data(Qt.UserRole)
+        if i is None or i >= len(self.curves):
+            return
+        for curve in self.curves[i]:
+            curve.setVisible(item.checkState() == Qt.Checked)
+
+    # ----- Aircraft file changed -----
+
+    def onDataChanged(self,path):
+        if any(self.repository.isSameFile(path,file) for file in self.files):
+            self.plot()
+
+    # ----- Go back -----
+
+    def goBack(self):
+        self.finished.emit()
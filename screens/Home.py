@@ -1,5 +1,4 @@
 from PyQt5.QtWidgets import QDialog, QWidget, QPushButton, QLabel, QHBoxLayout, QVBoxLayout, QFileDialog, QStackedWidget, QLineEdit
-import json
 from PyQt5.QtCore import Qt, pyqtSignal
 
 class Home(QWidget):
@@ -14,18 +13,17 @@ class Home(QWidget):
     createGraphSignal = pyqtSignal(str)
     createAirSpeed = pyqtSignal(str)
     createThrust = pyqtSignal(str)
+    createEnergy = pyqtSignal(str)
     def __init__(self,controller,file):
         super().__init__()
         self.controller = controller
+        self.repository = controller.repository
+        self.repository.dataChanged.connect(self.onDataChanged)
         self.file = file
         self.initUI()
         
     def initUI(self):
-        try:
-            with open(self.file,"r") as f:
-                self.data = json.load(f)
-        except(FileNotFoundError,json.JSONDecodeError):
-            raise RuntimeError("Home file not found error")
+        self.data = self.repository.get(self.file)
         
         self.main = QVBoxLayout()
         self.setLayout(self.main)
@@ -39,12 +37,17 @@ class Home(QWidget):
         row4 = QHBoxLayout()
         self.button3 = QPushButton("Graph Thrust")
         self.button3.clicked.connect(self.emitThrust)
+        row5 = QHBoxLayout()
+        self.button4 = QPushButton("Graph Energy")
+        self.button4.clicked.connect(self.emitEnergy)
         row2.addWidget(self.button)
         row3.addWidget(self.button2)
         row4.addWidget(self.button3)
+        row5.addWidget(self.button4)
         self.main.addLayout(row2)
         self.main.addLayout(row3)
         self.main.addLayout(row4)
+        self.main.addLayout(row5)
         
     # ----- Emissions -----
         
@@ -54,6 +57,16 @@ class Home(QWidget):
         self.createAirSpeed.emit(self.file)
     def emitThrust(self):
         self.createThrust.emit(self.file)
+    def emitEnergy(self):
+        self.createEnergy.emit(self.file)
+        
+    # ----- Aircraft file changed -----
+    
+    def onDataChanged(self,path):
+        if self.repository.isSameFile(path,self.file):
+            self.data = self.repository.get(self.file)
+            self.label.setText(f"Aircraft: {self.data['aircraft'].get('name')}")
+            self.label2.setText(f"Designation: {self.data['aircraft'].get('stats',{}).get('Designation','None')}")
         
     # ----- Start Populating Screen 
         
@@ -83,9 +96,8 @@ class Home(QWidget):
     # ----- Create popups and read results -----
     
     def editNameClick(self):
-        popup = EditCharacterNamePopup(self.data,self.file,self)
-        if popup.exec() == QDialog.Accepted:
-            self.label.setText(f"Aircraft: {self.data["aircraft"]["name"]}")
+        popup = EditCharacterNamePopup(self.data,self.file,self.repository,self)
+        popup.exec()
 
 """
 Edit button popup if the user wants to change their character's name
@@ -93,11 +105,12 @@ Edit button popup if the user wants to change their character's name
 """
 
 class EditCharacterNamePopup(QDialog):
-    def __init__(self,data,file,parent=None):
+    def __init__(self,data,file,repository,parent=None):
         super().__init__(parent)
         self.setWindowFlags(Qt.Dialog | Qt.FramelessWindowHint)
         self.data = data
         self.file = file
+        self.repository = repository
         self.setModal(True)
         
         layout = QVBoxLayout()
@@ -121,6 +134,5 @@ class EditCharacterNamePopup(QDialog):
     
     def changeCharacterName(self,name=None):
         self.data["aircraft"]["name"] = name
-        with open(self.file, "w") as f:
-            json.dump(self.data,f,indent=4)
+        self.repository.save(self.file,self.data)
         self.accept()
\ No newline at end of file
@@ -1,6 +1,7 @@
-from PyQt5.QtWidgets import QWidget, QPushButton, QLabel, QHBoxLayout, QVBoxLayout, QFileDialog, QMessageBox, QLineEdit, QDialog
+from PyQt5.QtWidgets import QWidget, QPushButton, QLabel, QHBoxLayout, QVBoxLayout, QFileDialog, QMessageBox, QLineEdit, QDialog, QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView
 from PyQt5.QtCore import pyqtSignal, Qt
-import json, os
+from PlotWorker import PlotWorker, failureText
+import os, time
 
 class SelectScreen(QWidget):
     
@@ -8,14 +9,37 @@ class SelectScreen(QWidget):
     First screen for the aircraft data application
     
     Handles either the creation of a new .json file, or loading of an existing .json file
+    
+    The library list below the buttons searches and sorts the aircraft in the library folders (indexed by Library),
+    double clicking a row opens that file
     """
     
+    # Header text: (Library column, format for the cell)
+    libraryColumns = {
+        "Name": ("name",lambda v: v or ""),
+        "Designation": ("designation",lambda v: v or ""),
+        "Weight (kN)": ("weight",lambda v: f"{v / 1000:.1f}"),
+        "Thrust (kN)": ("thrust",lambda v: f"{v / 1000:.1f}"),
+        "T/W": ("thrustToWeight",lambda v: f"{v:.2f}"),
+        "CL Max": ("CLMax",lambda v: f"{v:.2f}"),
+        "Modified": ("mtime",lambda v: time.strftime("%Y-%m-%d %H:%M",time.localtime(v / 1e9))),
+    }
+    libraryLimit = 500
+    
     fileSelected = pyqtSignal(str)
     createAircraft = pyqtSignal(str)
+    compareFiles = pyqtSignal(list)
     def __init__(self, controller):
         super().__init__()
         self.controller = controller
+        self.library = controller.library
+        self.sortColumn = "name"
+        self.sortDescending = False
+        self.scanWorker = PlotWorker(self)
+        self.scanWorker.resultReady.connect(self.scanFinished)
+        self.scanWorker.failed.connect(self.scanFailed)
         self.initUI()
+        self.rescanLibrary()
         
     def initUI(self):
         self.createProfile = QPushButton("Create")
@@ -25,17 +49,114 @@ class SelectScreen(QWidget):
         self.uploadProfile = QPushButton("Upload")
         self.uploadProfile.clicked.connect(self.openFileDialog)
         
-        self.master = QHBoxLayout()  
+        self.compareProfiles = QPushButton("Compare")
+        self.compareProfiles.clicked.connect(self.openCompareDialog)
+        
+        self.master = QVBoxLayout()
+        buttons = QHBoxLayout()
         col1 = QVBoxLayout()
         col2 = QVBoxLayout()
+        col3 = QVBoxLayout()
         col1.addWidget(self.createProfile)
         col2.addWidget(self.uploadProfile)
+        col3.addWidget(self.compareProfiles)
+        
+        buttons.addLayout(col1, 33)
+        buttons.addLayout(col2, 33)
+        buttons.addLayout(col3, 33)
+        self.master.addLayout(buttons)
+        
+        # ----- Library -----
+        
+        libraryRow = QHBoxLayout()
+        self.searchInput = QLineEdit()
+        self.searchInput.setPlaceholderText("Search library (name, designation, file)...")
+        self.searchInput.textChanged.connect(self.refreshLibrary)
+        self.addFolderButton = QPushButton("Add Folder")
+        self.addFolderButton.clicked.connect(self.addLibraryFolder)
+        self.rescanButton = QPushButton("Rescan")
+        self.rescanButton.clicked.connect(self.rescanLibrary)
+        libraryRow.addWidget(self.searchInput)
+        libraryRow.addWidget(self.addFolderButton)
+        libraryRow.addWidget(self.rescanButton)
         
-        self.master.addLayout(col1, 50)
-        self.master.addLayout(col2, 50)
+        self.libraryTable = QTableWidget(0,len(self.libraryColumns))
+        self.libraryTable.setHorizontalHeaderLabels(list(self.libraryColumns))
+        self.libraryTable.horizontalHeader().setSectionResizeMode(0,QHeaderView.Stretch)
+        self.libraryTable.horizontalHeader().sectionClicked.connect(self.sortLibrary)
+        self.libraryTable.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.libraryTable.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.libraryTable.verticalHeader().setVisible(False)
+        self.libraryTable.cellDoubleClicked.connect(self.openLibraryRow)
+        self.libraryStatus = QLabel("")
+        
+        self.master.addLayout(libraryRow)
+        self.master.addWidget(self.libraryTable)
+        self.master.addWidget(self.libraryStatus)
         
         self.setLayout(self.master)
     
+    # ----- Library Branch -----
+    
+    def addLibraryFolder(self):
+        folder = QFileDialog.getExistingDirectory(self,"Add Library Folder")
+        if folder:
+            self.library.addFolder(folder)
+            self.rescanLibrary()
+    
+    # Only files whose mtime or size changed are parsed, on the thread pool so a large first scan doesn't block the window
+    def rescanLibrary(self):
+        self.libraryStatus.setText("Scanning library...")
+        self.scanWorker.submit(self.library.scan)
+    
+    def scanFinished(self,counts,final=True):
+        self.refreshLibrary()
+        changed = counts["added"] + counts["updated"] + counts["removed"]
+        if changed:
+            self.libraryStatus.setText(f"{self.libraryStatus.text()} ({counts['added']} added, {counts['updated']} updated, {counts['removed']} removed)")
+    
+    # Whatever was indexed before the error is still listed, the message is the exception line of the traceback
+    def scanFailed(self,message):
+        self.refreshLibrary()
+        self.libraryStatus.setText(f"{self.libraryStatus.text()} (scan failed: {failureText(message)})")
+    
+    def refreshLibrary(self,*args):
+        text = self.searchInput.text()
+        rows = self.library.search(text,self.sortColumn,self.sortDescending,self.libraryLimit)
+        self.libraryTable.setUpdatesEnabled(False)
+        self.libraryTable.setRowCount(len(rows))
+        for r, row in enumerate(rows):
+            path, values = row[0], dict(zip(self.library.columns,row[1:]))
+            for c, (column, fmt) in enumerate(self.libraryColumns.values()):
+                value = values[column]
+                item = QTableWidgetItem("" if value is None else fmt(value))
+                item.setData(Qt.UserRole,path)
+                item.setToolTip(path)
+                self.libraryTable.setItem(r,c,item)
+        self.libraryTable.setUpdatesEnabled(True)
+        
+        total = self.library.count(text)
+        folders = len(self.library.folders())
+        if not folders:
+            self.libraryStatus.setText("No library folders yet, use Add Folder")
+        elif total > len(rows):
+            self.libraryStatus.setText(f"Showing {len(rows)} of {total} aircraft")
+        else:
+            self.libraryStatus.setText(f"{total} aircraft in {folders} folder{'s' if folders != 1 else ''}")
+    
+    def sortLibrary(self,index):
+        column = list(self.libraryColumns.values())[index][0]
+        self.sortDescending = not self.sortDescending if column == self.sortColumn else False
+        self.sortColumn = column
+        self.libraryTable.horizontalHeader().setSortIndicator(index,Qt.DescendingOrder if self.sortDescending else Qt.AscendingOrder)
+        self.libraryTable.horizontalHeader().setSortIndicatorShown(True)
+        self.refreshLibrary()
+    
+    def openLibraryRow(self,row,column):
+        item = self.libraryTable.item(row,column)
+        if item is not None:
+            self.fileSelected.emit(item.data(Qt.UserRole))
+    
     # ----- Open File Branch -----    
     
     def openFileDialog(self):
@@ -50,6 +171,16 @@ class SelectScreen(QWidget):
         else:
             raise RuntimeError("ERROR!")
     
+    def openCompareDialog(self):
+        filePaths, _ = QFileDialog.getOpenFileNames(
+            self,
+            "Open Files To Compare",
+            "",
+            "Aircraft Files (*.json *.fmcf)"
+        )
+        if filePaths:
+            self.compareFiles.emit(filePaths)
+    
     def selectFolder(self):
         self.folder = QFileDialog.getExistingDirectory(self,"Select Folder")
         if self.folder:
@@ -60,6 +191,7 @@ class SelectScreen(QWidget):
     # ----- Create File Branch -----
             
     def saveFile(self): 
+        self.scanWorker.cancel()
         self.clearLayout(self.master)
         row1 = QHBoxLayout()
         self.label = QLabel()
@@ -84,9 +216,8 @@ class SelectScreen(QWidget):
         # ----- Filling .json with major sections for later -----
         
         try:
-            with open(self.filePath,"r") as f:
-                self.data = json.load(f)
-        except(FileNotFoundError,json.JSONDecodeError):
+            self.data = self.controller.repository.get(self.filePath)
+        except RuntimeError:
             self.data = {}
             
         if "aircraft" not in self.data:
@@ -98,8 +229,7 @@ class SelectScreen(QWidget):
         #for detail in aircraftDetails:
         #    self.data["aircraft"]["stats"][detail] = 0.0
         
-        with open(self.filePath, "w") as f:
-            json.dump(self.data,f,indent=4)
+        self.controller.repository.save(self.filePath,self.data)
         QMessageBox.information(self,"Success",f"File created at:\n{self.filePath}")
         self.askCreateStats()
         
@@ -1,24 +1,42 @@
 from PyQt5.QtWidgets import QWidget, QPushButton, QLabel, QHBoxLayout, QVBoxLayout, QLineEdit
-import json
 from PyQt5.QtCore import pyqtSignal
 from PyQt5.QtGui import QDoubleValidator
-import math
 import numpy as np
 import pyqtgraph as pg
+from engine.Thrust import thrustCurves, levelSpeeds
+from engine.Envelope import flightEnvelope, serviceClimbRate
+from engine.Atmosphere import atmosphere
+from engine.CurveCache import curveCache, curveKey
+from engine.DiskCache import diskCache
+from PlotWorker import PlotWorker, failureText
+from screens.WhatIfPanel import WhatIfPanel
+from Profiling import timed
+
+"""
+Thrust required and available at one altitude, next to the level flight envelope over every altitude
+
+The envelope is bounded by the stall speed (CL Max) and thrust = drag, the ceilings are where the best climb rate
+drops to 100 ft/min (service) and to zero (absolute)
+"""
 
 class ThrustGraph(QWidget):
     finished = pyqtSignal()
-    def __init__(self,file):
+    def __init__(self,file,repository):
         super().__init__()
         self.file = file
+        self.repository = repository
+        self.repository.dataChanged.connect(self.onDataChanged)
+        self.worker = PlotWorker(self)
+        self.worker.resultReady.connect(self.drawThrust)
+        self.worker.failed.connect(self.plotFailed)
+        self.envelopeWorker = PlotWorker(self)
+        self.envelopeWorker.resultReady.connect(self.drawEnvelope)
+        self.envelopeWorker.failed.connect(self.plotFailed)
+        self.envelopeAlts = np.arange(0,25001,100,dtype=float)
         self.initUI()
         
     def initUI(self):
-        try:
-            with open(self.file,"r") as f:
-                self.data = json.load(f)
-        except(FileNotFoundError,json.JSONDecodeError):
-            raise RuntimeError("Home file not found error")
+        self.data = self.repository.get(self.file)
         
         self.main = QVBoxLayout()
         self.row1 = QHBoxLayout()
@@ -30,17 +48,55 @@ class ThrustGraph(QWidget):
         pg.setConfigOption('background','w')
         pg.setConfigOption('foreground','k')
         self.plotWidget = pg.PlotWidget()
+        self.envelopeWidget = pg.PlotWidget(title="Flight Envelope")
         self.row2.addWidget(self.plotWidget)
+        self.row2.addWidget(self.envelopeWidget)
+        
+        # Curves are created once and updated in place with setData
+        plotItem = self.plotWidget.plotItem
+        plotItem.setLabel("bottom","Speed",units="m/s")
+        plotItem.setLabel("left","Thrust",units="N")
+        plotItem.addLegend()
+        self.requiredItem = plotItem.plot(pen=pg.mkPen('r',width=2),name="Thrust Required (D)")
+        self.availableItem = plotItem.plot(pen=pg.mkPen('b',width=2,style=pg.QtCore.Qt.DashLine),name="Thrust Available")
+        self.speedsItem = pg.ScatterPlotItem(symbol='o',size=8,brush='k')
+        plotItem.addItem(self.speedsItem)
+        self.speedTexts = {}
+        for name, anchor in [("VMin",(1,1)),("VMinDrag",(0.5,0)),("VMax",(0,1))]:
+            self.speedTexts[name] = pg.TextItem(anchor=anchor)
+            plotItem.addItem(self.speedTexts[name])
+        
+        envelopeItem = self.envelopeWidget.plotItem
+        envelopeItem.setLabel("bottom","Speed",units="m/s")
+        envelopeItem.setLabel("left","Altitude",units="m")
+        envelopeItem.addLegend()
+        self.minSpeedItem = envelopeItem.plot(pen=pg.mkPen('r',width=2),name="Min Level Speed")
+        self.maxSpeedItem = envelopeItem.plot(pen=pg.mkPen('b',width=2),name="Max Level Speed")
+        self.stallItem = envelopeItem.plot(pen=pg.mkPen('k',width=1,style=pg.QtCore.Qt.DashLine),name="Stall Speed")
+        self.altitudeLine = pg.InfiniteLine(angle=0,pen=pg.mkPen('g',width=1))
+        self.serviceLine = pg.InfiniteLine(angle=0,pen=pg.mkPen('m',width=1,style=pg.QtCore.Qt.DotLine),label="Service Ceiling",labelOpts={"position": 0.85,"color": 'm'})
+        self.absoluteLine = pg.InfiniteLine(angle=0,pen=pg.mkPen('m',width=1),label="Absolute Ceiling",labelOpts={"position": 0.85,"color": 'm'})
+        for line in [self.altitudeLine,self.serviceLine,self.absoluteLine]:
+            envelopeItem.addItem(line)
+        
+        # The g-limit does not enter the thrust curves or the envelope
+        self.whatIf = WhatIfPanel(["altitude","weight","thrust","CLMax"])
+        self.whatIf.changed.connect(self.whatIfChanged)
         
-        self.convertSI()
-        self.inputTAS = QLineEdit()
-        self.inputTAS.setPlaceholderText("Enter TAS Speed...")
-        self.inputTAS.setValidator(QDoubleValidator())
+        self.inputAlt = QLineEdit()
+        self.inputAlt.setPlaceholderText("Enter Altitude (m)...")
+        self.inputAlt.setValidator(QDoubleValidator())
         self.plotAgain = QPushButton("Plot")
-        #self.plotAgain.clicked.connect(self.plot)
+        self.plotAgain.clicked.connect(lambda: self.inducedDrag())
+        self.ceilingLabel = QLabel("")
+        self.status = QLabel("")
+        self.status.setWordWrap(True)
         
-        self.row3.addWidget(self.inputTAS)
+        self.row3.addWidget(self.inputAlt)
         self.row3.addWidget(self.plotAgain)
+        self.row3.addWidget(self.ceilingLabel)
+        
+        self.loadModel()
         
         self.backButton = QPushButton("Go Back")
         self.backButton.clicked.connect(self.goBack)
@@ -48,116 +104,162 @@ class ThrustGraph(QWidget):
         
         self.main.addLayout(self.row1)
         self.main.addLayout(self.row2)
+        self.main.addWidget(self.whatIf)
         self.main.addLayout(self.row3)
+        self.main.addWidget(self.status)
         self.main.addLayout(self.row4)
         
         self.setLayout(self.main)
     
+    # ----- Aircraft file changed -----
+
+    def onDataChanged(self,path):
+        if self.repository.isSameFile(path,self.file):
+            self.data = self.repository.get(self.file)
+            self.loadModel()
+
     def goBack(self):
         self.finished.emit()
     
     
-    def convertSI(self):
-        pref = self.data["aircraft"]["stats"]
-        self.wingArea = pref["Wing Area"]["value"]
-        
-        if pref["Wing Area"]["unit"] == "ft\u00b2":
-            self.wingArea = self.wingArea * 0.092903
-        
-        self.wingSpan = pref["Wing Span"]["value"]
-        
-        if pref["Wing Span"]["unit"] == "ft":
-            self.wingSpan = self.wingSpan * 0.3048
-        
-        self.weight = pref["Weight"]["value"]
-        conversions = {
-            "kg":9.80665,
-            "t":1000 * 9.80665,
-            "lb":4.448,
-        }
-        factor = conversions.get(pref["Weight"]["unit"],1)
-        self.weight =self.weight * factor
-        
-        self.thrust = pref["Thrust"]["value"]
-        conversions = {
-            "lbf": 4.44822,
-            "kgf": 9.80665,
-            "kN": 1000,
-        }
-        factor = conversions.get(pref["Thrust"]["unit"],1)
-        self.thrust = self.thrust * factor
+    @timed("convert:thrust")
+    def loadModel(self):
+        self.model = self.repository.model(self.file)
+        self.CD0 = 0.012
         self.e = 0.8
         self.inducedDrag()
         
+    def thrustInputs(self):
+        _, altM = self.rhoFromUserAlt()
+        model = self.whatIf.apply(self.model)
+        args = (model.wingArea,model.wingSpan,model.weight,model.thrust,altM)
+        params = {"altitude": altM,"speed": ("auto",300),"CD0": self.CD0,"e": self.e,"whatIf": self.whatIf.scales()}
+        return model, args, params
+        
+    @timed("prepare:thrust")
     def inducedDrag(self):
-        AR = self.wingSpan**2/self.wingArea
-        VArray = np.linspace(10,400,300)
-        k = 1.0 / (math.pi * AR * self.e)
-        rho, altM = self.rhoFromUserAlt()
-        
-        CD0 = 0.012
-        
-        q = 0.5 * rho * VArray**2
-        CL = self.weight / (q * self.wingArea)
-        CD = CD0 + k * CL**2
-        TReq = q * self.wingArea * CD
-        TReq = TReq
-        rho0 = 1.225
-        sigma = rho / rho0
-        TAvail = self.thrust * (0.7 + 0.3 * sigma)
-        TAvail = TAvail 
-        TAvailCurve = np.full_like(VArray,TAvail)
-        
-        diff = TReq - TAvailCurve
-        CrossingsIndex = np.where(np.sign(diff[:-1]) != np.sign(diff[1:]))[0]
-        maxLevelSpeed = None
-        if CrossingsIndex.size > 0:
-            i = CrossingsIndex[-1]
-            x0,x1 = VArray[i],VArray[i+1]
-            y0,y1 = diff[i], diff[i+1]
-            frac = -y0/ (y1 - y0)
-            maxLevelSpeed = x0 + frac * (x1 - x0)
-        plotItem = self.plotWidget.plotItem
-        plotItem.clear()
-        plotItem.setLabel("bottom","Speed",units="m/s")
-        plotItem.setLabel("left","Thrust",units="N")
-        try:
-            legend = plotItem.legend
-        except AttributeError:
-            legend = plotItem.addLegend()
-        plotItem.plot(VArray,TReq,pen=pg.mkPen('r',width=2), name="Thrust Required (D)")
-        plotItem.plot(VArray,TAvailCurve,pen=pg.mkPen('b',width=2,style=pg.QtCore.Qt.DashLine),name="Thrust Available")
-        if maxLevelSpeed is not None:
-            TAtV = np.interp(maxLevelSpeed,VArray,TReq)
-            scatter = pg.ScatterPlotItem([maxLevelSpeed],[TAtV],symbol='o',size=8,brush='k')
-            plotItem.addItem(scatter)
-            text = pg.TextItem(html=f"<div style='color:black'>VMax = {maxLevelSpeed:.1f} m/s </div>", anchor=(0,1))
-            text.setPos(maxLevelSpeed,TAtV)
-            plotItem.addItem(text)
+        model, args, params = self.thrustInputs()
+        self.altitudeLine.setValue(args[4])
+        self.plotEnvelope()
+        key = curveKey("thrust",model.stats(),params)
+        cached = curveCache.get(key)
+        if cached is not None:
+            self.worker.cancel()
+            self.drawThrust(cached)
+            return
+        self.worker.submit(lambda: curveCache.put(key,diskCache.loadOrCompute("thrust",self.file,params,lambda: self.computeThrust(args,aero=model.aero),model.sources())),lambda: self.computeThrust(args,60,model.aero))
         
-    def rhoFromUserAlt(self):
-        altText = None
-        if altText is None:
-            altM = 1000
+    # Slider drags skip the disk cache, with the closed form polar both plots are cheap enough to compute in place.
+    # Tabulated drag puts a Mach scan under every level speed and ceiling bisection step (most of a second for the
+    # envelope), so those go through the workers with a coarse preview instead
+    @timed("whatIf:thrust")
+    def whatIfChanged(self):
+        self.inputAlt.setText(f"{self.whatIf.value('altitude'):.0f}")
+        model, args, params = self.thrustInputs()
+        self.altitudeLine.setValue(args[4])
+        inPlace = model.aero is None or not model.aero.hasDrag
+        # Separate names for the two plots, the worker lambdas read theirs after this method has returned
+        thrustKey = curveKey("thrust",model.stats(),params)
+        cached = curveCache.get(thrustKey)
+        if cached is not None or inPlace:
+            self.worker.cancel()
+            self.drawThrust(cached if cached is not None else curveCache.put(thrustKey,self.computeThrust(args,aero=model.aero)))
+        else:
+            self.worker.submit(lambda: curveCache.put(thrustKey,self.computeThrust(args,aero=model.aero)),lambda: self.computeThrust(args,60,model.aero))
+        envelopeModel, envelopeArgs, envelopeParams = self.envelopeInputs()
+        envelopeKey = curveKey("envelope",envelopeModel.stats(),envelopeParams)
+        cached = curveCache.get(envelopeKey)
+        if cached is not None or inPlace:
+            self.envelopeWorker.cancel()
+            self.drawEnvelope(cached if cached is not None else curveCache.put(envelopeKey,self.computeEnvelope(envelopeArgs,envelopeModel.aero)))
         else:
-            txt = altText.text().strip()
-            altM = float(txt) if txt else 1000
+            self.envelopeWorker.submit(lambda: curveCache.put(envelopeKey,self.computeEnvelope(envelopeArgs,envelopeModel.aero)),lambda: self.computeEnvelope(envelopeArgs,envelopeModel.aero,self.envelopeAlts[::10],6))
+        
+    # Curves on a speed grid for the plot, the annotated speeds come from the closed form solver rather than the grid
+    @timed("compute:thrust")
+    def computeThrust(self,args,points=300,aero=None):
+        VArray, TReq, TAvailCurve, _ = thrustCurves(*args,CD0=self.CD0,e=self.e,points=points,aero=aero)
+        VMin, VMax, VMinDrag, DMin = levelSpeeds(*args,CD0=self.CD0,e=self.e,aero=aero)
+        return VArray, TReq, TAvailCurve, float(VMin), float(VMax), float(VMinDrag), float(DMin)
+        
+    @timed("render:thrust")
+    def drawThrust(self,result,final=True):
+        VArray, TReq, TAvailCurve, VMin, VMax, VMinDrag, DMin = result
+        if final:
+            self.status.setText("")
+        self.requiredItem.setData(VArray,TReq)
+        self.availableItem.setData(VArray,TAvailCurve)
+        
+        # Level flight ends where drag meets thrust available, minimum drag is DMin
+        points = {"VMin": (VMin,TAvailCurve[0]),"VMinDrag": (VMinDrag,DMin),"VMax": (VMax,TAvailCurve[0])}
+        shown = {name: point for name, point in points.items() if np.isfinite(point[0])}
+        self.speedsItem.setData([p[0] for p in shown.values()],[p[1] for p in shown.values()])
+        for name, text in self.speedTexts.items():
+            text.setVisible(name in shown)
+            if name in shown:
+                V, T = shown[name]
+                text.setHtml(f"<div style='color:black'>{name} = {V:.1f} m/s </div>")
+                text.setPos(V,T)
+        
+    # ----- Flight envelope -----
+    
+    def envelopeInputs(self):
+        model = self.whatIf.apply(self.model)
+        args = (model.wingArea,model.wingSpan,model.weight,model.thrust,model.CLMax)
+        params = {"altitude": self.envelopeAlts,"CD0": self.CD0,"e": self.e,"whatIf": self.whatIf.scales()}
+        return model, args, params
+    
+    @timed("prepare:envelope")
+    def plotEnvelope(self):
+        model, args, params = self.envelopeInputs()
+        key = curveKey("envelope",model.stats(),params)
+        cached = curveCache.get(key)
+        if cached is not None:
+            self.envelopeWorker.cancel()
+            self.drawEnvelope(cached)
+            return
+        self.envelopeWorker.submit(lambda: curveCache.put(key,diskCache.loadOrCompute("envelope",self.file,params,lambda: self.computeEnvelope(args,model.aero),model.sources())))
+    
+    @timed("compute:envelope")
+    def computeEnvelope(self,args,aero=None,alts=None,ceilingIterations=24):
+        alts = self.envelopeAlts if alts is None else alts
+        alts, VMin, VMax, VStall, climbRate, absoluteCeiling, serviceCeiling = flightEnvelope(*args,alts=alts,CD0=self.CD0,e=self.e,aero=aero,ceilingIterations=ceilingIterations)
+        # The lowest altitude's climb rate tells the two NaN ceilings apart, climbing past the sweep or not climbing at all
+        return alts, VMin, VMax, VStall, float(absoluteCeiling), float(serviceCeiling), float(climbRate[0])
+    
+    @timed("render:envelope")
+    def drawEnvelope(self,result,final=True):
+        alts, VMin, VMax, VStall, absoluteCeiling, serviceCeiling, groundClimbRate = result
+        if final:
+            self.status.setText("")
+        # connect="finite" leaves a gap instead of a line through altitudes with no level flight
+        self.minSpeedItem.setData(VMin,alts,connect="finite")
+        self.maxSpeedItem.setData(VMax,alts,connect="finite")
+        self.stallItem.setData(VStall,alts)
+        
+        text = []
+        for name, line, value, threshold in [("Service",self.serviceLine,serviceCeiling,serviceClimbRate),("Absolute",self.absoluteLine,absoluteCeiling,0.0)]:
+            line.setVisible(bool(np.isfinite(value)))
+            if np.isfinite(value):
+                line.setValue(value)
+                text.append(f"{name} ceiling: {value:.0f} m")
+            elif groundClimbRate < threshold:
+                text.append(f"{name} ceiling: none (cannot climb)")
+            else:
+                text.append(f"{name} ceiling: above {alts[-1]:.0f} m")
+        self.ceilingLabel.setText(", ".join(text))
+        
+    def plotFailed(self,message):
+        self.status.setText(f"Plot failed: {failureText(message)}")
+        
+    # Text still being typed ("-", "1e") falls back to the what-if altitude
+    def rhoFromUserAlt(self):
+        try:
+            altM = float(self.inputAlt.text().strip())
+        except ValueError:
+            altM = self.whatIf.value("altitude")
         _, rho, _ = self.atmosphere(altM)
         return rho, altM
         
     def atmosphere(self,altM):
-        g = 9.80665
-        gamma = 1.4
-        R = 287.05
-        T0 = 288.15
-        p0 = 101325
-        L = -0.0065
-        if altM <= 11000:
-            T = T0 + L * altM
-            p = p0 * (T/T0) ** (-g / (L*R))
-        else:
-            T = 216.65
-            p = p0 * 0.22336 * np.exp(-g*(altM - 11000) / (R*T))
-        rho = p/(R*T)
-        a = np.sqrt(gamma*R*T)
-        return T,rho,a
\ No newline at end of file
+        return atmosphere(altM)
\ No newline at end of file
@@ -1,9 +1,15 @@
-from PyQt5.QtWidgets import QWidget, QPushButton, QLabel, QHBoxLayout, QVBoxLayout, QLineEdit, QComboBox
-import json
-from PyQt5.QtCore import pyqtSignal
+from PyQt5.QtWidgets import QWidget, QPushButton, QLabel, QHBoxLayout, QVBoxLayout, QLineEdit, QComboBox, QSlider
+from PyQt5.QtCore import Qt, pyqtSignal, QRectF
 from PyQt5.QtGui import QDoubleValidator
 import numpy as np
 import pyqtgraph as pg
+from engine.Turn import turnCurves, turnCarpet
+from engine.Lift import liftCoefficient
+from engine.CurveCache import curveCache, curveKey
+from engine.DiskCache import diskCache
+from PlotWorker import PlotWorker, failureText
+from screens.WhatIfPanel import WhatIfPanel
+from Profiling import timed
 
 """
 Create a graph showing the turning performance at different speeds (represented by Mach speed) at different altitudes
@@ -11,21 +17,37 @@ Create a graph showing the turning performance at different speeds (represented
 Red represents the Instantaneous turn rate, which is limited by CLMax and the g-limit (currently at 9Gs)
 
 Green represents Sustained turn rate (turning without losing energy) and is determined by thrust and drag
+
+The altitude modes compute the whole altitude x Mach carpet once, scrubbing, the family of curves and the heatmap
+all read from that carpet without recomputing
+
+The what-if sliders recompute on the GUI thread (well under a millisecond on the default grids) and update the existing
+curves with setData, so dragging them stays interactive without touching the aircraft file
 """    
 
 class TurnPerformance(QWidget):
     finished = pyqtSignal()
-    def __init__(self,file):
+    def __init__(self,file,repository):
         super().__init__()
         self.file = file
+        self.repository = repository
+        self.repository.dataChanged.connect(self.onDataChanged)
+        self.worker = PlotWorker(self)
+        self.worker.resultReady.connect(self.drawCurves)
+        self.worker.failed.connect(self.plotFailed)
+        self.carpetWorker = PlotWorker(self)
+        self.carpetWorker.resultReady.connect(self.receiveCarpet)
+        self.carpetWorker.failed.connect(self.plotFailed)
+        self.carpetAlts = np.arange(0,15001,250,dtype=float)
+        self.carpetMach = np.linspace(0.2,1.5,100)
+        self.CD0 = 0.02
+        self.e = 0.8
+        self.carpet = None
         self.initUI()
         
     def initUI(self):
-        try:
-            with open(self.file,"r") as f:
-                self.data = json.load(f)
-        except(FileNotFoundError,json.JSONDecodeError):
-            raise RuntimeError("Home file not found error")
+        self.data = self.repository.get(self.file)
+        self.model = self.repository.model(self.file)
         
         self.main = QVBoxLayout()
         self.row1 = QHBoxLayout()
@@ -38,7 +60,22 @@ class TurnPerformance(QWidget):
         pg.setConfigOption('background','w')
         pg.setConfigOption('foreground','k')
         self.plotLift = pg.PlotWidget(title="Lift Curve")
+        self.plotLift.plotItem.setLabel("bottom","Angle of Attack",units="deg")
+        self.plotLift.plotItem.setLabel("left","CL",units="")
+        self.liftItem = self.plotLift.plotItem.plot(pen=pg.mkPen('r',width=2))
         self.plotTurn = pg.PlotWidget(title="Turn Performance")
+        self.plotTurn.plotItem.setLabel("bottom","Mach",units="")
+        self.plotTurn.plotItem.addLegend()
+        self.instantItem = pg.PlotDataItem(pen=pg.mkPen('r',width=2),name="Instantaneous")
+        self.sustainedItem = pg.PlotDataItem(pen=pg.mkPen('g',width=2),name="Sustained")
+        self.rateCurvesShown = False
+        self.heatmap = pg.ImageItem()
+        self.heatmap.setLookupTable(pg.colormap.get("viridis").getLookupTable())
+        self.heatmapLevels = []
+        for level in [5,10,15,20,25]:
+            curve = pg.IsocurveItem(level=level,pen=pg.mkPen('w',width=1))
+            curve.setParentItem(self.heatmap)
+            self.heatmapLevels.append(curve)
         self.row2.addWidget(self.plotLift)
         self.row2.addWidget(self.plotTurn)
         self.inputAlt = QLineEdit()
@@ -47,12 +84,29 @@ class TurnPerformance(QWidget):
         self.inputCombo = QComboBox()
         self.inputCombo.addItems(["m","km","ft","miles"])
         
-        self.plot()
         self.plotAgain = QPushButton("Plot")
-        self.plotAgain.clicked.connect(self.plot)
+        self.plotAgain.clicked.connect(lambda: self.plot())
+        
+        self.modeCombo = QComboBox()
+        self.modeCombo.addItems(["Single Altitude","Scrub Altitudes","Altitude Family","Heatmap"])
+        self.modeCombo.currentIndexChanged.connect(self.changeMode)
+        self.altSlider = QSlider(Qt.Horizontal)
+        self.altSlider.setRange(0,len(self.carpetAlts) - 1)
+        self.altSlider.setValue(4)
+        self.altSlider.setEnabled(False)
+        self.altSlider.valueChanged.connect(self.drawCarpet)
+        self.altLabel = QLabel("")
+        self.row3.addWidget(self.modeCombo)
+        self.row3.addWidget(self.altSlider)
+        self.row3.addWidget(self.altLabel)
+        
+        self.whatIf = WhatIfPanel()
+        self.whatIf.changed.connect(self.whatIfChanged)
         
         self.row4.addWidget(self.inputAlt)
         self.row4.addWidget(self.plotAgain)
+        self.status = QLabel("")
+        self.status.setWordWrap(True)
         
         self.backButton = QPushButton("Go Back")
         self.backButton.clicked.connect(self.goBack)
@@ -61,7 +115,9 @@ class TurnPerformance(QWidget):
         self.main.addLayout(self.row1)
         self.main.addLayout(self.row2)
         self.main.addLayout(self.row3)
+        self.main.addWidget(self.whatIf)
         self.main.addLayout(self.row4)
+        self.main.addWidget(self.status)
         self.main.addLayout(self.row5)
         self.plot()
         
@@ -70,168 +126,176 @@ class TurnPerformance(QWidget):
     """
     Curve showing lift for the aircraft at speeds
     
-    Uses capped or drop off percentage to represent different aero on different planes
+    Uses capped or drop off percentage (or the file's own lift table) to represent different aero on different planes,
+    alphaDeg may be a whole array
     """
         
     def liftCurve(self,alphaDeg):
-        pref = self.data["aircraft"]["stats"]
-        postStall = pref["Post-Stall Behaviour"]
+        return liftCoefficient(self.model,alphaDeg)
+    
+    # ----- Plotting all lines -----
+    
+    """
+    Inputs are read on the GUI thread, the curves are computed by the worker (coarse Mach grid first)
+    and drawn when they are posted back
+    """
+                
+    def turnInputs(self):
+        # Text still being typed ("-", "1e") falls back to the what-if altitude
+        try:
+            altM = float(self.inputAlt.text().strip())
+        except ValueError:
+            altM = self.whatIf.value("altitude")
+        gLimit = self.whatIf.value("gLimit")
+        model = self.whatIf.apply(self.model)
+        params = {"altitude": altM,"mach": (0.2,1.5,100),"alpha": (-5,30,200),"CD0": self.CD0,"e": self.e,"gLimit": gLimit,"whatIf": self.whatIf.scales()}
+        return model, altM, gLimit, params
+                
+    @timed("prepare:turn")
+    def plot(self):
+        model, altM, gLimit, params = self.turnInputs()
+        key = curveKey("turn",model.stats(),params)
+        cached = curveCache.get(key)
+        if cached is not None:
+            self.worker.cancel()
+            self.drawCurves(cached)
+            return
+        self.worker.submit(lambda: curveCache.put(key,diskCache.loadOrCompute("turn",self.file,params,lambda: self.computeCurves(model,altM,100,gLimit),model.sources())),lambda: self.computeCurves(model,altM,20,gLimit))
+    
+    # Slider drags skip the worker and the disk cache, turn rates are pointwise on the Mach x altitude grid (no solver,
+    # table lookups included), so even the carpet is about a millisecond in place
+    @timed("whatIf:turn")
+    def whatIfChanged(self):
+        self.inputAlt.setText(f"{self.whatIf.value('altitude'):.0f}")
+        model, altM, gLimit, params = self.turnInputs()
+        self.worker.cancel()
+        self.drawCurves(curveCache.getOrCompute("turn",model.stats(),params,lambda: self.computeCurves(model,altM,100,gLimit)))
+        if self.modeCombo.currentIndex() != 0:
+            self.carpetWorker.cancel()
+            carpetParams = self.carpetParams(gLimit)
+            self.receiveCarpet(curveCache.getOrCompute("turnCarpet",model.stats(),carpetParams,lambda: self.computeCarpet(model,gLimit)))
         
-        alphaRad = np.radians(alphaDeg)
+    @timed("compute:turn")
+    def computeCurves(self,model,altM,nMach,gLimit=9.0):
+        machVals = np.linspace(0.2,1.5,nMach)
         
-        CL = pref["CL Slope"] * alphaRad
+        turnRatesInstant, turnRatesSustainedPS = turnCurves(machVals,altM,model.wingArea,model.wingSpan,model.weight,model.thrust,model.CLMax,CD0=self.CD0,e=self.e,gLimit=gLimit,aero=model.aero)
         
-        alphaStall = pref["Alpha Stall"]
-        CLMax = pref["CL Max"]
-        CLSlope = pref["CL Slope"]
+        alphas = np.linspace(-5,30,200)
+        CLs = liftCoefficient(model,alphas)
         
-        if alphaDeg <= alphaStall:
-            CL = CLSlope * alphaRad
-            return min(CL,CLMax)
-        else:
-            if postStall["Is Capped"]:
-                return CLMax
-            else:
-                pct = float(postStall["Percentage"])
-                CLMin = CLMax * pct
-                dropWidth = 5.0
-                alphaDropEnd = alphaStall + dropWidth
-                if alphaDeg <= alphaDropEnd:
-                    t = (alphaDeg - alphaStall) / dropWidth
-                    return CLMax * (1-t) + CLMin * t
-                else:
-                    return CLMin
+        return machVals, turnRatesInstant, turnRatesSustainedPS, alphas, CLs
+        
+    @timed("render:turn")
+    def drawCurves(self,result,final=True):
+        machVals, turnRatesInstant, turnRatesSustainedPS, alphas, CLs = result
+        if final:
+            self.status.setText("")
+        
+        self.liftItem.setData(alphas,CLs)
+        
+        # The carpet modes own the turn plot, only the lift curve follows the single altitude inputs there
+        if self.modeCombo.currentIndex() != 0:
+            return
+        
+        self.showRateCurves()
+        self.instantItem.setData(machVals,turnRatesInstant)
+        self.sustainedItem.setData(machVals,turnRatesSustainedPS)
     
-    """
-    Calculating physics felt by aircraft, uses speeds at kt
-    """
+    # The instantaneous and sustained items are created once and only re-added after a family or heatmap view
+    def showRateCurves(self):
+        if self.rateCurvesShown:
+            return
+        plotItem = self.plotTurn.plotItem
+        plotItem.clear()
+        plotItem.setLabel("left","Turn Rate",units="deg/s")
+        plotItem.addItem(self.instantItem)
+        plotItem.addItem(self.sustainedItem)
+        self.rateCurvesShown = True
+
+    # ----- Altitude carpet -----
     
-    def atmosphere(self,altM):
-        g = 9.80665
-        gamma = 1.4
-        R = 287.05
-        T0 = 288.15
-        p0 = 101325
-        L = -0.0065
-        if altM <= 11000:
-            T = T0 + L * altM
-            p = p0 * (T/T0) ** (-g / (L*R))
+    def changeMode(self,index):
+        self.altSlider.setEnabled(index == 1)
+        if index == 0:
+            self.plot()
         else:
-            T = 216.65
-            p = p0 * 0.22336 * np.exp(-g*(altM - 11000) / (R*T))
-        rho = p/(R*T)
-        a = np.sqrt(gamma*R*T)
-        return T,rho,a
+            self.plotCarpet()
     
-    def machToTAS(self,mach,altM):
-        _,rho,a = self.atmosphere(altM)
-        V = mach*a
-        return V, rho
+    def carpetParams(self,gLimit):
+        return {"altitude": self.carpetAlts,"mach": self.carpetMach,"CD0": self.CD0,"e": self.e,"gLimit": gLimit,"whatIf": self.whatIf.scales()}
     
-    def instantaneousMax(self,CLMax,S,W,rho,V,gLimit = 9):
-        q = 0.5 * rho * V**2
-        n = q * CLMax * S / W
-        return min(n,gLimit)
+    @timed("prepare:turnCarpet")
+    def plotCarpet(self):
+        model, _, gLimit, _ = self.turnInputs()
+        params = self.carpetParams(gLimit)
+        key = curveKey("turnCarpet",model.stats(),params)
+        cached = curveCache.get(key)
+        if cached is not None:
+            self.carpetWorker.cancel()
+            self.receiveCarpet(cached)
+            return
+        self.carpetWorker.submit(lambda: curveCache.put(key,diskCache.loadOrCompute("turnCarpet",self.file,params,lambda: self.computeCarpet(model,gLimit),model.sources())))
+        
+    @timed("compute:turnCarpet")
+    def computeCarpet(self,model,gLimit=9.0):
+        return turnCarpet(self.carpetMach,self.carpetAlts,model.wingArea,model.wingSpan,model.weight,model.thrust,model.CLMax,CD0=self.CD0,e=self.e,gLimit=gLimit,aero=model.aero)
     
-    def turnRateFromN(self,n,V):
-        g = 9.80665
-        if n <= 1.0:
-            return 0
-        omega = g * np.sqrt(n**2 - 1.0) / V
-        return omega * 180.0 /np.pi
+    def receiveCarpet(self,result,final=True):
+        self.carpet = result
+        if final:
+            self.status.setText("")
+        self.drawCarpet()
     
-    def specificExcessPower(self,TForce,DForce,V,W):
-        return (TForce - DForce) * V / W
+    def plotFailed(self,message):
+        self.status.setText(f"Plot failed: {failureText(message)}")
     
-    def sustainedN(self,V,rho,S,W,TAvail,CD0,k,gLimit=9):
-        q = 0.5 * rho * V**2
-        nCandidates = np.linspace(1.0,gLimit,200)
-        best = 1
-        for n in nCandidates:
-            CL = n * W / (q * S)
-            CD = CD0 + k * CL**2
-            D = q * S * CD
-            if TAvail >= D:
-                best = n
-            else:
-                break
-        return best
-
-    # ----- Plotting all lines -----
-                
-    def plot(self):
+    @timed("render:turnCarpet")
+    def drawCarpet(self,*args):
+        mode = self.modeCombo.currentIndex()
+        if self.carpet is None or mode == 0:
+            return
+        instant, sustained = self.carpet
+        plotItem = self.plotTurn.plotItem
         
-        altText = self.inputAlt.text().strip()
-        if altText:
-            altM = float(altText)
-        else:
-            altM = 1000.0
-        
-        pref = self.data["aircraft"]["stats"]
-        CLMax = pref["CL Max"]
-        wingArea = pref["Wing Area"]["value"]
-        
-        if pref["Wing Area"]["unit"] == "ft\u00b2":
-            wingArea = wingArea * 0.092903
-        
-        wingSpan = pref["Wing Span"]["value"]
-        
-        if pref["Wing Span"]["unit"] == "ft":
-            wingSpan = wingSpan * 0.3048
-        
-        weight = pref["Weight"]["value"]
-        conversions = {
-            "kg":9.80665,
-            "t":1000 * 9.80665,
-            "lb":4.448,
-        }
-        factor = conversions.get(pref["Weight"]["unit"],1)
-        weight = weight * factor
-        
-        thrust = pref["Thrust"]["value"]
-        conversions = {
-            "lbf": 4.44822,
-            "kgf": 9.80665,
-            "kN": 1000,
-        }
-        factor = conversions.get(pref["Thrust"]["unit"],1)
-        thrust = thrust * factor
-        machVals = np.linspace(0.2,1.5,100)
-        
-        turnRatesInstant = []
-        turnRatesSustainedPS = []
-        
-        for m in machVals:
-            V, rho = self.machToTAS(m,altM)
-            k = 1.0 / (np.pi * ((wingSpan**2)/wingArea)*0.8)
-            CL = weight / (0.5 * rho * V ** 2 * wingArea)
-            CD = 0.02 + k * CL**2
-            dragC = 0.5 * rho * V**2 * wingArea * CD
-            
-            nInst = self.instantaneousMax(CLMax,wingArea,weight,rho,V,9.0)
-            trInst = self.turnRateFromN(nInst,V)
-            turnRatesInstant.append(trInst)
-            
-            nSust = self.sustainedN(V,rho,wingArea,weight,(thrust * (rho/1.225)),CD,k,9)
-            trSust = self.turnRateFromN(nSust,V)
-            turnRatesSustainedPS.append(trSust)
-        
-        self.plotLift.plotItem.clear()
-        self.plotTurn.plotItem.clear()
-        
-        alphas = np.linspace(-5,30,200)
+        if mode == 1:
+            row = self.altSlider.value()
+            self.altLabel.setText(f"{self.carpetAlts[row]:.0f} m")
+            self.showRateCurves()
+            self.instantItem.setData(self.carpetMach,instant[row])
+            self.sustainedItem.setData(self.carpetMach,sustained[row])
+            return
         
-        CLs = [self.liftCurve(a) for a in alphas]
-        
-        self.plotLift.plotItem.clear()
-        self.plotLift.plotItem.setLabel("bottom","Angle of Attack",units="deg")
-        self.plotLift.plotItem.setLabel("left","CL",units="")
-        self.plotLift.plotItem.plot(alphas,CLs,pen=pg.mkPen('r',width=2))
-        
-        self.plotTurn.plotItem.setLabel("bottom","Mach",units="")
-        self.plotTurn.plotItem.setLabel("left","Turn Rate",units="deg/s")
-        self.plotTurn.plotItem.plot(machVals,turnRatesInstant,pen=pg.mkPen('r',width=2),name="Instantaneous")
-        self.plotTurn.plotItem.plot(machVals,turnRatesSustainedPS,pen=pg.mkPen('g',width=2),name="Sustained")
+        plotItem.clear()
+        self.rateCurvesShown = False
+        if mode == 2:
+            self.altLabel.setText("Sustained")
+            plotItem.setLabel("left","Turn Rate",units="deg/s")
+            rows = range(0,len(self.carpetAlts),8)
+            for i, row in enumerate(rows):
+                pen = pg.mkPen(pg.intColor(i,hues=len(rows)),width=2)
+                plotItem.plot(self.carpetMach,sustained[row],pen=pen,name=f"{self.carpetAlts[row]:.0f} m")
+        else:
+            self.altLabel.setText("Sustained (deg/s)")
+            plotItem.setLabel("left","Altitude",units="m")
+            # ImageItem is indexed [x, y], so the (altitude, Mach) carpet is transposed
+            image = sustained.T
+            self.heatmap.setImage(image,levels=(0.0,max(float(np.max(image)),1.0)))
+            self.heatmap.setRect(QRectF(self.carpetMach[0],self.carpetAlts[0],self.carpetMach[-1]-self.carpetMach[0],self.carpetAlts[-1]-self.carpetAlts[0]))
+            for curve in self.heatmapLevels:
+                curve.setData(image)
+            plotItem.addItem(self.heatmap)
+
+    # ----- Aircraft file changed -----
+
+    def onDataChanged(self,path):
+        if self.repository.isSameFile(path,self.file):
+            self.data = self.repository.get(self.file)
+            self.model = self.repository.model(self.file)
+            self.carpet = None
+            self.plot()
+            if self.modeCombo.currentIndex() != 0:
+                self.plotCarpet()
 
     # ----- Go back to Home -----
 
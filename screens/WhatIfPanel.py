@@ -0,0 +1,92 @@
+from PyQt5.QtWidgets import QWidget, QPushButton, QLabel, QGridLayout, QSlider
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
+
+"""
+What-if sliders shared by the graph screens, the aircraft file itself is never touched
+
+Weight, thrust and CL Max are scaled as a percentage of the file's value, altitude and g-limit are absolute
+
+Slider moves are coalesced, changed is emitted at most once every interval ms with the latest values,
+so dragging a slider redraws at a steady rate instead of queueing a recompute per pixel
+"""
+
+# name: (label, minimum, maximum, step, default, format)
+whatIfFields = {
+    "altitude": ("Altitude",0.0,15000.0,100.0,1000.0,"{:.0f} m"),
+    "weight": ("Weight",50.0,150.0,1.0,100.0,"{:.0f} %"),
+    "thrust": ("Thrust",50.0,150.0,1.0,100.0,"{:.0f} %"),
+    "CLMax": ("CL Max",50.0,150.0,1.0,100.0,"{:.0f} %"),
+    "gLimit": ("G-Limit",3.0,12.0,0.5,9.0,"{:.1f} g"),
+}
+
+class WhatIfPanel(QWidget):
+    changed = pyqtSignal()
+
+    def __init__(self,fields=None,interval=30,parent=None):
+        super().__init__(parent)
+        self.fields = list(fields or whatIfFields)
+        self.sliders = {}
+        self.labels = {}
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.changed.emit)
+
+        layout = QGridLayout()
+        layout.setContentsMargins(0,0,0,0)
+        for row, name in enumerate(self.fields):
+            label, minimum, maximum, step, default, _ = whatIfFields[name]
+            slider = QSlider(Qt.Horizontal)
+            slider.setRange(0,int(round((maximum - minimum) / step)))
+            slider.setValue(int(round((default - minimum) / step)))
+            slider.valueChanged.connect(lambda _, name=name: self.sliderMoved(name))
+            self.sliders[name] = slider
+            self.labels[name] = QLabel()
+            layout.addWidget(QLabel(label),row,0)
+            layout.addWidget(slider,row,1)
+            layout.addWidget(self.labels[name],row,2)
+            self.updateLabel(name)
+
+        self.resetButton = QPushButton("Reset")
+        self.resetButton.clicked.connect(self.reset)
+        layout.addWidget(self.resetButton,0,3)
+        self.setLayout(layout)
+
+    def value(self,name):
+        _, minimum, _, step, default, _ = whatIfFields[name]
+        if name not in self.sliders:
+            return default
+        return minimum + self.sliders[name].value() * step
+
+    def values(self):
+        return {name: self.value(name) for name in whatIfFields}
+
+    def setValue(self,name,value):
+        _, minimum, maximum, step, _, _ = whatIfFields[name]
+        slider = self.sliders[name]
+        slider.blockSignals(True)
+        slider.setValue(int(round((min(max(value,minimum),maximum) - minimum) / step)))
+        slider.blockSignals(False)
+        self.updateLabel(name)
+
+    def updateLabel(self,name):
+        self.labels[name].setText(whatIfFields[name][5].format(self.value(name)))
+
+    def sliderMoved(self,name):
+        self.updateLabel(name)
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def reset(self):
+        for name in self.fields:
+            self.setValue(name,whatIfFields[name][4])
+        self.changed.emit()
+
+    # Percentage sliders only, for cache keys (altitude and g-limit are keyed by the screens themselves)
+    def scales(self):
+        return {name: self.value(name) for name in ["weight","thrust","CLMax"]}
+
+    # AircraftModel with the percentage sliders applied
+    def apply(self,model):
+        return model.scaled(weight=self.value("weight") / 100,thrust=self.value("thrust") / 100,CLMax=self.value("CLMax") / 100)